@@ -0,0 +1,181 @@
+"""On-node cache of artifacts retrieved from S3, shared by all worker processes in a pod.
+
+Objects are stored under a name derived from bucket, object key and object version (or
+ETag), so a cached object never goes stale - a new upload simply gets a new name. The
+least recently used objects are evicted once the cache grows over its size limit.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+
+from f8a_worker.defaults import configuration
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCache(object):
+    """Size-bounded, content-addressed on-disk cache of S3 objects."""
+
+    _OBJECTS_DIR = 'objects'
+    _LOCKS_DIR = 'locks'
+    # keys are locked in buckets given by this many leading hex digits of their hash,
+    #  so the number of lock files is bounded (16 ** 2 = 256)
+    _LOCK_BUCKET_DIGITS = 2
+    # temporary files of populations not finished for this many seconds were abandoned
+    _TMP_MAX_AGE = 3600
+
+    def __init__(self, cache_dir=None, max_size=None):
+        """Initialize cache.
+
+        :param cache_dir: str, directory of the cache, None disables the cache
+        :param max_size: int, maximum size of cached objects in bytes
+        """
+        self.cache_dir = cache_dir if cache_dir is not None else configuration.ARTIFACT_CACHE_DIR
+        self.max_size = max_size if max_size is not None else configuration.ARTIFACT_CACHE_SIZE
+        self.stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0, 'evictions': 0}
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        """Check whether the cache is configured."""
+        return bool(self.cache_dir)
+
+    @staticmethod
+    def make_key(bucket_name, object_key, version):
+        """Create cache key for the given version of an S3 object."""
+        return '{b}/{k}@{v}'.format(b=bucket_name, k=object_key, v=version)
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, self._OBJECTS_DIR, self._hash(key))
+
+    def _locked(self, key):
+        """Serialize population of the given key (and keys in the same bucket) across processes."""
+        return self._locked_bucket(self._hash(key))
+
+    @contextmanager
+    def _locked_bucket(self, name):
+        """Lock bucket of the object stored under the given name (hash of its key)."""
+        bucket = name[:self._LOCK_BUCKET_DIGITS]
+        with open(os.path.join(self.cache_dir, self._LOCKS_DIR, bucket), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _count(self, counter, value=1):
+        with self._lock:
+            self.stats[counter] += value
+
+    def hit_ratio(self):
+        """Get ratio of requests served from the cache."""
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    @staticmethod
+    def _link(source, destination):
+        """Make cached object available at destination, without copying if possible."""
+        if os.path.lexists(destination):
+            os.unlink(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            # cache directory is on a different filesystem
+            shutil.copyfile(source, destination)
+
+    def retrieve(self, key, destination, populate):
+        """Place cached object at destination, populating the cache on miss.
+
+        :param key: str, cache key, see make_key()
+        :param destination: str, path where the object should be placed
+        :param populate: callable, retrieves the object to the path given as its only argument
+        """
+        path = self._path(key)
+        for subdir in (self._OBJECTS_DIR, self._LOCKS_DIR):
+            os.makedirs(os.path.join(self.cache_dir, subdir), exist_ok=True)
+
+        with self._locked(key):
+            if os.path.isfile(path):
+                # file modification time is used as last access time for LRU eviction
+                os.utime(path)
+                self._link(path, destination)
+                self._count('hits')
+                self._count('bytes_saved', os.path.getsize(path))
+                logger.debug("artifact cache hit for %s (hit ratio %.2f)", key, self.hit_ratio())
+                return
+
+            self._count('misses')
+            with NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp',
+                                    delete=False) as f:
+                tmp_path = f.name
+            try:
+                populate(tmp_path)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._link(path, destination)
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used objects until the cache fits into its size limit.
+
+        Temporary files left behind by processes that died while populating the cache
+        are removed as well.
+        """
+        objects_dir = os.path.join(self.cache_dir, self._OBJECTS_DIR)
+        entries = []
+        abandoned_before = time() - self._TMP_MAX_AGE
+        for entry in os.scandir(objects_dir):
+            try:
+                entry_stat = entry.stat()
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            if entry.name.endswith('.tmp'):
+                if entry_stat.st_mtime < abandoned_before:
+                    self._remove(entry.path)
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            # retrieve() must not see the object disappear between its check and use
+            with self._locked_bucket(os.path.basename(path)):
+                if self._remove(path):
+                    self._count('evictions')
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        """Remove file, False if it was already removed by another process."""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def clear(self):
+        """Reset statistics (cached objects are kept)."""
+        with self._lock:
+            for counter in self.stats:
+                self.stats[counter] = 0
+
+
+# Shared by all tasks in the worker process
+artifact_cache = ArtifactCache()
@@ -10,7 +10,8 @@ from selinon import SelinonTask, FatalTaskError
 from datetime import datetime
 
 from f8a_worker.errors import TaskAlreadyExistsError
-from f8a_worker.schemas import load_worker_schema, set_schema_ref
+from f8a_worker.schemas import worker_schema_validators, set_schema_ref
+from f8a_worker.task_metrics import collect_task_metrics
 from f8a_worker.utils import json_serial
 from f8a_worker.object_cache import ObjectCache
 from f8a_worker.storages import BayesianPostgres
@@ -21,7 +22,7 @@ class BaseTask(SelinonTask):
     """Base class for selinon tasks."""
 
     description = 'Root of the Task object hierarchy'
-    schema_ref = _schema = None
+    schema_ref = None
     # set this to False if your task shouldn't get the `_audit` value added to result dict
     add_audit_info = True
 
@@ -44,19 +45,28 @@ class BaseTask(SelinonTask):
     def _add_audit_info(task_result: dict,
                         task_start: datetime,
                         task_end: datetime,
-                        node_args):
+                        node_args,
+                        metrics=None):
         """Add the audit and release information to the result dictionary.
 
         :param task_result: dict, task result
         :param task_start: datetime, the start of the task
         :param task_end: datetime, the end of the task
         :param node_args: arguments passed to flow/node
+        :param metrics: TaskMetrics, summary (and connection pool statistics) is added if
+                        metrics are enabled
         """
         task_result['_audit'] = {
             'started_at': json_serial(task_start),
             'ended_at': json_serial(task_end),
             'version': 'v1'
         }
+        if metrics is not None and metrics.enabled:
+            summary = metrics.summary()
+            pool_stats = BayesianPostgres.pool_stats()
+            if pool_stats:
+                summary['postgres_pool'] = pool_stats
+            task_result['_audit']['metrics'] = summary
 
         ecosystem_name = node_args.get('ecosystem')
         task_result['_release'] = '{}:{}:{}'.format(ecosystem_name,
@@ -69,18 +79,29 @@ class BaseTask(SelinonTask):
         Selinon transparently calls run(), which takes care of task audit and
         some additional checks and calls execute().
         """
-        # SQS guarantees 'deliver at least once', so there could be multiple
-        # messages of a type, give up immediately
-        if self.storage and isinstance(self.storage, (BayesianPostgres, PackagePostgres)):
-            if self.storage.get_worker_id_count(self.task_id) > 0:
-                raise TaskAlreadyExistsError("Task with ID '%s'"
-                                             " was already processed" % self.task_id)
+        with collect_task_metrics(self.task_name) as metrics:
+            # SQS guarantees 'deliver at least once', so there could be multiple
+            # messages of a type, give up immediately
+            if self.storage and isinstance(self.storage, (BayesianPostgres, PackagePostgres)):
+                if not self.storage.claim_task(self.task_id):
+                    raise TaskAlreadyExistsError("Task with ID '%s'"
+                                                 " was already processed" % self.task_id)
 
+            return self._run(node_args, metrics)
+
+    def _run(self, node_args, metrics):
+        """Execute task, validate its result and add the audit info.
+
+        :param node_args: arguments passed to flow/node
+        :param metrics: TaskMetrics of this task run
+        """
         start = datetime.utcnow()
         try:
-            result = self.execute(node_args)
+            with metrics.span('execute'):
+                result = self.execute(node_args)
 
         except Exception as exc:
+            error_stored = False
             if self.add_audit_info:
                 # `_audit` key is added to every analysis info submitted
                 end = datetime.utcnow()
@@ -91,10 +112,11 @@ class BaseTask(SelinonTask):
                     task_start=start,
                     task_end=end,
                     node_args=node_args,
+                    metrics=metrics
                 )
 
                 # write the audit info to the storage
-                self.storage.store_error(
+                error_stored = self.storage.store_error(
                     node_args=node_args,
                     flow_name=self.flow_name,
                     task_name=self.task_name,
@@ -103,6 +125,10 @@ class BaseTask(SelinonTask):
                     result=result
                 )
 
+            if not error_stored and isinstance(self.storage, (BayesianPostgres, PackagePostgres)):
+                # there is no trace of the task in the database, let a retry run
+                self.storage.release_task(self.task_id)
+
             raise exc
 
         finally:
@@ -113,7 +139,8 @@ class BaseTask(SelinonTask):
 
         if result:
             # Ensure result complies with the defined schema (if any) before saving
-            self.validate_result(result)
+            with metrics.span('validate'):
+                self.validate_result(result)
 
         if result is None:
             # Keep track of None results and add _audit and _release keys
@@ -126,6 +153,7 @@ class BaseTask(SelinonTask):
                 task_start=start,
                 task_end=end,
                 node_args=node_args,
+                metrics=metrics
             )
 
         return result
@@ -147,13 +175,9 @@ class BaseTask(SelinonTask):
         schema_ref = self.schema_ref
         if schema_ref is None:
             return
-        # Load schema if not yet loaded
-        schema = self._schema
-        if schema is None:
-            schema = self._schema = load_worker_schema(schema_ref)
-        # Validate result against schema
+        # Validate result against schema, validators are created once per process
         try:
-            jsonschema.validate(result, schema)
+            worker_schema_validators.validate(result, schema_ref)
         except jsonschema.exceptions.ValidationError as e:
             raise FatalTaskError('Schema validation failed: {e}'.format(e=str(e)))
         # Record the validated schema details
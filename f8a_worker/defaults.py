@@ -60,9 +60,72 @@ class F8AConfiguration(object):
     UNQUOTED_POSTGRES_CONNECTION = _make_postgres_string(environ.get('POSTGRESQL_PASSWORD', ''))
     POSTGRES_CONNECTION = _make_postgres_string(
         quote(environ.get('POSTGRESQL_PASSWORD', ''), safe=''))
+    # Connection pool shared by per-thread sessions of Postgres adapters,
+    #  max overflow -1 means unlimited number of connections over pool size
+    POSTGRES_POOL_SIZE = int(environ.get('POSTGRES_POOL_SIZE', '5'))
+    POSTGRES_POOL_MAX_OVERFLOW = int(environ.get('POSTGRES_POOL_MAX_OVERFLOW', '10'))
+    POSTGRES_POOL_TIMEOUT = int(environ.get('POSTGRES_POOL_TIMEOUT', '30'))
+    POSTGRES_POOL_RECYCLE = int(environ.get('POSTGRES_POOL_RECYCLE', '1800'))
+    POSTGRES_POOL_PRE_PING = environ.get('POSTGRES_POOL_PRE_PING', '1').lower() in \
+        ('1', 'true', 'yes')
+    # JSON output of commands (e.g. mercator, scancode) is parsed incrementally, this is
+    #  the maximum size (in characters) of a single value held in memory while parsing
+    JSON_STREAM_MAX_VALUE_SIZE = int(environ.get('JSON_STREAM_MAX_VALUE_SIZE',
+                                                 str(256 * 1024 ** 2)))
+
+    # Validator of task results, 'jsonschema' or 'fastjsonschema' (if installed)
+    SCHEMA_VALIDATOR_BACKEND = environ.get('SCHEMA_VALIDATOR_BACKEND', 'jsonschema')
+
+    # Tasks claim their ID in the task_claims table before they run, so that duplicate
+    #  deliveries are rejected; a claim without a stored result can be taken over (and is
+    #  pruned) after this many seconds - keep it below visibility_timeout of the broker,
+    #  so that a task redelivered after the worker running it died is not rejected
+    TASK_CLAIM_TIMEOUT = int(environ.get('TASK_CLAIM_TIMEOUT', '900'))
+    # Per-task timing and resource metrics (f8a_worker.task_metrics), added to `_audit`
+    #  of task results and exported to StatsD and/or a Prometheus endpoint if configured
+    TASK_METRICS = environ.get('TASK_METRICS', '0').lower() in ('1', 'true', 'yes')
+    TASK_METRICS_STATSD_HOST = environ.get('TASK_METRICS_STATSD_HOST')
+    TASK_METRICS_STATSD_PORT = int(environ.get('TASK_METRICS_STATSD_PORT', '8125'))
+    TASK_METRICS_PROMETHEUS_PORT = int(environ.get('TASK_METRICS_PROMETHEUS_PORT', '0'))
+    # maximum number of EPVs looked up in Postgres by a single bulk query
+    POSTGRES_QUERY_BATCH_SIZE = int(environ.get('POSTGRES_QUERY_BATCH_SIZE', '500'))
 
     WORKER_DATA_DIR = environ.get('WORKER_DATA_DIR', 'not-set')
-    NPM_DATA_DIR = path.join(environ.get('HOME', '.npm'))
+
+    # Base URL of a local stand-in of package registries (tools/registry_stub.py); if set,
+    #  fetch URLs of npm, PyPI, Maven and NuGet ecosystems point to <url>/<backend>/
+    REGISTRY_MIRROR_URL = environ.get('REGISTRY_MIRROR_URL')
+    REGISTRY_MIRROR_BACKENDS = (EcosystemBackend.npm, EcosystemBackend.pypi,
+                                EcosystemBackend.maven, EcosystemBackend.nuget)
+
+    # Ecosystems are cached in memory by f8a_worker.ecosystem_registry, reload them after
+    #  this number of seconds; 0 means never (unknown ecosystems trigger reload anyway)
+    ECOSYSTEM_REGISTRY_REFRESH = int(environ.get('ECOSYSTEM_REGISTRY_REFRESH', '600'))
+    # ...but not more often than once per this number of seconds
+    ECOSYSTEM_REGISTRY_MISS_REFRESH = int(environ.get('ECOSYSTEM_REGISTRY_MISS_REFRESH', '5'))
+
+    # Cache of package release lists used by solver
+    RELEASES_CACHE_SIZE = int(environ.get('RELEASES_CACHE_SIZE', '4096'))
+    # default time to live of cached release lists in seconds, can be overridden per ecosystem
+    #  backend with RELEASES_CACHE_TTL_<BACKEND>, e.g. RELEASES_CACHE_TTL_NPM=600
+    RELEASES_CACHE_TTL = int(environ.get('RELEASES_CACHE_TTL', '3600'))
+    # directory shared by worker processes, on-disk tier is disabled if not set
+    RELEASES_CACHE_DIR = environ.get('RELEASES_CACHE_DIR')
+    # number of parsed PyPI project documents shared by solver and artifact fetching, kept
+    #  for RELEASES_CACHE_TTL_PYPI (or RELEASES_CACHE_TTL) seconds
+    PYPI_METADATA_CACHE_SIZE = int(environ.get('PYPI_METADATA_CACHE_SIZE', '128'))
+    # maximum number of concurrent registry requests done by solver, can be overridden per
+    #  ecosystem backend with SOLVER_MAX_WORKERS_<BACKEND>; 1 means sequential resolution
+    SOLVER_MAX_WORKERS = int(environ.get('SOLVER_MAX_WORKERS', '8'))
+
+    # HTTP client (f8a_worker.http_client), number of per-host connection pools kept around
+    #  and maximum number of connections kept open to a single host
+    HTTP_POOL_CONNECTIONS = int(environ.get('HTTP_POOL_CONNECTIONS', '32'))
+    HTTP_POOL_MAXSIZE = int(environ.get('HTTP_POOL_MAXSIZE', '16'))
+    HTTP_RETRIES = int(environ.get('HTTP_RETRIES', '3'))
+    HTTP_BACKOFF_FACTOR = float(environ.get('HTTP_BACKOFF_FACTOR', '0.2'))
+    HTTP_CONNECT_TIMEOUT = float(environ.get('HTTP_CONNECT_TIMEOUT', '10'))
+    HTTP_READ_TIMEOUT = float(environ.get('HTTP_READ_TIMEOUT', '300'))
 
     # Scancode configuration
     SCANCODE_LICENSE_SCORE = environ.get('SCANCODE_LICENSE_SCORE', '20')  # scancode's default is 0
@@ -72,6 +135,21 @@ class F8AConfiguration(object):
     SCANCODE_IGNORE = ['*.pyc', '*.so', '*.dll', '*.rar', '*.jar',
                        '*.zip', '*.tar', '*.tar.gz', '*.tar.xz', '*.png']  # don't scan binaries
 
+    # Node-local cache of artifacts retrieved from S3, shared by worker processes in a pod;
+    #  disabled if ARTIFACT_CACHE_DIR is not set, size is in bytes
+    ARTIFACT_CACHE_DIR = environ.get('ARTIFACT_CACHE_DIR')
+    ARTIFACT_CACHE_SIZE = int(environ.get('ARTIFACT_CACHE_SIZE', str(2 * 1024 ** 3)))
+
+    # Limits of extracted archives (artifacts), protection against archive bombs; 0 disables
+    ARCHIVE_MAX_SIZE = int(environ.get('ARCHIVE_MAX_SIZE', str(4 * 1024 ** 3)))
+    ARCHIVE_MAX_ENTRIES = int(environ.get('ARCHIVE_MAX_ENTRIES', '200000'))
+
+    # DigesterTask, compute digests also of all files in extracted source tarball
+    DIGESTER_EXTRACTED_FILES = environ.get('DIGESTER_EXTRACTED_FILES', '0').lower() in \
+        ('1', 'true', 'yes')
+    # number of files digested in parallel
+    DIGESTER_MAX_WORKERS = int(environ.get('DIGESTER_MAX_WORKERS', '4'))
+
     # AWS S3
     AWS_S3_REGION = environ.get('AWS_S3_REGION')
     AWS_S3_ACCESS_KEY_ID = environ.get('AWS_S3_ACCESS_KEY_ID')
@@ -80,6 +158,8 @@ class F8AConfiguration(object):
     S3_ENDPOINT_URL = environ.get('S3_ENDPOINT_URL')
     DEPLOYMENT_PREFIX = environ.get('DEPLOYMENT_PREFIX')
     BAYESIAN_SYNC_S3 = int(environ.get('BAYESIAN_SYNC_S3', 0)) == 1
+    # maximum number of objects uploaded to S3 concurrently by a single task
+    S3_UPLOAD_MAX_WORKERS = int(environ.get('S3_UPLOAD_MAX_WORKERS', '8'))
 
     # AWS SQS
     AWS_SQS_ACCESS_KEY_ID = environ.get('AWS_SQS_ACCESS_KEY_ID')
@@ -107,6 +187,8 @@ class F8AConfiguration(object):
     BAYESIAN_GREMLIN_HTTP_SERVICE_HOST = environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_HOST",
                                                      "localhost")
     BAYESIAN_GREMLIN_HTTP_SERVICE_PORT = environ.get("BAYESIAN_GREMLIN_HTTP_SERVICE_PORT", "8182")
+    # maximum number of EPVs looked up in graph by a single Gremlin request
+    GREMLIN_QUERY_BATCH_SIZE = int(environ.get('GREMLIN_QUERY_BATCH_SIZE', '100'))
 
     @classmethod
     def is_local_deployment(cls):
@@ -186,6 +268,45 @@ class F8AConfiguration(object):
 
         return url
 
+    @staticmethod
+    def _ecosystem_setting(name, ecosystem_backend, default):
+        """Get integer setting that can be overridden per ecosystem backend.
+
+        :param name: str, name of the env variable, suffixed with _<BACKEND> for the override
+        :param ecosystem_backend: EcosystemBackend
+        :param default: int, value used if there is no valid override
+        """
+        value = environ.get('{n}_{b}'.format(n=name, b=ecosystem_backend.name.upper()))
+        try:
+            return int(value) if value is not None else default
+        except ValueError:
+            logger.warning("Invalid value %r of %s for %s, using default %d",
+                           value, name, ecosystem_backend.name, default)
+            return default
+
+    @classmethod
+    def releases_cache_ttl(cls, ecosystem_backend):
+        """Get time to live (in seconds) of cached release lists for the given ecosystem backend."""
+        return cls._ecosystem_setting('RELEASES_CACHE_TTL', ecosystem_backend,
+                                      cls.RELEASES_CACHE_TTL)
+
+    @classmethod
+    def registry_mirror_url(cls, ecosystem_backend):
+        """Get URL of the local registry mirror for the given ecosystem backend.
+
+        :param ecosystem_backend: EcosystemBackend
+        :return: str, None if mirror is not configured or the backend is not mirrored
+        """
+        if not cls.REGISTRY_MIRROR_URL or ecosystem_backend not in cls.REGISTRY_MIRROR_BACKENDS:
+            return None
+        return '{m}/{b}/'.format(m=cls.REGISTRY_MIRROR_URL.rstrip('/'), b=ecosystem_backend.name)
+
+    @classmethod
+    def solver_max_workers(cls, ecosystem_backend):
+        """Get maximum number of concurrent registry requests done by solver for the backend."""
+        return cls._ecosystem_setting('SOLVER_MAX_WORKERS', ecosystem_backend,
+                                      cls.SOLVER_MAX_WORKERS)
+
     @property
     def dependency_check_script_path(self):
         """Get path to OWASP dependency-check script."""
@@ -6,7 +6,7 @@ from urllib.parse import urlparse
 from selinon import StoragePool
 
 from f8a_worker.enums import EcosystemBackend
-from f8a_worker.models import Ecosystem
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.utils import MavenCoordinates
 
 logger = logging.getLogger(__name__)
@@ -16,7 +16,7 @@ def _create_analysis_arguments(ecosystem, name, version):
     """Create arguments for analysis."""
     return {
         'ecosystem': ecosystem,
-        'name': MavenCoordinates.normalize_str(name) if Ecosystem.by_name(
+        'name': MavenCoordinates.normalize_str(name) if ecosystem_registry.by_name(
             StoragePool.get_connected_storage('BayesianPostgres').session,
             ecosystem).is_backed_by(
             EcosystemBackend.maven) else name,
@@ -42,21 +42,29 @@ def iter_dependencies_analysis(storage_pool, node_args):
     try:
         postgres = storage_pool.get_connected_storage('BayesianPostgres')
         deps = storage_pool.get('dependency_snapshot').get('details', {}).get('runtime', [])
-        arguments = []
+        candidates = []
         for dep in deps:
             if _is_url_dependency(dep):
                 logger.info('skipping URL dependency name "%(ecosystem)s/%(name)s/%(version)s"',
                             dep)
-            elif postgres.get_analysis_count(dep['ecosystem'], dep['name'], dep['version']) > 0:
+            else:
+                candidates.append(dep)
+
+        analysed = postgres.get_analysed_versions(
+            (dep['ecosystem'], dep['name'], dep['version']) for dep in candidates)
+
+        arguments = []
+        for dep in candidates:
+            if (dep['ecosystem'], dep['name'], dep['version']) in analysed:
                 logger.info('skipping already analysed dependency '
                             '"%(ecosystem)s/%(name)s/%(version)s"', dep)
                 continue
-            else:
-                new_node_args = _create_analysis_arguments(dep['ecosystem'], dep['name'],
-                                                           dep['version'])
-                if 'recursive_limit' in node_args:
-                    new_node_args['recursive_limit'] = node_args['recursive_limit'] - 1
-                arguments.append(new_node_args)
+
+            new_node_args = _create_analysis_arguments(dep['ecosystem'], dep['name'],
+                                                       dep['version'])
+            if 'recursive_limit' in node_args:
+                new_node_args['recursive_limit'] = node_args['recursive_limit'] - 1
+            arguments.append(new_node_args)
 
         logger.info("Arguments for next flows: %s" % str(arguments))
         return arguments
@@ -72,21 +80,22 @@ def iter_dependencies_stack(storage_pool, node_args):
         aggregated = storage_pool.get('AggregatingMercatorTask')
         postgres = storage_pool.get_connected_storage('BayesianPostgres')
 
-        arguments = []
+        epvs = []
         for result in aggregated["result"]:
             resolved = result['details'][0]['_resolved']
             ecosystem = result['details'][0]['ecosystem']
+            epvs.extend((ecosystem, dep['package'], dep['version']) for dep in resolved)
 
-            for dep in resolved:
-                name = dep['package']
-                version = dep['version']
+        analysed = postgres.get_analysed_versions(epvs)
 
-                if postgres.get_analysis_count(ecosystem, name, version) > 0:
-                    logger.info('skipping already analysed dependency "%s/%s/%s"', ecosystem,
-                                name, version)
-                    continue
+        arguments = []
+        for ecosystem, name, version in epvs:
+            if (ecosystem, name, version) in analysed:
+                logger.info('skipping already analysed dependency "%s/%s/%s"', ecosystem,
+                            name, version)
+                continue
 
-                arguments.append(_create_analysis_arguments(ecosystem, name, version))
+            arguments.append(_create_analysis_arguments(ecosystem, name, version))
 
         logger.info("Arguments for next flows: %s" % str(arguments))
         return arguments
@@ -105,8 +114,9 @@ def iter_unknown_dependencies(storage_pool, node_args):
         for element in aggregated["result"]:
             epv = element.split(':')
             ecosystem = epv[0]
-            if Ecosystem.by_name(StoragePool.get_connected_storage('BayesianPostgres').session,
-                                 ecosystem).is_backed_by(EcosystemBackend.maven):
+            if ecosystem_registry.by_name(
+                    StoragePool.get_connected_storage('BayesianPostgres').session,
+                    ecosystem).is_backed_by(EcosystemBackend.maven):
                 name = '{}:{}'.format(epv[1], epv[2])
                 version = epv[3]
             else:
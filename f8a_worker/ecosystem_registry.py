@@ -0,0 +1,116 @@
+"""Process-wide in-memory registry of ecosystems.
+
+The `ecosystems` table is small and practically never changes, yet Ecosystem.by_name()
+was queried for every dependency on hot paths. The registry loads the whole table
+once and serves immutable records detached from any database session.
+"""
+
+import logging
+from collections import namedtuple
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy.orm.exc import NoResultFound
+
+from f8a_worker.defaults import configuration
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.models import Ecosystem
+
+logger = logging.getLogger(__name__)
+
+
+class EcosystemRecord(namedtuple('EcosystemRecord', ['id', 'name', 'url', 'fetch_url',
+                                                     'backend'])):
+    """Immutable ecosystem, provides the same read-only interface as the Ecosystem model."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_model(cls, ecosystem):
+        """Create record from Ecosystem model instance.
+
+        Fetch URL is replaced with the registry mirror's one if REGISTRY_MIRROR_URL is set.
+        """
+        # pylint: disable=protected-access
+        backend = EcosystemBackend[ecosystem._backend] if ecosystem._backend else None
+        fetch_url = ecosystem.fetch_url
+        if backend is not None:
+            fetch_url = configuration.registry_mirror_url(backend) or fetch_url
+        return cls(ecosystem.id, ecosystem.name, ecosystem.url, fetch_url, backend)
+
+    def is_backed_by(self, backend):
+        """Is this ecosystem backed by specified backend?."""
+        return self.backend == backend
+
+
+class EcosystemRegistry(object):
+    """Cache of all ecosystems, reloaded after refresh_interval seconds or on unknown name."""
+
+    def __init__(self, refresh_interval=None, miss_refresh_interval=None):
+        """Initialize registry.
+
+        :param refresh_interval: int, seconds after which the table is reloaded, 0 means never
+        :param miss_refresh_interval: int, minimal number of seconds between reloads triggered
+                                      by lookups of unknown ecosystems
+        """
+        self.refresh_interval = configuration.ECOSYSTEM_REGISTRY_REFRESH \
+            if refresh_interval is None else refresh_interval
+        self.miss_refresh_interval = configuration.ECOSYSTEM_REGISTRY_MISS_REFRESH \
+            if miss_refresh_interval is None else miss_refresh_interval
+        self._ecosystems = None
+        self._loaded_at = None
+        self._lock = Lock()
+
+    def _is_stale(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            return True
+        return bool(self.refresh_interval) and monotonic() - loaded_at >= self.refresh_interval
+
+    def _may_reload_on_miss(self):
+        # unknown names must not turn every lookup into a query of the whole table
+        loaded_at = self._loaded_at
+        return loaded_at is None or monotonic() - loaded_at >= self.miss_refresh_interval
+
+    def refresh(self, session):
+        """Load all ecosystems from database.
+
+        :param session: SQLAlchemy session
+        :return: dict, ecosystem name -> EcosystemRecord
+        """
+        ecosystems = {e.name: EcosystemRecord.from_model(e) for e in session.query(Ecosystem)}
+        with self._lock:
+            self._ecosystems = ecosystems
+            self._loaded_at = monotonic()
+        logger.debug("loaded %d ecosystems", len(ecosystems))
+        return ecosystems
+
+    def by_name(self, session, name):
+        """Get ecosystem with specified name.
+
+        :param session: SQLAlchemy session, used only if the registry needs to be (re)loaded
+        :param name: str, ecosystem name
+        :return: EcosystemRecord
+        :raises NoResultFound: if there is no such ecosystem
+        """
+        ecosystems = self._ecosystems
+        if ecosystems is None or self._is_stale():
+            ecosystems = self.refresh(session)
+
+        ecosystem = ecosystems.get(name)
+        if ecosystem is None and self._may_reload_on_miss():
+            # the ecosystem might have been added since the registry was loaded
+            ecosystem = self.refresh(session).get(name)
+        if ecosystem is None:
+            raise NoResultFound("No ecosystem named {!r}".format(name))
+        return ecosystem
+
+    def clear(self):
+        """Drop cached ecosystems, they are reloaded on next lookup."""
+        with self._lock:
+            self._ecosystems = None
+            self._loaded_at = None
+
+
+# Shared by everything in the worker process
+ecosystem_registry = EcosystemRegistry()
@@ -13,6 +13,10 @@ class NotABugTaskError(TaskError):
     """
 
 
+class ArchiveLimitError(NotABugTaskError):
+    """Extracted archive exceeds size or entry count limits (e.g. an archive bomb)."""
+
+
 class NotABugFatalTaskError(FatalTaskError):
     """Task error, but not a bug in the code. Retry won't help.
 
@@ -5,7 +5,7 @@ import logging
 import json
 import datetime
 import semantic_version as sv
-import requests
+from f8a_worker.http_client import http_client
 from f8a_worker.utils import get_session_retry
 from f8a_worker.defaults import configuration
 
@@ -212,6 +212,97 @@ def get_osio_user_count(ecosystem, name, version):
         return -1
 
 
+def _chunks(items, chunk_size):
+    """Split list into chunks of at most chunk_size items."""
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+
+def _query_epvs(epvs, traversal, chunk_size=None):
+    """Run traversal starting at version vertices of the given EPVs, in batches.
+
+    Vertices are looked up by `within()` over all ecosystems, names and versions of
+    a batch, which can match more vertices than requested; callers pick results
+    belonging to the requested EPVs.
+
+    :param epvs: list of (ecosystem, name, version) tuples
+    :param traversal: str, Gremlin steps following the version vertex lookup
+    :param chunk_size: int, maximum number of EPVs queried in one request
+    :return: generator of (list of EPVs in the batch, result data or None on error)
+    """
+    chunk_size = chunk_size or configuration.GREMLIN_QUERY_BATCH_SIZE
+    query = "g.V().has('pecosystem', within(ecosystems)).has('pname', within(names))" \
+            ".has('version', within(versions))" + traversal
+    for chunk in _chunks(sorted(set(epvs)), chunk_size):
+        payload = {
+            'gremlin': query,
+            'bindings': {
+                'ecosystems': sorted({e for e, _, _ in chunk}),
+                'names': sorted({n for _, n, _ in chunk}),
+                'versions': sorted({v for _, _, v in chunk})
+            }
+        }
+        try:
+            response = get_session_retry().post(GREMLIN_SERVER_URL_REST, data=json.dumps(payload))
+        except Exception:
+            logger.exception("Failed querying graph for %d EPVs", len(chunk))
+            yield chunk, None
+            continue
+
+        if response.status_code != 200:
+            logger.error("Error response from graph for %d EPVs with status code %s",
+                         len(chunk), response.status_code)
+            yield chunk, None
+            continue
+        yield chunk, response.json().get('result', {}).get('data') or []
+
+
+def _epv_from_value_map(value_map):
+    """Get (ecosystem, name, version) tuple from valueMap of a version vertex."""
+    return (value_map.get('pecosystem', [''])[0],
+            value_map.get('pname', [''])[0],
+            value_map.get('version', [''])[0])
+
+
+def get_epvs_presence(epvs, chunk_size=None):
+    """Check which EPVs are present in graph, using one request per chunk of EPVs.
+
+    :param epvs: list of (ecosystem, name, version) tuples
+    :param chunk_size: int, maximum number of EPVs queried in one request
+    :return: dict, (ecosystem, name, version) -> bool; EPVs for which the graph query
+             failed are not included
+    """
+    presence = {}
+    traversal = ".valueMap('pecosystem', 'pname', 'version')"
+    for chunk, data in _query_epvs(epvs, traversal, chunk_size):
+        if data is None:
+            continue
+        found = {_epv_from_value_map(value_map) for value_map in data}
+        for epv in chunk:
+            presence[epv] = epv in found
+    return presence
+
+
+def get_epvs_data(epvs, chunk_size=None):
+    """Get valueMaps of version and package vertices of EPVs, using one request per chunk.
+
+    :param epvs: list of (ecosystem, name, version) tuples
+    :param chunk_size: int, maximum number of EPVs queried in one request
+    :return: dict, (ecosystem, name, version) -> {'version': valueMap, 'package': valueMap};
+             EPVs not present in graph (or for which the query failed) are not included
+    """
+    result = {}
+    traversal = ".dedup().as('version').in('has_version').as('package')" \
+                ".select('version', 'package').by(valueMap())"
+    for chunk, data in _query_epvs(epvs, traversal, chunk_size):
+        requested = set(chunk)
+        for item in data or []:
+            epv = _epv_from_value_map(item.get('version', {}))
+            if epv in requested and epv not in result:
+                result[epv] = item
+    return result
+
+
 def create_package_dict(graph_results, alt_dict=None):
     """Convert Graph Results into the Recommendation Dict."""
     pkg_list = []
@@ -338,7 +429,7 @@ def update_properties(ecosystem, package, version, properties):
     payload = {
         'properties': properties
     }
-    response = requests.put(url, json=payload)
+    response = http_client.put(url, json=payload)
     if response.status_code == 404:
         # This is OK, we just don't have the component in graph yet
         msg = 'Component {e}/{p}/{v} is not yet in graph'.format(
@@ -371,7 +462,7 @@ def create_nodes(epv_list):
 
     url = DATA_IMPORTER_URL + '/api/v1/create_nodes'
 
-    response = requests.post(url, json=epv_list)
+    response = http_client.post(url, json=epv_list)
 
     if response.status_code != 200:
         msg = '{status} Error creating nodes in graph: {content}'.format(
@@ -0,0 +1,195 @@
+"""Per-process HTTP client with keep-alive connection pools shared by all tasks.
+
+Creating a new requests.Session (or calling bare requests.get()) for every request
+means paying DNS lookup, TCP and TLS handshakes each time. Sessions handed out by
+HTTPClient keep connections open in per-host pools (urllib3 keys its pools by
+scheme, host and port) and retry failed requests with an exponential backoff.
+"""
+
+import logging
+import os
+from collections import defaultdict
+from threading import Lock
+from time import monotonic
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from requests.packages.urllib3.util.retry import Retry
+
+from f8a_worker import task_metrics
+from f8a_worker.defaults import configuration
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS_FORCELIST = (502, 503, 504)
+
+
+def make_adapter(retries, backoff_factor, status_forcelist, raise_on_status=True):
+    """Create HTTP adapter with connection pools and retries.
+
+    :param retries: int, maximum number of retries of a single request
+    :param backoff_factor: float, backoff factor between retries, see urllib3's Retry
+    :param status_forcelist: iterable, HTTP status codes to retry on
+    :param raise_on_status: bool, raise RetryError if retries on status codes are exhausted,
+                            return the last response otherwise
+    :return: HTTPAdapter
+    """
+    retry = Retry(total=retries, read=retries, connect=retries,
+                  backoff_factor=backoff_factor, status_forcelist=status_forcelist,
+                  raise_on_status=raise_on_status)
+    return HTTPAdapter(max_retries=retry,
+                       pool_connections=configuration.HTTP_POOL_CONNECTIONS,
+                       pool_maxsize=configuration.HTTP_POOL_MAXSIZE)
+
+
+def mount_adapter(session, adapter):
+    """Use adapter for both http:// and https:// URLs in session."""
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PooledSession(requests.Session):
+    """Session applying default timeout and recording per-host request metrics."""
+
+    def __init__(self, client, timeout):
+        """Initialize instance.
+
+        :param client: HTTPClient, client collecting metrics
+        :param timeout: float or tuple, default (connect, read) timeout
+        """
+        super().__init__()
+        self._client = client
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        """Send request, applying default timeout and recording metrics."""
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlparse(url).netloc
+        start = monotonic()
+        try:
+            response = super().request(method, url, **kwargs)
+        except RequestException:
+            elapsed = monotonic() - start
+            self._client.record(host, elapsed, failed=True)
+            task_metrics.current_metrics().add_time('http', elapsed)
+            raise
+        elapsed = monotonic() - start
+        self._client.record(host, elapsed, failed=response.status_code >= 500)
+        metrics = task_metrics.current_metrics()
+        if metrics.enabled:
+            metrics.add_time('http', elapsed)
+            content_length = response.headers.get('Content-Length')
+            if content_length and content_length.isdigit():
+                metrics.add_bytes('http_download', int(content_length))
+        return response
+
+
+class HTTPClient(object):
+    """Factory of pooled sessions, one per retry configuration and process."""
+
+    def __init__(self, retries=None, backoff_factor=None, timeout=None):
+        """Initialize instance.
+
+        :param retries: int, default number of retries
+        :param backoff_factor: float, default backoff factor between retries
+        :param timeout: float or tuple, default (connect, read) timeout of requests
+        """
+        self.retries = configuration.HTTP_RETRIES if retries is None else retries
+        self.backoff_factor = configuration.HTTP_BACKOFF_FACTOR \
+            if backoff_factor is None else backoff_factor
+        self.timeout = timeout or (configuration.HTTP_CONNECT_TIMEOUT,
+                                   configuration.HTTP_READ_TIMEOUT)
+        self._sessions = {}
+        self._pid = None
+        self._stats = defaultdict(lambda: {'requests': 0, 'failed': 0, 'total_time': 0.0})
+        self._lock = Lock()
+
+    def session(self, retries=None, backoff_factor=None, status_forcelist=None,
+                raise_on_status=False):
+        """Get shared session for the given retry configuration.
+
+        :param retries: int, number of retries, client's default if None
+        :param backoff_factor: float, backoff factor between retries, client's default if None
+        :param status_forcelist: iterable, HTTP status codes to retry on
+        :param raise_on_status: bool, raise RetryError if retries on status codes are exhausted
+        :return: PooledSession
+        """
+        retries = self.retries if retries is None else retries
+        backoff_factor = self.backoff_factor if backoff_factor is None else backoff_factor
+        status_forcelist = tuple(status_forcelist or DEFAULT_STATUS_FORCELIST)
+        key = (retries, backoff_factor, status_forcelist, raise_on_status)
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # pooled connections must not be shared with the parent process (prefork workers)
+                self._sessions = {}
+                self._pid = os.getpid()
+
+            session = self._sessions.get(key)
+            if session is None:
+                session = PooledSession(self, self.timeout)
+                mount_adapter(session, make_adapter(retries, backoff_factor,
+                                                    status_forcelist, raise_on_status))
+                self._sessions[key] = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send request using the default session.
+
+        Accepts the same arguments as requests.Session.request.
+        """
+        return self.session().request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """Send GET request using the default session."""
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """Send HEAD request using the default session."""
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Send POST request using the default session."""
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        """Send PUT request using the default session."""
+        return self.request('PUT', url, **kwargs)
+
+    def record(self, host, elapsed, failed=False):
+        """Record a finished request to `host`, which took `elapsed` seconds."""
+        with self._lock:
+            stats = self._stats[host]
+            stats['requests'] += 1
+            stats['failed'] += int(failed)
+            stats['total_time'] += elapsed
+
+    def stats(self):
+        """Get per-host request metrics.
+
+        :return: dict, host -> {'requests', 'failed', 'total_time', 'average_time'}
+        """
+        with self._lock:
+            result = {}
+            for host, stats in self._stats.items():
+                result[host] = dict(stats, average_time=stats['total_time'] / stats['requests'])
+            return result
+
+    def reset_stats(self):
+        """Drop collected request metrics."""
+        with self._lock:
+            self._stats.clear()
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+# Shared by everything in the worker process
+http_client = HTTPClient()
@@ -1,7 +1,10 @@
 """SQLAlchemy domain models."""
 
+from threading import Lock
+from time import monotonic
+
 from sqlalchemy import (Column, DateTime, Enum, ForeignKey, Integer, String, UniqueConstraint,
-                        create_engine, Boolean, Text)
+                        create_engine, event, Boolean, Text)
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.dialects.postgresql import UUID
@@ -10,20 +13,107 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, scoped_session, sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.session import Session
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 
+from f8a_worker import task_metrics
 from f8a_worker.defaults import configuration
 from f8a_worker.enums import EcosystemBackend
 
 
-def create_db_scoped_session(connection_string=None):
-    """Create scoped session."""
-    # we use NullPool, so that SQLAlchemy doesn't pool local connections
-    #  and only really uses connections while writing results
-    return scoped_session(
-        sessionmaker(bind=create_engine(
-            connection_string or configuration.POSTGRES_CONNECTION,
-            poolclass=NullPool)))
+class MeteredQueuePool(QueuePool):
+    """Connection pool keeping track of time spent waiting for connections."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize pool, see QueuePool for arguments."""
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def _do_get(self):
+        start = monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = monotonic() - start
+            with self._stats_lock:
+                self._waits += 1
+                self._wait_time += elapsed
+                self._max_wait_time = max(self._max_wait_time, elapsed)
+
+    def stats(self):
+        """Get pool usage statistics.
+
+        :return: dict, connections checked out and in, overflow and time spent waiting
+        """
+        with self._stats_lock:
+            return {
+                'size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                # overflow() counts from -pool_size until the pool is exhausted
+                'overflow': max(self.overflow(), 0),
+                'waits': self._waits,
+                'wait_time': self._wait_time,
+                'max_wait_time': self._max_wait_time
+            }
+
+
+def _measure_statements(engine):
+    """Add time spent executing statements to the `postgres` phase of the running task."""
+    def _start(conn, *_args):
+        if task_metrics.current_metrics().enabled:
+            conn.info['statement_start'] = monotonic()
+
+    def _finish(conn, *_args):
+        start = conn.info.pop('statement_start', None)
+        if start is not None:
+            task_metrics.current_metrics().add_time('postgres', monotonic() - start)
+
+    def _failed(context):
+        if context.connection is not None:
+            _finish(context.connection)
+
+    event.listen(engine, 'before_cursor_execute', _start)
+    event.listen(engine, 'after_cursor_execute', _finish)
+    event.listen(engine, 'handle_error', _failed)
+    return engine
+
+
+def create_db_engine(connection_string=None, **kwargs):
+    """Create engine with connection pool configured by POSTGRES_POOL_* settings.
+
+    :param connection_string: str, database URL, POSTGRES_CONNECTION by default
+    :param kwargs: additional arguments for create_engine(), override the defaults
+    :return: SQLAlchemy engine
+    """
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': configuration.POSTGRES_POOL_SIZE,
+        'max_overflow': configuration.POSTGRES_POOL_MAX_OVERFLOW,
+        'pool_timeout': configuration.POSTGRES_POOL_TIMEOUT,
+        'pool_recycle': configuration.POSTGRES_POOL_RECYCLE,
+        'pool_pre_ping': configuration.POSTGRES_POOL_PRE_PING
+    }
+    options.update(kwargs)
+    return _measure_statements(create_engine(connection_string or
+                                             configuration.POSTGRES_CONNECTION, **options))
+
+
+def create_db_scoped_session(connection_string=None, pooled=True):
+    """Create scoped session.
+
+    :param connection_string: str, database URL, POSTGRES_CONNECTION by default
+    :param pooled: bool, if False, connections are not pooled and are opened only while in use
+    """
+    if pooled:
+        engine = create_db_engine(connection_string)
+    else:
+        engine = _measure_statements(create_engine(connection_string or
+                                                   configuration.POSTGRES_CONNECTION,
+                                                   poolclass=NullPool))
+    return scoped_session(sessionmaker(bind=engine))
 
 
 class BayesianModelMixin(object):
@@ -357,6 +447,19 @@ class PackageWorkerResult(Base):
         return self.diagnosis.package
 
 
+class TaskClaim(Base):
+    """Table of IDs of tasks claimed by workers.
+
+    Tasks claim their ID before they are executed, see PostgresBase.claim_task(). Claims
+    are removed once the result is stored, so the table holds claims of running tasks.
+    """
+
+    __tablename__ = "task_claims"
+
+    worker_id = Column(String(64), primary_key=True)
+    claimed_at = Column(DateTime, nullable=False)
+
+
 class StackAnalysisRequest(Base):
     """Table for stack analysis request."""
 
@@ -0,0 +1,230 @@
+"""Desugaring of npm version ranges.
+
+Python port of the range handling of node-semver 5.x. valid_range() gives the same result
+as `semver.validRange()`, that is as the output of semver-ranger, without spawning a Node
+process for every dependency:
+
+    '^1.2.3'          -> '>=1.2.3 <2.0.0'
+    '1.x || >=2.5.0'  -> '>=1.0.0 <2.0.0||>=2.5.0'
+    '1.2 - 2'         -> '>=1.2.0 <3.0.0'
+    'foo'             -> None
+
+Only the strict (not loose) grammar is supported, as in semver-ranger.
+"""
+
+from functools import lru_cache
+import re
+
+MAX_LENGTH = 256
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+# Regular expressions, see https://github.com/npm/node-semver/blob/v5.7.1/semver.js
+_NUMERIC_IDENTIFIER = r'0|[1-9][0-9]*'
+_NON_NUMERIC_IDENTIFIER = r'[0-9]*[a-zA-Z-][a-zA-Z0-9-]*'
+_MAIN_VERSION = r'({n})\.({n})\.({n})'.format(n=_NUMERIC_IDENTIFIER)
+_MAIN_VERSION_LOOSE = r'([0-9]+)\.([0-9]+)\.([0-9]+)'
+_PRERELEASE_IDENTIFIER = r'(?:{n}|{a})'.format(n=_NUMERIC_IDENTIFIER, a=_NON_NUMERIC_IDENTIFIER)
+_PRERELEASE_IDENTIFIER_LOOSE = r'(?:[0-9]+|{a})'.format(a=_NON_NUMERIC_IDENTIFIER)
+_PRERELEASE = r'(?:-({i}(?:\.{i})*))'.format(i=_PRERELEASE_IDENTIFIER)
+_PRERELEASE_LOOSE = r'(?:-?({i}(?:\.{i})*))'.format(i=_PRERELEASE_IDENTIFIER_LOOSE)
+_BUILD = r'(?:\+([0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))'
+_FULL_PLAIN = r'v?' + _MAIN_VERSION + _PRERELEASE + '?' + _BUILD + '?'
+_LOOSE_PLAIN = r'[v=\s]*' + _MAIN_VERSION_LOOSE + _PRERELEASE_LOOSE + '?' + _BUILD + '?'
+_GTLT = r'((?:<|>)?=?)'
+_XRANGE_IDENTIFIER = _NUMERIC_IDENTIFIER + r'|x|X|\*'
+_XRANGE_PLAIN = r'[v=\s]*({x})(?:\.({x})(?:\.({x})(?:{p})?{b}?)?)?'.format(
+    x=_XRANGE_IDENTIFIER, p=_PRERELEASE, b=_BUILD)
+
+_FULL = re.compile('^' + _FULL_PLAIN + '$')
+_XRANGE = re.compile('^' + _GTLT + r'\s*' + _XRANGE_PLAIN + '$')
+_TILDE_TRIM = re.compile(r'(\s*)(?:~>?)\s+')
+_TILDE = re.compile(r'^(?:~>?)' + _XRANGE_PLAIN + '$')
+_CARET_TRIM = re.compile(r'(\s*)(?:\^)\s+')
+_CARET = re.compile(r'^(?:\^)' + _XRANGE_PLAIN + '$')
+_COMPARATOR = re.compile('^' + _GTLT + r'\s*(' + _FULL_PLAIN + ')$|^$')
+_COMPARATOR_TRIM = re.compile(r'(\s*)' + _GTLT + r'\s*(' + _LOOSE_PLAIN + '|' + _XRANGE_PLAIN + ')')
+_HYPHEN_RANGE = re.compile(r'^\s*(' + _XRANGE_PLAIN + r')\s+-\s+(' + _XRANGE_PLAIN + r')\s*$')
+_STAR = re.compile(r'(<|>)?=?\s*\*')
+_OR = re.compile(r'\s*\|\|\s*')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _is_x(identifier):
+    return not identifier or identifier.lower() == 'x' or identifier == '*'
+
+
+def _inc(number):
+    return str(int(number) + 1)
+
+
+def _normalize_version(version):
+    """Format version the way semver does, raise ValueError if it's not a valid version."""
+    if len(version) > MAX_LENGTH:
+        raise ValueError('version is longer than {} characters'.format(MAX_LENGTH))
+    match = _FULL.match(version.strip())
+    if not match:
+        raise ValueError('invalid version: {}'.format(version))
+    major, minor, patch, prerelease = match.group(1, 2, 3, 4)
+    if any(int(n) > MAX_SAFE_INTEGER for n in (major, minor, patch)):
+        raise ValueError('invalid version: {}'.format(version))
+    normalized = '{}.{}.{}'.format(int(major), int(minor), int(patch))
+    if prerelease:
+        normalized += '-' + prerelease
+    return normalized
+
+
+def _hyphen_replace(match):
+    # 1.2 - 3.4.5 => >=1.2.0 <=3.4.5, 1.2.3 - 3.4 => >=1.2.3 <3.5.0
+    from_, from_major, from_minor, from_patch = match.group(1, 2, 3, 4)
+    to, to_major, to_minor, to_patch, to_prerelease = match.group(7, 8, 9, 10, 11)
+
+    if _is_x(from_major):
+        from_ = ''
+    elif _is_x(from_minor):
+        from_ = '>={}.0.0'.format(from_major)
+    elif _is_x(from_patch):
+        from_ = '>={}.{}.0'.format(from_major, from_minor)
+    else:
+        from_ = '>=' + from_
+
+    if _is_x(to_major):
+        to = ''
+    elif _is_x(to_minor):
+        to = '<{}.0.0'.format(_inc(to_major))
+    elif _is_x(to_patch):
+        to = '<{}.{}.0'.format(to_major, _inc(to_minor))
+    elif to_prerelease:
+        to = '<={}.{}.{}-{}'.format(to_major, to_minor, to_patch, to_prerelease)
+    else:
+        to = '<=' + to
+
+    return (from_ + ' ' + to).strip()
+
+
+def _replace_tilde(match):
+    # ~1.2 => >=1.2.0 <1.3.0, ~1.2.3 => >=1.2.3 <1.3.0
+    major, minor, patch, prerelease = match.group(1, 2, 3, 4)
+    if _is_x(major):
+        return ''
+    if _is_x(minor):
+        return '>={M}.0.0 <{M1}.0.0'.format(M=major, M1=_inc(major))
+    if _is_x(patch):
+        return '>={M}.{m}.0 <{M}.{m1}.0'.format(M=major, m=minor, m1=_inc(minor))
+    lower = '{}.{}.{}'.format(major, minor, patch)
+    if prerelease:
+        lower += '-' + prerelease
+    return '>={} <{}.{}.0'.format(lower, major, _inc(minor))
+
+
+def _replace_caret(match):
+    # ^1.2.3 => >=1.2.3 <2.0.0, ^0.2.3 => >=0.2.3 <0.3.0, ^0.0.3 => >=0.0.3 <0.0.4
+    major, minor, patch, prerelease = match.group(1, 2, 3, 4)
+    if _is_x(major):
+        return ''
+    if _is_x(minor):
+        return '>={M}.0.0 <{M1}.0.0'.format(M=major, M1=_inc(major))
+    if _is_x(patch):
+        if major == '0':
+            return '>={M}.{m}.0 <{M}.{m1}.0'.format(M=major, m=minor, m1=_inc(minor))
+        return '>={M}.{m}.0 <{M1}.0.0'.format(M=major, m=minor, M1=_inc(major))
+
+    lower = '{}.{}.{}'.format(major, minor, patch)
+    if prerelease:
+        lower += '-' + prerelease
+    if major == '0':
+        if minor == '0':
+            upper = '{}.{}.{}'.format(major, minor, _inc(patch))
+        else:
+            upper = '{}.{}.0'.format(major, _inc(minor))
+    else:
+        upper = '{}.0.0'.format(_inc(major))
+    return '>={} <{}'.format(lower, upper)
+
+
+def _replace_x_range(match):
+    # 1.x => >=1.0.0 <2.0.0, >1.2 => >=1.3.0, <=1.x => <2.0.0
+    gtlt, major, minor, patch = match.group(1, 2, 3, 4)
+    x_major = _is_x(major)
+    x_minor = x_major or _is_x(minor)
+    x_patch = x_minor or _is_x(patch)
+
+    if gtlt == '=' and x_patch:
+        gtlt = ''
+
+    if x_major:
+        # either nothing is allowed or nothing is forbidden
+        return '<0.0.0' if gtlt in ('>', '<') else '*'
+    if gtlt and x_patch:
+        if x_minor:
+            minor = '0'
+        patch = '0'
+        if gtlt == '>':
+            gtlt = '>='
+            if x_minor:
+                major = _inc(major)
+            else:
+                minor = _inc(minor)
+        elif gtlt == '<=':
+            gtlt = '<'
+            if x_minor:
+                major = _inc(major)
+            else:
+                minor = _inc(minor)
+        return '{}{}.{}.{}'.format(gtlt, major, minor, patch)
+    if x_minor:
+        return '>={M}.0.0 <{M1}.0.0'.format(M=major, M1=_inc(major))
+    if x_patch:
+        return '>={M}.{m}.0 <{M}.{m1}.0'.format(M=major, m=minor, m1=_inc(minor))
+    return match.group(0)
+
+
+def _replace_each(regex, replace, comparators):
+    return ' '.join(regex.sub(replace, c, count=1)
+                    for c in _WHITESPACE.split(comparators.strip()))
+
+
+def _parse_comparator(comparator):
+    """Turn caret, tilde, x-range and star comparator into primitive comparators."""
+    comparator = _replace_each(_CARET, _replace_caret, comparator)
+    comparator = _replace_each(_TILDE, _replace_tilde, comparator)
+    comparator = ' '.join(_XRANGE.sub(_replace_x_range, c.strip(), count=1)
+                          for c in _WHITESPACE.split(comparator))
+    # star is AND-ed with everything else and '' means any version
+    return _STAR.sub('', comparator.strip(), count=1)
+
+
+def _format_comparator(comparator):
+    match = _COMPARATOR.match(comparator)
+    if not match:
+        raise ValueError('invalid comparator: {}'.format(comparator))
+    if not match.group(2):
+        return ''
+    operator = match.group(1)
+    return ('' if operator == '=' else operator) + _normalize_version(match.group(2))
+
+
+def _parse_comparator_set(comparators):
+    comparators = comparators.strip()
+    comparators = _HYPHEN_RANGE.sub(_hyphen_replace, comparators, count=1)
+    comparators = _COMPARATOR_TRIM.sub(r'\1\2\3', comparators)
+    comparators = _TILDE_TRIM.sub(r'\1~', comparators)
+    comparators = _CARET_TRIM.sub(r'\1^', comparators)
+    comparators = ' '.join(_WHITESPACE.split(comparators))
+
+    parsed = ' '.join(_parse_comparator(c) for c in comparators.split(' '))
+    return ' '.join(_format_comparator(c) for c in _WHITESPACE.split(parsed)).strip()
+
+
+@lru_cache(maxsize=65536)
+def valid_range(spec):
+    """Desugar npm version range to primitive comparators.
+
+    :param spec: str, npm version range, for example "^1.2.3 || 2.x"
+    :return: str, comparator sets separated by '||', comparators in a set separated by
+             a space, for example ">=1.2.3 <2.0.0||>=2.0.0 <3.0.0", None if the range
+             is not valid
+    """
+    try:
+        return '||'.join(_parse_comparator_set(s) for s in _OR.split(spec)).strip() or '*'
+    except ValueError:
+        return None
@@ -6,9 +6,12 @@ import os
 import shutil
 import logging
 from selinon import StoragePool
+from f8a_worker import task_metrics
+from f8a_worker.artifact_cache import artifact_cache
 from f8a_worker.defaults import configuration
 from f8a_worker.process import Archive
-from f8a_worker.models import EcosystemBackend, Ecosystem
+from f8a_worker.ecosystem_registry import ecosystem_registry
+from f8a_worker.models import EcosystemBackend
 
 
 class EPVCache(object):
@@ -71,7 +74,15 @@ class EPVCache(object):
         basedir = os.path.dirname(dst_path)
         if not os.path.isdir(basedir):
             os.makedirs(basedir)
-        self._s3.retrieve_file(object_key, dst_path)
+
+        if not artifact_cache.enabled:
+            self._s3.retrieve_file(object_key, dst_path)
+            return
+
+        key = artifact_cache.make_key(self._s3.bucket_name, object_key,
+                                      self._s3.retrieve_content_version(object_key))
+        artifact_cache.retrieve(key, dst_path,
+                                lambda path: self._s3.retrieve_file(object_key, path))
 
     def _get_meta(self):
         """Get artifact meta-information stored on S3.
@@ -127,7 +138,9 @@ class EPVCache(object):
         :return: path to cached local object
         """
         if not os.path.isfile(local_path):
-            self._retrieve_s3_object(object_key, local_path)
+            with task_metrics.span('s3_download'):
+                self._retrieve_s3_object(object_key, local_path)
+            task_metrics.add_bytes('s3_download', os.path.getsize(local_path))
         return local_path
 
     def remove_files(self):
@@ -174,7 +187,8 @@ class EPVCache(object):
             source_tarball_path = self.get_source_tarball()
             os.makedirs(self._extracted_tarball_dir)
             try:
-                Archive.extract(source_tarball_path, self._extracted_tarball_dir)
+                with task_metrics.span('extract'):
+                    Archive.extract(source_tarball_path, self._extracted_tarball_dir)
             except Exception:
                 # remove in case of failure so if one catches the exception,
                 # the extraction code is correctly called again
@@ -219,7 +233,8 @@ class EPVCache(object):
         if not os.path.isdir(self._extracted_source_jar_dir):
             source_jar_path = self.get_source_jar()
             try:
-                Archive.extract(source_jar_path, self._extracted_source_jar_dir)
+                with task_metrics.span('extract'):
+                    Archive.extract(source_jar_path, self._extracted_source_jar_dir)
             except Exception:
                 # remove in case of failure so if one catches the exception,
                 # the extraction code is correctly called again
@@ -248,7 +263,7 @@ class EPVCache(object):
         :return: path to source files
         """
         if not self._eco_obj:
-            self._eco_obj = Ecosystem.by_name(self._postgres.session, self.ecosystem)
+            self._eco_obj = ecosystem_registry.by_name(self._postgres.session, self.ecosystem)
 
         if self._eco_obj.is_backed_by(EcosystemBackend.maven):
             return self.get_extracted_source_jar()
@@ -261,7 +276,7 @@ class EPVCache(object):
         :return: true if the given EPV has available sources
         """
         if not self._eco_obj:
-            self._eco_obj = Ecosystem.by_name(self._postgres.session, self.ecosystem)
+            self._eco_obj = ecosystem_registry.by_name(self._postgres.session, self.ecosystem)
 
         if self._eco_obj.is_backed_by(EcosystemBackend.maven):
             return self._s3.object_exists(self._source_jar_object_key)
@@ -1,19 +1,29 @@
 """Core classes for working with git, archives and downloading of artifacts."""
-import glob
+import base64
+import binascii
+import hashlib
+import json
 import logging
+from fnmatch import fnmatch
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from time import mktime
+from urllib.parse import quote, urljoin, urlparse
 
 import os
-import requests
 import shutil
+import stat
+import tarfile
+import zipfile
+import zlib
 from git2json import run_git_log
 from git2json.parser import parse_commits
 from re import compile as re_compile
 
 from f8a_worker.defaults import configuration
 from f8a_worker.enums import EcosystemBackend
-from f8a_worker.errors import TaskError, NotABugTaskError
+from f8a_worker.errors import TaskError, NotABugTaskError, ArchiveLimitError
+from f8a_worker.http_client import http_client
+from f8a_worker.pypi_metadata import pypi_metadata
 from f8a_worker.utils import cwd, TimedCommand, compute_digest, MavenCoordinates, url2git_repo
 
 logger = logging.getLogger(__name__)
@@ -205,26 +215,61 @@ class Archive(object):
 
     TarMatcher = re_compile(r'\.tar\..{1,3}$')
 
+    # files needed by analyses that work only with package metadata
+    MANIFEST_PATTERNS = ('package.json', 'npm-shrinkwrap.json', 'package-lock.json',
+                         'PKG-INFO', 'METADATA', 'setup.py', 'setup.cfg', 'requirements*.txt',
+                         'pom.xml', '*.pom', 'MANIFEST.MF', '*.nuspec', 'LICENSE*', 'COPYING*')
+
+    _CHUNK_SIZE = 1024 * 1024
+
+    @staticmethod
+    def manifest_filter(patterns=None):
+        """Create path filter accepting only files whose name matches one of the patterns.
+
+        :param patterns: iterable, shell-style patterns, MANIFEST_PATTERNS by default
+        :return: callable accepting path relative to the extraction directory
+        """
+        patterns = patterns or Archive.MANIFEST_PATTERNS
+
+        def _filter(path):
+            name = os.path.basename(path)
+            return any(fnmatch(name, pattern) for pattern in patterns)
+
+        return _filter
+
     @staticmethod
-    def extract(target, dest):
-        """Detect archive type and extracts it."""
+    def extract(target, dest, path_filter=None, manifests_only=False,
+                max_size=None, max_entries=None):
+        """Detect archive type and extracts it.
+
+        :param target: str, path to the archive
+        :param dest: str, destination directory, created if it doesn't exist
+        :param path_filter: callable, extract only files for which path_filter(path) is True
+        :param manifests_only: bool, extract only files matching MANIFEST_PATTERNS
+        :param max_size: int, maximum number of extracted bytes, ARCHIVE_MAX_SIZE by default,
+                         0 means no limit
+        :param max_entries: int, maximum number of extracted entries, ARCHIVE_MAX_ENTRIES by
+                            default, 0 means no limit
+        :return: dict, extraction statistics ('entries', 'bytes', 'skipped')
+        """
         # Make sure that the destination directory exists
         try:
             Path(dest).mkdir(mode=0o777, parents=True)
         except FileExistsError:
             pass
 
+        if manifests_only and path_filter is None:
+            path_filter = Archive.manifest_filter()
+        kwargs = {'path_filter': path_filter, 'max_size': max_size, 'max_entries': max_entries}
+
         tar = Archive.TarMatcher.search(target)
         if target.endswith(('.zip', '.whl', '.egg', '.jar', '.war', '.aar', '.nupkg')):
-            Archive.extract_zip(target, dest)
+            return Archive.extract_zip(target, dest, **kwargs)
         elif tar or target.endswith(('.tgz', '.bz2')):
-            Archive.extract_tar(target, dest)
+            return Archive.extract_tar(target, dest, **kwargs)
         else:
             raise ValueError('Unknown archive for {0}'.format(target))
 
-        # Fix possibly wrong permissions in zip files that would prevent us from deleting files.
-        TimedCommand.get_command_output(['chmod', '-R', 'u+rwX,g+rwX', dest])
-
     @staticmethod
     def zip_file(file, archive, junk_paths=False):
         """Zip file/dir with system 'zip' command."""
@@ -236,21 +281,232 @@ class Archive(object):
         TimedCommand.get_command_output(command, graceful=False)
 
     @staticmethod
-    def extract_zip(target, dest, mkdest=False):
-        """Extract target zip archive into dest using system 'unzip' command."""
+    def extract_zip(target, dest, mkdest=False, **kwargs):
+        """Extract target zip archive into dest.
+
+        See extract() for keyword arguments and return value.
+        """
         if mkdest:
             try:
                 os.mkdir(dest, mode=0o775)
             except FileExistsError:
                 pass
-        # -o: overwrite existing files without prompting
-        TimedCommand.get_command_output(['unzip', '-q', '-o', '-d', dest, target])
+
+        extractor = _ArchiveExtractor(target, dest, **kwargs)
+        try:
+            with zipfile.ZipFile(target) as archive:
+                for info in archive.infolist():
+                    # upper 16 bits hold unix mode if the archive was created on unix
+                    mode = info.external_attr >> 16
+                    if info.is_dir():
+                        extractor.directory(info.filename, mode)
+                    elif stat.S_ISLNK(mode):
+                        extractor.symlink(info.filename, archive.read(info).decode('utf-8'))
+                    else:
+                        with archive.open(info) as source:
+                            extractor.file(info.filename, source, mode or 0o644,
+                                           mtime=mktime(info.date_time + (0, 0, -1)))
+        except (zipfile.BadZipFile, OSError, EOFError, zlib.error) as exc:
+            # an archive that can't be (fully) extracted is analysed as far as it was extracted
+            logger.warning("unable to extract %s: %s", target, exc)
+        return extractor.finish()
+
+    @staticmethod
+    def extract_tar(target, dest, **kwargs):
+        """Extract target tarball into dest, streaming it without random access.
+
+        See extract() for keyword arguments and return value.
+        """
+        extractor = _ArchiveExtractor(target, dest, **kwargs)
+        try:
+            with tarfile.open(target, mode='r|*') as archive:
+                for member in archive:
+                    if member.isdir():
+                        extractor.directory(member.name, member.mode)
+                    elif member.issym():
+                        extractor.symlink(member.name, member.linkname)
+                    elif member.islnk():
+                        extractor.hardlink(member.name, member.linkname)
+                    elif member.isfile():
+                        extractor.file(member.name, archive.extractfile(member), member.mode,
+                                       mtime=member.mtime)
+                    else:
+                        # devices and fifos
+                        extractor.skip(member.name)
+        except (tarfile.TarError, OSError, EOFError, zlib.error) as exc:
+            logger.warning("unable to extract %s: %s", target, exc)
+        return extractor.finish()
+
+
+class _ArchiveExtractor(object):
+    """Write archive members to destination directory, enforcing limits and permissions.
+
+    Permissions are set while writing: read and write (and search for directories) is always
+    granted to owner and group, so that extracted files can be processed and removed later.
+    """
+
+    def __init__(self, target, dest, path_filter=None, max_size=None, max_entries=None):
+        """Initialize instance."""
+        self.target = target
+        self.dest = os.path.realpath(dest)
+        self.path_filter = path_filter
+        self.max_size = configuration.ARCHIVE_MAX_SIZE if max_size is None else max_size
+        self.max_entries = configuration.ARCHIVE_MAX_ENTRIES if max_entries is None \
+            else max_entries
+        self.stats = {'entries': 0, 'bytes': 0, 'skipped': 0}
+        self._directories = []
+
+    def _path(self, name):
+        """Get destination path of archive member, None if it points outside of dest."""
+        name = os.path.normpath(name.lstrip('/'))
+        if name in ('.', '..') or name.startswith('..' + os.sep) or os.path.isabs(name):
+            return None
+        return os.path.join(self.dest, name)
 
     @staticmethod
-    def extract_tar(target, dest):
-        """Extract target tarball into dest using system 'tar' command."""
-        TimedCommand.get_command_output(['tar', "--delay-directory-restore", '-xf', target, '-C',
-                                         dest])
+    def _is_directory(path):
+        """Check whether path is an already extracted directory, which can't be overwritten."""
+        return path is not None and os.path.isdir(path) and not os.path.islink(path)
+
+    def _is_inside(self, path):
+        path = os.path.realpath(path)
+        return path == self.dest or path.startswith(self.dest + os.sep)
+
+    def _accept(self, name, path):
+        if path is None:
+            self.skip(name)
+            return False
+        if self.path_filter is not None and not self.path_filter(os.path.relpath(path, self.dest)):
+            self.stats['skipped'] += 1
+            return False
+        if self.max_entries and self.stats['entries'] >= self.max_entries:
+            raise ArchiveLimitError("{a} has more than {n} entries".format(
+                a=self.target, n=self.max_entries))
+        self.stats['entries'] += 1
+        return True
+
+    def _prepare(self, path):
+        """Create parent directories of path and remove what would be overwritten."""
+        os.makedirs(os.path.dirname(path), mode=0o775, exist_ok=True)
+        if os.path.islink(path) or (os.path.lexists(path) and not os.path.isdir(path)):
+            os.unlink(path)
+
+    def skip(self, name):
+        """Skip archive member."""
+        logger.debug("skipping %s in %s", name, self.target)
+        self.stats['skipped'] += 1
+
+    def directory(self, name, mode):
+        """Create directory."""
+        path = self._path(name)
+        if path is None:
+            # archive root
+            return
+        if self.path_filter is not None:
+            # directories are created as parents of accepted files
+            return
+        if not self._accept(name, path):
+            return
+        if not self._is_inside(os.path.dirname(path)):
+            self.skip(name)
+            return
+        os.makedirs(path, mode=0o775, exist_ok=True)
+        # permissions of directories are applied at the end, they could prevent writing
+        self._directories.append((path, ((mode & 0o777) or 0o755) | 0o770))
+
+    def file(self, name, source, mode, mtime=None):
+        """Write regular file read from file object source."""
+        path = self._path(name)
+        if path is not None and not self._is_inside(os.path.dirname(path)):
+            # parent directory is a symbolic link pointing outside of dest
+            path = None
+        if self._is_directory(path):
+            self.skip(name)
+            return
+        if not self._accept(name, path):
+            return
+        self._prepare(path)
+
+        with open(path, 'wb') as f:
+            while True:
+                chunk = source.read(Archive._CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.stats['bytes'] += len(chunk)
+                if self.max_size and self.stats['bytes'] > self.max_size:
+                    raise ArchiveLimitError("{a} is larger than {n} bytes when extracted".format(
+                        a=self.target, n=self.max_size))
+                f.write(chunk)
+
+        # u+rw,g+rw and u+x,g+x if executable by anyone (chmod u+rwX,g+rwX)
+        mode = (mode & 0o777) | 0o660
+        if mode & 0o111:
+            mode |= 0o110
+        os.chmod(path, mode)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def symlink(self, name, link_target):
+        """Create symbolic link, unless it points outside of dest."""
+        path = self._path(name)
+        if path is None or not self._is_inside(os.path.dirname(path)) or \
+                not self._is_inside(os.path.join(os.path.dirname(path), link_target)) or \
+                self._is_directory(path):
+            self.skip(name)
+            return
+        if not self._accept(name, path):
+            return
+        self._prepare(path)
+        os.symlink(link_target, path)
+
+    def hardlink(self, name, link_target):
+        """Create hard link to already extracted member link_target."""
+        path = self._path(name)
+        source = self._path(link_target)
+        if path is None or source is None or not self._is_inside(os.path.dirname(path)) or \
+                not self._is_inside(source) or not os.path.isfile(source) or \
+                self._is_directory(path):
+            self.skip(name)
+            return
+        if not self._accept(name, path):
+            return
+        self._prepare(path)
+        os.link(source, path)
+
+    def finish(self):
+        """Apply directory permissions and return extraction statistics."""
+        for path, mode in reversed(self._directories):
+            os.chmod(path, mode)
+        logger.debug("extracted %d entries (%d bytes) from %s, %d skipped", self.stats['entries'],
+                     self.stats['bytes'], self.target, self.stats['skipped'])
+        return self.stats
+
+
+# hash functions of Subresource Integrity strings in npm package documents, strongest first
+NPM_INTEGRITY_ALGORITHMS = ('sha512', 'sha384', 'sha256', 'sha1')
+
+
+def _npm_checksum(dist):
+    """Get checksum of a tarball from the npm package document.
+
+    :param dist: dict, 'dist' of the version in the package document
+    :return: tuple (hash function name, hex digest), (None, None) if no checksum is available
+    """
+    # e.g. "sha512-3nU...Vw== sha1-rBQ...", see https://www.w3.org/TR/SRI/
+    integrity = {}
+    for entry in (dist.get('integrity') or '').split():
+        algorithm, _, value = entry.partition('-')
+        try:
+            integrity[algorithm] = base64.b64decode(value.split('?')[0], validate=True).hex()
+        except binascii.Error:
+            logger.warning("invalid integrity string %r", entry)
+
+    for algorithm in NPM_INTEGRITY_ALGORITHMS:
+        if algorithm in integrity:
+            return algorithm, integrity[algorithm]
+    if dist.get('shasum'):
+        return 'sha1', dist['shasum'].lower()
+    return None, None
 
 
 class IndianaJones(object):
@@ -267,7 +523,7 @@ class IndianaJones(object):
         if target_dir:
             local_filename = os.path.join(target_dir, local_filename)
 
-        r = requests.get(url, stream=True)
+        r = http_client.get(url, stream=True)
         if r.status_code == 404:
             logger.error("unable to download: %s", url)
             return None
@@ -288,9 +544,8 @@ class IndianaJones(object):
                                                    graceful=False).pop()
 
     @staticmethod
-    def fetch_maven_artifact(ecosystem, name, version, target_dir):
+    def fetch_maven_artifact(ecosystem, name, version, target_dir, manifests_only=False):
         """Fetch maven artifact from maven.org."""
-        git = Git.create_git(target_dir)
         artifact_coords = MavenCoordinates.from_str(name)
         if not version:
             raise ValueError("No version provided for '%s'" % artifact_coords.to_str())
@@ -309,94 +564,92 @@ class IndianaJones(object):
         artifact_path = os.path.join(target_dir, local_filename)
         digest = compute_digest(artifact_path)
         if artifact_coords.packaging != 'pom':
-            Archive.extract(artifact_path, target_dir)
+            Archive.extract(artifact_path, target_dir, manifests_only=manifests_only)
             if artifact_coords.packaging == 'aar':
                 # 'aar' archive contains classes.jar, extract it too into target_dir
                 classes_jar_path = os.path.join(target_dir, "classes.jar")
                 if os.path.isfile(classes_jar_path):
-                    Archive.extract(classes_jar_path, target_dir)
+                    Archive.extract(classes_jar_path, target_dir,
+                                    manifests_only=manifests_only)
                     os.remove(classes_jar_path)
 
-        git.add_and_commit_everything()
         return digest, artifact_path
 
     @staticmethod
-    def fetch_npm_artifact(ecosystem, name, version, target_dir):
-        """Fetch npm artifact using system 'npm' tool."""
-        git = Git.create_git(target_dir)
-
-        npm_cmd = ['npm', '--registry', ecosystem.fetch_url]
-
-        # $ npm config get cache
-        # /root/.npm
-        cache_path = TimedCommand.get_command_output(npm_cmd + ['config', 'get', 'cache'],
-                                                     graceful=False).pop()
-
-        # add package to cache:
-        # /root/.npm/express/
-        # └── 4.13.4
-        #      ├── package
-        #      │   ├── History.md
-        #      │   ├── index.js
-        #      │   ├── lib
-        #      │   ├── LICENSE
-        #      │   ├── package.json
-        #      │   └── Readme.md
-        #      └── package.tgz
-        # 3 directories, 6 files
-        name_ver = name
-
-        try:
-            # importing here to avoid circular dependency
-            from f8a_worker.solver import NpmReleasesFetcher
-
-            version_list = NpmReleasesFetcher(ecosystem).fetch_releases(name_ver)[1]
-            if version not in version_list:
-                raise NotABugTaskError("Provided version is not supported '%s'" % name)
-            else:
-                name_ver = "{}@{}".format(name, version)
-        except ValueError as e:
-            raise NotABugTaskError(
-                'No versions for package NPM package {p} ({e})'.format(p=name, e=str(e))
-            )
+    def download_verified(url, path, algorithm=None, expected=None):
+        """Download file, computing its digests while writing.
 
-        # make sure the artifact is not in the cache yet
-        TimedCommand.get_command_output(npm_cmd + ['cache', 'clean', name], graceful=False)
-        logger.info("downloading npm module %s", name_ver)
-        cmd = npm_cmd + ['cache', 'add', name_ver]
-        TimedCommand.get_command_output(cmd, graceful=False)
+        :param url: str
+        :param path: str, where to store the file
+        :param algorithm: str, name of the hashing function of `expected` (sha256, sha1 etc.)
+        :param expected: str, hex digest published by the registry, None skips verification
+        :return: str, SHA256 digest of the file
+        :raises NotABugTaskError: if the file does not exist
+        :raises TaskError: if the file can't be downloaded or its digest does not match
+        """
+        hashes = {'sha256': hashlib.sha256()}
+        if expected is not None and algorithm not in hashes:
+            hashes[algorithm] = hashlib.new(algorithm)
 
-        # copy tarball to workpath
-        tarball_name = "package.tgz"
-        glob_path = os.path.join(cache_path, name, "*")
-        cache_abs_path = os.path.abspath(glob.glob(glob_path).pop())
-        artifact_path = os.path.join(cache_abs_path, tarball_name)
-        logger.debug("[cache] tarball path = %s", artifact_path)
-        artifact_path = shutil.copy(artifact_path, target_dir)
+        logger.debug("fetching artifact from: %s", url)
+        response = http_client.get(url, stream=True)
+        if response.status_code == 404:
+            raise NotABugTaskError("Unable to download: %s" % url)
+        if response.status_code != 200:
+            raise TaskError("Unable to download {u} (status code={s})".format(
+                u=url, s=response.status_code))
+
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                for digest in hashes.values():
+                    digest.update(chunk)
+                f.write(chunk)
+
+        if expected is not None and hashes[algorithm].hexdigest() != expected.lower():
+            os.remove(path)
+            raise TaskError("{a} digest of {u} does not match the one published by registry"
+                            .format(a=algorithm, u=url))
+        return hashes['sha256'].hexdigest()
 
+    @staticmethod
+    def fetch_npm_artifact(ecosystem, name, version, target_dir, manifests_only=False):
+        """Fetch npm artifact directly from the registry."""
+        # quote '/' (but not '@') in scoped package name, e.g. in '@slicemenice/item-layouter'
+        response = http_client.get(ecosystem.fetch_url + quote(name, safe='@'))
+        metadata = None
+        if response.status_code == 200:
+            metadata = response.json().get('versions', {}).get(version)
+        if metadata is None:
+            raise NotABugTaskError("Provided version is not supported '%s'" % name)
+
+        dist = metadata.get('dist', {})
+        if not dist.get('tarball'):
+            raise NotABugTaskError("No tarball of {n}@{v} in the package document".format(
+                n=name, v=version))
+        algorithm, expected = _npm_checksum(dist)
+        if expected is None:
+            logger.warning("no checksum of %s@%s in the package document", name, version)
+
+        logger.info("downloading npm module %s@%s", name, version)
+        artifact_path = os.path.join(target_dir, 'package.tgz')
+        digest = IndianaJones.download_verified(dist['tarball'], artifact_path,
+                                                algorithm, expected)
         logger.debug("[workdir] tarball path = %s", artifact_path)
-        # Prior to npm-2.x.x (Fedora 24)
-        # npm client was repackaging modules on download. It modified file permissions inside
-        # package.tgz so they matched UID/GID of a user running npm command. Therefore its
-        # digest was different then of a tarball downloaded directly from registry.npmjs.org.
-        digest = compute_digest(artifact_path)
-        Archive.extract(artifact_path, target_dir)
+        Archive.extract(artifact_path, target_dir, manifests_only=manifests_only)
 
-        # copy package/package.json over the extracted one,
-        # because it contains (since npm >= 2.x.x) more information.
-        npm_package_json = os.path.join(cache_abs_path, 'package', 'package.json')
-        shutil.copy(npm_package_json, target_dir)
+        # store package.json from the package document, which contains more information
+        # (e.g. dist, _id, gitHead) than package/package.json in the tarball
+        with open(os.path.join(target_dir, 'package.json'), 'w') as f:
+            json.dump(metadata, f, indent=2)
         # copy package/npm-shrinkwrap.json to target_dir
         npm_shrinkwrap_json = os.path.join(target_dir, 'package', 'npm-shrinkwrap.json')
         if os.path.isfile(npm_shrinkwrap_json):
             shutil.copy(npm_shrinkwrap_json, target_dir)
-        git.add_and_commit_everything()
         return digest, artifact_path
 
     @staticmethod
-    def fetch_nuget_artifact(ecosystem, name, version, target_dir):
+    def fetch_nuget_artifact(ecosystem, name, version, target_dir, manifests_only=False):
         """Fetch nuget artifact from nuget.org."""
-        git = Git.create_git(target_dir)
         nuget_url = ecosystem.fetch_url
         file_url = '{url}{name}.{version}.nupkg'.format(url=nuget_url,
                                                         name=name.lower(),
@@ -406,31 +659,23 @@ class IndianaJones(object):
             raise NotABugTaskError("Unable to download: %s" % file_url)
         artifact_path = os.path.join(target_dir, local_filename)
         digest = compute_digest(artifact_path)
-        Archive.extract(artifact_path, target_dir)
-        git.add_and_commit_everything()
+        Archive.extract(artifact_path, target_dir, manifests_only=manifests_only)
         return digest, artifact_path
 
     @staticmethod
-    def fetch_pypi_artifact(ecosystem, name, version, target_dir):
+    def fetch_pypi_artifact(ecosystem, name, version, target_dir, manifests_only=False):
         """Fetch Pypi artifact."""
-        git = Git.create_git(target_dir)
-        pypi_url = ecosystem.fetch_url
-
         # NOTE: we can't download Python packages via pip, because it runs setup.py
         #  even with `pip download`. Therefore we could always get syntax errors
         #  because of older/newer syntax.
-        res = requests.get(urljoin(pypi_url, '{n}/json'.format(n=name)))
-
-        if res.status_code != 200:
-            raise NotABugTaskError(
-                "Unable to fetch information about {n} from PyPI (status code={s})".format(
-                    n=name, s=res.status_code
-                )
-            )
+        # the document is shared with PypiReleasesFetcher used by solver
+        project = pypi_metadata.get(ecosystem.fetch_url, name)
+        if project is None:
+            raise NotABugTaskError("Unable to fetch information about {n} from PyPI".format(n=name))
 
         if not version:
-            version = res.json()['info']['version']
-        release_files = res.json().get('releases', {}).get(version, [])
+            version = project.latest_version
+        release_files = project.release_files(version)
         if not release_files:
             raise NotABugTaskError("No release files for version %s" % version)
 
@@ -442,15 +687,13 @@ class IndianaJones(object):
         def release_key(rel):
             return {'sdist': 0, 'bdist_wheel': 1, 'bdist_egg': 2}.get(rel['packagetype'], 3)
 
-        release_files = list(sorted(release_files, key=release_key))
-        file_url = release_files[0]['url']
-        local_filename = IndianaJones.download_file(file_url, target_dir)
-        if local_filename is None:
-            raise NotABugTaskError("Unable to download: %s" % file_url)
-        artifact_path = os.path.join(target_dir, local_filename)
-        digest = compute_digest(artifact_path)
-        Archive.extract(artifact_path, target_dir)
-        git.add_and_commit_everything()
+        release_file = sorted(release_files, key=release_key)[0]
+        file_url = release_file['url']
+        artifact_path = os.path.join(target_dir, release_file.get('filename') or
+                                     file_url.rstrip('/').split('/')[-1])
+        digest = IndianaJones.download_verified(file_url, artifact_path, 'sha256',
+                                                release_file.get('digests', {}).get('sha256'))
+        Archive.extract(artifact_path, target_dir, manifests_only=manifests_only)
         return digest, artifact_path
 
     @staticmethod
@@ -481,9 +724,14 @@ class IndianaJones(object):
     def fetch_artifact(ecosystem=None,
                        artifact=None,
                        version=None,
-                       target_dir='.'):
+                       target_dir='.',
+                       manifests_only=False):
         """Download artifact from registry and process it.
 
+        Artifacts are extracted into target_dir, which is not turned into a git repository.
+
+        :param manifests_only: bool, extract only manifest files (see Archive.MANIFEST_PATTERNS)
+                               from downloaded archive
         :return: tuple: (digest, artifact_path)
         """
         parsed = urlparse(artifact)
@@ -492,19 +740,19 @@ class IndianaJones(object):
 
         if ecosystem.is_backed_by(EcosystemBackend.pypi):
             digest, artifact_path = IndianaJones.fetch_pypi_artifact(
-                ecosystem, artifact, version, target_dir
+                ecosystem, artifact, version, target_dir, manifests_only=manifests_only
             )
         elif ecosystem.is_backed_by(EcosystemBackend.npm):
             digest, artifact_path = IndianaJones.fetch_npm_artifact(
-                ecosystem, artifact, version, target_dir
+                ecosystem, artifact, version, target_dir, manifests_only=manifests_only
             )
         elif ecosystem.is_backed_by(EcosystemBackend.maven):
             digest, artifact_path = IndianaJones.fetch_maven_artifact(
-                ecosystem, artifact, version, target_dir
+                ecosystem, artifact, version, target_dir, manifests_only=manifests_only
             )
         elif ecosystem.is_backed_by(EcosystemBackend.nuget):
             digest, artifact_path = IndianaJones.fetch_nuget_artifact(
-                ecosystem, artifact, version, target_dir
+                ecosystem, artifact, version, target_dir, manifests_only=manifests_only
             )
         elif ecosystem.is_backed_by(EcosystemBackend.go):
             digest, artifact_path = IndianaJones.fetch_go_artifact(
@@ -0,0 +1,147 @@
+"""Client of PyPI JSON API shared by the solver and artifact fetching.
+
+Project documents (https://pypi.org/pypi/<project>/json) list all releases together with
+their files and digests. Documents of popular projects are megabytes of JSON, so every
+document is fetched and parsed once and kept in memory for the configured time to live;
+expired documents are revalidated with a conditional request.
+"""
+
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from urllib.parse import urljoin
+
+from f8a_worker.defaults import configuration
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+
+class PypiProject(object):
+    """Parsed JSON API document of a PyPI project."""
+
+    __slots__ = ('name', 'document', 'validators', 'stored_at')
+
+    def __init__(self, name, document, validators=None):
+        """Initialize instance.
+
+        :param name: str, normalized project name
+        :param document: dict, parsed JSON API document
+        :param validators: dict, HTTP validators ('etag', 'last_modified') of the response
+        """
+        self.name = name
+        self.document = document
+        self.validators = validators or {}
+        self.stored_at = time()
+
+    @property
+    def releases(self):
+        """Get list of all release versions."""
+        return list(self.document.get('releases', {}))
+
+    @property
+    def latest_version(self):
+        """Get the latest (non pre-release) version."""
+        return self.document.get('info', {}).get('version')
+
+    def release_files(self, version):
+        """Get files of `version`.
+
+        :param version: str
+        :return: list of dicts with 'url', 'filename', 'packagetype' and 'digests' keys
+        """
+        return self.document.get('releases', {}).get(version, [])
+
+    def is_fresh(self, ttl):
+        """Check whether the document is younger than `ttl` seconds."""
+        return time() - self.stored_at < ttl
+
+
+class PypiMetadataClient(object):
+    """Fetch PyPI project documents, keep parsed documents in an in-memory LRU cache."""
+
+    def __init__(self, max_size=None, ttl=None):
+        """Initialize client.
+
+        :param max_size: int, maximum number of documents kept in memory
+        :param ttl: int, time to live of documents in seconds, defaults to configured
+                    time to live of PyPI release lists
+        """
+        self.max_size = max_size if max_size is not None \
+            else configuration.PYPI_METADATA_CACHE_SIZE
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0}
+        self._projects = OrderedDict()
+        self._lock = Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            self.stats[counter] += 1
+
+    def _store(self, key, project):
+        with self._lock:
+            self._projects[key] = project
+            self._projects.move_to_end(key)
+            while len(self._projects) > self.max_size:
+                self._projects.popitem(last=False)
+
+    def get(self, fetch_url, package):
+        """Get document of `package`, fetch it only if there's no fresh document in memory.
+
+        :param fetch_url: str, base URL of the JSON API, e.g. https://pypi.org/pypi/
+        :param package: str, project name
+        :return: PypiProject, None if the project can't be fetched
+        """
+        name = package.lower()
+        key = (fetch_url, name)
+        with self._lock:
+            project = self._projects.get(key)
+            if project is not None:
+                self._projects.move_to_end(key)
+
+        ttl = self.ttl if self.ttl is not None \
+            else configuration.releases_cache_ttl(EcosystemBackend.pypi)
+        if project is not None and project.is_fresh(ttl):
+            self._count('hits')
+            return project
+
+        headers = {}
+        if project is not None and project.validators.get('etag'):
+            headers['If-None-Match'] = project.validators['etag']
+        if project is not None and project.validators.get('last_modified'):
+            headers['If-Modified-Since'] = project.validators['last_modified']
+
+        response = http_client.get(urljoin(fetch_url, '{n}/json'.format(n=name)), headers=headers)
+        if project is not None and response.status_code == 304:
+            self._count('revalidated')
+            project = PypiProject(name, project.document, project.validators)
+            self._store(key, project)
+            return project
+
+        if response.status_code != 200:
+            logger.error("Unable to fetch information about %s from PyPI (status code=%d)",
+                         name, response.status_code)
+            return None
+
+        self._count('misses')
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+        project = PypiProject(name, response.json(), validators)
+        self._store(key, project)
+        return project
+
+    def clear(self):
+        """Drop all documents and reset statistics."""
+        with self._lock:
+            self._projects.clear()
+            for counter in self.stats:
+                self.stats[counter] = 0
+
+
+# Shared by solvers and IndianaJones in the worker process
+pypi_metadata = PypiMetadataClient()
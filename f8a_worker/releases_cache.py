@@ -0,0 +1,158 @@
+"""Cache of package release lists used by the dependency solver."""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+
+from f8a_worker.defaults import configuration
+
+logger = logging.getLogger(__name__)
+
+
+class ReleasesCacheEntry(object):
+    """Release list of a single package together with data needed for revalidation."""
+
+    __slots__ = ('name', 'releases', 'validators', 'stored_at')
+
+    def __init__(self, name, releases, validators=None, stored_at=None):
+        """Initialize entry.
+
+        :param name: str, package name as returned by the fetcher
+        :param releases: list, package release versions
+        :param validators: dict, HTTP validators ('etag', 'last_modified') of the response
+        :param stored_at: float, timestamp of the (re)validation
+        """
+        self.name = name
+        self.releases = releases
+        self.validators = validators or {}
+        self.stored_at = time() if stored_at is None else stored_at
+
+    def is_fresh(self, ttl):
+        """Check whether the entry is younger than `ttl` seconds."""
+        return time() - self.stored_at < ttl
+
+    def to_dict(self):
+        """Convert entry to a JSON serializable dictionary."""
+        return {
+            'name': self.name,
+            'releases': self.releases,
+            'validators': self.validators,
+            'stored_at': self.stored_at
+        }
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        """Create entry from a dictionary created by to_dict()."""
+        return cls(dictionary['name'], dictionary['releases'],
+                   dictionary.get('validators'), dictionary['stored_at'])
+
+
+class ReleasesCache(object):
+    """Two-tier (in-process LRU and optional on-disk) cache of release lists.
+
+    The on-disk tier is a directory that can be shared by all worker processes on
+    a node (or mounted from a shared volume), entries are written atomically so
+    concurrent writers never expose partially written files.
+    """
+
+    def __init__(self, max_size=None, cache_dir=None):
+        """Initialize cache.
+
+        :param max_size: int, maximum number of entries kept in memory
+        :param cache_dir: str, directory used for the on-disk tier, None disables it
+        """
+        self.max_size = max_size if max_size is not None else configuration.RELEASES_CACHE_SIZE
+        self.cache_dir = cache_dir if cache_dir is not None else configuration.RELEASES_CACHE_DIR
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'disk_hits': 0}
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(ecosystem, package):
+        """Create cache key for the given package.
+
+        Fetch URL is part of the key so that ecosystems pointed to a different registry
+        (e.g. a local mirror) do not share entries.
+        """
+        return '{e}|{u}|{p}'.format(e=ecosystem.name, u=ecosystem.fetch_url or '', p=package)
+
+    def _disk_path(self, key):
+        """Get path to file holding the given key in the on-disk tier."""
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _get_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+
+        try:
+            with open(self._disk_path(key)) as f:
+                return ReleasesCacheEntry.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            logger.warning("Ignoring corrupted releases cache file for %r", key)
+            return None
+
+    def _put_to_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with NamedTemporaryFile(mode='w', dir=self.cache_dir, suffix='.tmp',
+                                    delete=False) as f:
+                json.dump(entry.to_dict(), f)
+            os.replace(f.name, self._disk_path(key))
+        except OSError:
+            logger.exception("Unable to store releases cache entry for %r", key)
+
+    def get(self, key):
+        """Get cached entry (regardless of its age) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._get_from_disk(key)
+        if entry is not None:
+            self.count('disk_hits')
+            self._store_in_memory(key, entry)
+        return entry
+
+    def _store_in_memory(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def put(self, key, entry):
+        """Store entry in all cache tiers."""
+        self._store_in_memory(key, entry)
+        self._put_to_disk(key, entry)
+
+    def count(self, counter):
+        """Increment the given statistics counter."""
+        with self._lock:
+            self.stats[counter] += 1
+
+    def clear(self):
+        """Drop all in-memory entries and reset statistics (on-disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            for counter in self.stats:
+                self.stats[counter] = 0
+
+    def __len__(self):
+        """Return number of entries held in memory."""
+        return len(self._entries)
+
+
+# Shared by all solvers in the worker process
+releases_cache = ReleasesCache()
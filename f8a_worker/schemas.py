@@ -5,11 +5,21 @@ from collections import namedtuple, OrderedDict
 from functools import wraps
 import importlib
 import json
+import logging
 import os.path
 import pkgutil
 
 import jsl
 import jsonschema
+try:
+    import fastjsonschema
+except ImportError:
+    # fastjsonschema is an optional, faster validator backend
+    fastjsonschema = None
+
+from f8a_worker.defaults import configuration
+
+logger = logging.getLogger(__name__)
 
 
 def added_in(role):
@@ -286,6 +296,106 @@ load_all_worker_jsl_definitions = _worker_schemas.load_all_jsl_definitions
 load_worker_schema_class_and_role = _worker_schemas.load_schema_class_and_role
 
 
+def _collect_formats(schema):
+    """Get names of all string formats used in the given schema."""
+    formats = set()
+    if isinstance(schema, dict):
+        if isinstance(schema.get('format'), str):
+            formats.add(schema['format'])
+        for value in schema.values():
+            formats |= _collect_formats(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            formats |= _collect_formats(value)
+    return formats
+
+
+class _JsonSchemaValidator(object):
+    """Reusable jsonschema validator, reports errors the same way jsonschema.validate() does."""
+
+    def __init__(self, schema):
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        self._validator = validator_class(schema)
+
+    def validate(self, instance):
+        error = jsonschema.exceptions.best_match(self._validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+
+class _FastJsonSchemaValidator(object):
+    """Validator generated by fastjsonschema, raises jsonschema's ValidationError."""
+
+    def __init__(self, schema):
+        # jsonschema.validate() doesn't check string formats, neither should this validator
+        formats = {name: lambda value: True for name in _collect_formats(schema)}
+        # generated code embeds parts of the schema, it has to consist of plain dicts
+        schema = json.loads(json.dumps(schema))
+        self._validate = fastjsonschema.compile(schema, formats=formats, use_default=False)
+
+    def validate(self, instance):
+        try:
+            self._validate(instance)
+        except fastjsonschema.JsonSchemaException as exc:
+            raise jsonschema.exceptions.ValidationError(exc.message) from exc
+
+
+class CompiledSchemas(object):
+    """Validators of schemas from a schema library, created once per process and reused.
+
+    jsonschema.validate() creates a new validator and checks the schema itself on every
+    call, which costs more than validating a typical task result.
+    """
+
+    _BACKENDS = {
+        'jsonschema': _JsonSchemaValidator,
+        'fastjsonschema': _FastJsonSchemaValidator
+    }
+
+    def __init__(self, library, backend='jsonschema'):
+        """Initialize object.
+
+        :param library: schema library used to load schemas
+        :param backend: str, 'jsonschema' or 'fastjsonschema' (if installed)
+        """
+        if backend not in self._BACKENDS:
+            raise ValueError("Unknown schema validator backend: {}".format(backend))
+        if backend == 'fastjsonschema' and fastjsonschema is None:
+            logger.warning("fastjsonschema is not installed, using jsonschema to validate")
+            backend = 'jsonschema'
+
+        self.backend = backend
+        self._library = library
+        self._validators = {}
+
+    def get(self, schema_ref):
+        """Get validator of the given schema, its validate() method raises ValidationError.
+
+        :param schema_ref: SchemaRef of the schema
+        """
+        validator = self._validators.get(schema_ref)
+        if validator is None:
+            validator = self._BACKENDS[self.backend](self._library.load_schema(schema_ref))
+            self._validators[schema_ref] = validator
+        return validator
+
+    def precompile(self, schema_refs):
+        """Create validators of the given schemas in advance.
+
+        :param schema_refs: iterable of SchemaRef
+        """
+        for schema_ref in schema_refs:
+            self.get(schema_ref)
+
+    def validate(self, instance, schema_ref):
+        """Validate instance against the schema given by schema_ref.
+
+        :raises jsonschema.exceptions.ValidationError: if the instance is not valid
+        """
+        self.get(schema_ref).validate(instance)
+
+
 class SchemaValidator(object):
     """Encapsulation for the provided schema library.
 
@@ -362,6 +472,8 @@ class SchemaValidator(object):
 
 
 external_schema = SchemaValidator(_external_schemas)
+worker_schema_validators = CompiledSchemas(_worker_schemas,
+                                           backend=configuration.SCHEMA_VALIDATOR_BACKEND)
 
 
 def get_schema_ref(analysis, default=None):
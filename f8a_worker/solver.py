@@ -3,23 +3,27 @@
 import anymarkup
 from bs4 import BeautifulSoup
 from collections import defaultdict
-from functools import cmp_to_key
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 import logging
 from lxml import etree
 from operator import itemgetter
-from pip._internal.req.req_file import parse_requirements
-from pip._vendor.packaging.specifiers import _version_split
+from packaging.requirements import Requirement
+from packaging.version import Version as Pep440Version
 import re
-from requests import get
 from semantic_version import Version as semver_version
-from subprocess import check_output
-from tempfile import NamedTemporaryFile, TemporaryDirectory
+from tempfile import TemporaryDirectory
 from urllib.parse import urljoin, quote
-from urllib.request import urlopen
-import requests
 
+from f8a_worker.defaults import configuration
 from f8a_worker.enums import EcosystemBackend
+from f8a_worker.http_client import http_client
 from f8a_worker.models import Analysis, Ecosystem, Package, Version
+from f8a_worker.npm_semver import valid_range
+from f8a_worker.pypi_metadata import pypi_metadata
+from f8a_worker.releases_cache import releases_cache, ReleasesCacheEntry
+from f8a_worker.task_metrics import propagate
 from f8a_worker.utils import cwd, TimedCommand
 from f8a_worker.process import Git
 
@@ -40,6 +44,30 @@ class Tokens(object):
     (GTE, LTE, EQ1, GT, LT, EQ2, NEQ) = range(len(operators))
 
 
+@lru_cache(maxsize=65536)
+def _version_parts(version):
+    """Convert a version string to tuple of integers.
+
+    "1.2.3" -> (1, 2, 3)
+
+    :param version: str
+    :return: Tuple[int]
+    """
+    r = []
+    for n in version.replace('-', '.').split('.'):
+        try:
+            r.append(int(n))
+        except ValueError:
+            # sort rc*, alpha, beta etc. lower than their non-annotated counterparts
+            r.append(-1)
+    return tuple(r)
+
+
+def _pad(parts, length):
+    """Append zeros to `parts` so it has `length` items, missing items compare as zeros."""
+    return parts + (0,) * (length - len(parts))
+
+
 def compare_version(a, b):
     """Compare two version strings.
 
@@ -47,61 +75,211 @@ def compare_version(a, b):
     :param b: str
     :return: -1 / 0 / 1
     """
-    def _range(q):
-        """Convert a version string to array of integers.
+    left, right = _version_parts(a), _version_parts(b)
+    length = max(len(left), len(right))
+    left, right = _pad(left, length), _pad(right, length)
 
-        "1.2.3" -> [1, 2, 3]
+    return (left > right) - (left < right)
 
-        :param q: str
-        :return: List[int]
-        """
-        r = []
-        for n in q.replace('-', '.').split('.'):
-            try:
-                r.append(int(n))
-            except ValueError:
-                # sort rc*, alpha, beta etc. lower than their non-annotated counterparts
-                r.append(-1)
-        return r
 
-    def _append_zeros(x, num_zeros):
-        """Append `num_zeros` zeros to a copy of `x` and return it.
+class ParsedVersion(object):
+    """Version string parsed once into a comparable key, ordered the same way as compare_version().
+
+    >>> sorted(['1.10', '1.2.0', '1.2-rc1'], key=ParsedVersion.parse)
+    ['1.2-rc1', '1.2.0', '1.10']
+    """
+
+    __slots__ = ('version', 'parts')
+
+    def __init__(self, version):
+        """Initialize instance, use ParsedVersion.parse() to benefit from caching."""
+        self.version = version
+        self.parts = _version_parts(version)
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def parse(version):
+        """Get (cached) parsed version for version string."""
+        return ParsedVersion(version)
+
+    def key(self, length):
+        """Return tuple key of this version comparable with other keys of the same `length`."""
+        return _pad(self.parts, length)
+
+    def _cmp(self, other):
+        length = max(len(self.parts), len(other.parts))
+        left, right = self.key(length), other.key(length)
+        return (left > right) - (left < right)
+
+    def __eq__(self, other):
+        """Implement '==' operator."""
+        return self._cmp(other) == 0
+
+    def __lt__(self, other):
+        """Implement '<' operator."""
+        return self._cmp(other) < 0
+
+    def __le__(self, other):
+        """Implement '<=' operator."""
+        return self._cmp(other) <= 0
+
+    def __gt__(self, other):
+        """Implement '>' operator."""
+        return self._cmp(other) > 0
+
+    def __ge__(self, other):
+        """Implement '>=' operator."""
+        return self._cmp(other) >= 0
+
+    def __hash__(self):
+        """Hash consistently with '==', trailing zeros do not matter."""
+        parts = self.parts
+        while parts and parts[-1] == 0:
+            parts = parts[:-1]
+        return hash(parts)
 
-        :param x: List[int]
-        :param num_zeros: int
-        :return: List[int]
+    def __repr__(self):
+        """Return string representation of this instance."""
+        return "ParsedVersion({!r})".format(self.version)
+
+
+def sort_versions(versions):
+    """Sort version strings the same way as sorted(versions, key=cmp_to_key(compare_version)).
+
+    :param versions: iterable of str
+    :return: List[str]
+    """
+    parsed = [ParsedVersion.parse(v) for v in versions]
+    length = max((len(p.parts) for p in parsed), default=0)
+    parsed.sort(key=lambda p: p.key(length))
+    return [p.version for p in parsed]
+
+
+class ReleasesMatcher(object):
+    """Matches Dependency specs against many releases at once.
+
+    Releases are parsed and sorted once, each comparison term of a spec is then
+    evaluated by bisection into a range of indices of the sorted releases.
+    """
+
+    __slots__ = ('_parsed', '_keys', '_length')
+
+    def __init__(self, releases):
+        """Initialize instance.
+
+        :param releases: iterable of str, release versions
         """
-        nx = list(x)
-        for _ in range(num_zeros):
-            nx.append(0)
-        return nx
+        self._parsed = [ParsedVersion.parse(r) for r in releases]
+        self._length = 0
+        self._sort(max((len(p.parts) for p in self._parsed), default=0))
+
+    def _sort(self, length):
+        """(Re)compute keys of `length` items and sort releases by them (stable)."""
+        self._length = length
+        self._parsed.sort(key=lambda p: p.key(length))
+        self._keys = [p.key(length) for p in self._parsed]
 
-    def _cardinal(x, y):
-        """Make both input lists be of same cardinality.
+    @property
+    def releases(self):
+        """Return all releases sorted from the lowest to the highest."""
+        return [p.version for p in self._parsed]
+
+    def _term_ranges(self, term):
+        """Get sorted list of (start, end) index ranges of releases matching single term.
 
-        :param x: List[int]
-        :param y: List[int]
-        :return: List[int]
+        :param term: tuple, (operator, version) or (version,)
         """
-        lx, ly = len(x), len(y)
-        if lx == ly:
-            return x, y
-        elif lx > ly:
-            return x, _append_zeros(y, lx - ly)
+        if len(term) == 1:
+            term = ('=', term[0])
+
+        operator, version = term
+        parsed = ParsedVersion.parse(version)
+        if len(parsed.parts) > self._length:
+            self._sort(len(parsed.parts))
+        key = parsed.key(self._length)
+        lo, hi, count = bisect_left(self._keys, key), bisect_right(self._keys, key), len(self._keys)
+
+        token = Tokens.operators.index(operator)
+        if token in [Tokens.EQ1, Tokens.EQ2]:
+            return [(lo, hi)]
+        elif token == Tokens.GT:
+            return [(hi, count)]
+        elif token == Tokens.LT:
+            return [(0, lo)]
+        elif token == Tokens.GTE:
+            return [(lo, count)]
+        elif token == Tokens.LTE:
+            return [(0, hi)]
+        elif token == Tokens.NEQ:
+            return [(0, lo), (hi, count)]
         else:
-            return _append_zeros(x, ly - lx), y
+            raise ValueError('Invalid comparison token')
 
-    left, right = _cardinal(_range(a), _range(b))
+    @staticmethod
+    def _intersect(left, right):
+        """Intersect two sorted lists of disjoint ranges."""
+        result = []
+        i = j = 0
+        while i < len(left) and j < len(right):
+            start, end = max(left[i][0], right[j][0]), min(left[i][1], right[j][1])
+            if start < end:
+                result.append((start, end))
+            if left[i][1] < right[j][1]:
+                i += 1
+            else:
+                j += 1
+        return result
 
-    return (left > right) - (left < right)
+    @staticmethod
+    def _union(ranges):
+        """Merge ranges into sorted list of disjoint ranges."""
+        result = []
+        for start, end in sorted(r for r in ranges if r[0] < r[1]):
+            if result and start <= result[-1][1]:
+                result[-1] = (result[-1][0], max(result[-1][1], end))
+            else:
+                result.append((start, end))
+        return result
+
+    def _spec_ranges(self, spec, conjunction):
+        """Get ranges of releases matching spec, items are either ANDed or ORed."""
+        item_ranges = (self._spec_ranges(s, True) if isinstance(s, list)
+                       else self._union(self._term_ranges(s)) for s in spec)
+        if not conjunction:
+            return self._union(r for ranges in item_ranges for r in ranges)
+
+        result = [(0, len(self._keys))]
+        for ranges in item_ranges:
+            result = self._intersect(result, ranges)
+        return result
+
+    def match(self, dependency):
+        """Get releases matching `dependency`, sorted from the lowest to the highest.
+
+        Gives the same result as sorted([r for r in releases if r in dependency],
+        key=cmp_to_key(compare_version)).
+
+        :param dependency: Dependency
+        :return: List[str]
+        """
+        if not self._parsed:
+            return []
+
+        ranges = self._spec_ranges(dependency.spec, False)
+        return [p.version for start, end in ranges for p in self._parsed[start:end]]
 
 
 class ReleasesFetcher(object):
     """Base class for fetching releases."""
 
+    # whether fetch_releases() can be called from multiple threads at once
+    thread_safe = True
+
     def __init__(self, ecosystem):
         """Initialize ecosystem."""
         self._ecosystem = ecosystem
+        # HTTP validators of last responses, {package: {'etag': .., 'last_modified': ..}}
+        self._validators = {}
 
     @property
     def ecosystem(self):
@@ -112,6 +290,44 @@ class ReleasesFetcher(object):
         """Abstract method for getting list of releases versions."""
         raise NotImplementedError
 
+    def fetch_releases_if_modified(self, package, validators):
+        """Fetch releases only if they changed since the response described by `validators`.
+
+        Fetchers that are able to do conditional requests override this method,
+        others simply fetch releases again.
+
+        :param package: str, package name
+        :param validators: dict, validators previously returned by pop_validators()
+        :return: None if releases were not modified, (package, releases) otherwise
+        """
+        return self.fetch_releases(package)
+
+    def pop_validators(self, package):
+        """Get (and forget) HTTP validators of the last response fetched for `package`.
+
+        :return: dict, possibly empty
+        """
+        return self._validators.pop(package, {})
+
+    def _remember_validators(self, package, response):
+        """Remember HTTP validators of `response`, so it can be revalidated later."""
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+        self._validators[package] = validators
+
+    @staticmethod
+    def _conditional_headers(validators):
+        """Create headers for a conditional request based on stored validators."""
+        headers = {}
+        if validators and validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators and validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
 
 class PypiReleasesFetcher(ReleasesFetcher):
     """Releases fetcher for Pypi."""
@@ -121,28 +337,30 @@ class PypiReleasesFetcher(ReleasesFetcher):
         super(PypiReleasesFetcher, self).__init__(ecosystem)
 
     def fetch_releases(self, package):
-        """Fetch package releases versions.
+        """Fetch package releases versions from the project document in JSON API."""
+        return self._fetch_releases(package)
 
-        XML-RPC API Documentation: https://wiki.python.org/moin/PyPIXmlRpc
-        Signature: package_releases(package_name, show_hidden=False)
-        """
+    def fetch_releases_if_modified(self, package, validators):
+        """Fetch package releases versions if the project document has changed."""
+        return self._fetch_releases(package, validators)
+
+    def _fetch_releases(self, package, validators=None):
         if not package:
             raise ValueError("package")
 
-        package = package.lower()
-
-        pypi_package_url = urljoin(
-            self.ecosystem.fetch_url, '{pkg_name}/json'.format(pkg_name=package)
-        )
-
-        response = requests.get(pypi_package_url)
-        if response.status_code != 200:
+        # the document is shared with IndianaJones.fetch_pypi_artifact()
+        project = pypi_metadata.get(self.ecosystem.fetch_url, package)
+        if project is None:
             logger.error('Unable to obtain a list of versions for {pkg_name}'.format(
-                pkg_name=package
+                pkg_name=package.lower()
             ))
-            return package, []
+            return package.lower(), []
 
-        return package, list({x for x in response.json().get('releases', {})})
+        if validators and project.validators == validators:
+            return None
+
+        self._validators[package] = dict(project.validators)
+        return project.name, project.releases
 
 
 class NpmReleasesFetcher(ReleasesFetcher):
@@ -165,13 +383,24 @@ class NpmReleasesFetcher(ReleasesFetcher):
             }
         }
         """
+        return self._fetch_releases(package)
+
+    def fetch_releases_if_modified(self, package, validators):
+        """Fetch package releases versions using a conditional request."""
+        return self._fetch_releases(package, validators)
+
+    def _fetch_releases(self, package, validators=None):
         if not package:
             raise ValueError("package")
 
         # quote '/' (but not '@') in scoped package name, e.g. in '@slicemenice/item-layouter'
-        r = get(self.ecosystem.fetch_url + quote(package, safe='@'))
+        r = http_client.get(self.ecosystem.fetch_url + quote(package, safe='@'),
+                            headers=self._conditional_headers(validators))
+        if validators and r.status_code == 304:
+            return None
 
         if r.status_code == 200 and r.content:
+            self._remember_validators(package, r)
             return package, list(r.json().get('versions', {}).keys())
         return package, []
 
@@ -186,8 +415,10 @@ class NugetReleasesFetcher(ReleasesFetcher):
     def scrape_versions_from_nuget_org(self, package, sort_by_downloads=False):
         """Scrape 'Version History' from Nuget."""
         releases = []
-        nuget_packages_url = 'https://www.nuget.org/packages/'
-        page = get(nuget_packages_url + package)
+        mirror_url = configuration.registry_mirror_url(EcosystemBackend.nuget)
+        nuget_packages_url = mirror_url + 'packages/' if mirror_url \
+            else 'https://www.nuget.org/packages/'
+        page = http_client.get(nuget_packages_url + package)
         page = BeautifulSoup(page.text, 'html.parser')
         version_history = page.find(class_="version-history")
         for version in version_history.find_all(href=re.compile('/packages/')):
@@ -237,7 +468,9 @@ class MavenReleasesFetcher(ReleasesFetcher):
                 '{g}/{a}/{f}'.format(g=group_id_path, a=artifact_id, f=filename)
             )
             try:
-                metadata_xml = etree.parse(urlopen(url))
+                response = http_client.get(url)
+                response.raise_for_status()
+                metadata_xml = etree.fromstring(response.content)
                 we_good = True  # We successfully downloaded at least one of the metadata files
                 version_elements = metadata_xml.findall('.//version')
                 versions = versions.union({x.text for x in version_elements})
@@ -298,6 +531,9 @@ class GolangReleasesFetcher(ReleasesFetcher):
 class F8aReleasesFetcher(ReleasesFetcher):
     """Releases fetcher for internal database."""
 
+    # database session must not be shared between threads
+    thread_safe = False
+
     def __init__(self, ecosystem, database):
         """Initialize instance."""
         super(F8aReleasesFetcher, self).__init__(ecosystem)
@@ -311,7 +547,57 @@ class F8aReleasesFetcher(ReleasesFetcher):
                    Ecosystem.name == self.ecosystem.name,
                    Analysis.finished_at.isnot(None))
         versions = {v.identifier for v in query}
-        return package, list(sorted(versions, key=cmp_to_key(compare_version)))
+        return package, sort_versions(versions)
+
+
+class CachedReleasesFetcher(ReleasesFetcher):
+    """Decorator of any ReleasesFetcher that caches fetched release lists.
+
+    Fresh cache entries are served without touching the registry, expired entries
+    are revalidated with a conditional request where the wrapped fetcher supports it.
+    Empty release lists are never cached, so a newly published package is seen immediately.
+    """
+
+    def __init__(self, fetcher, cache=None, ttl=None):
+        """Initialize instance.
+
+        :param fetcher: ReleasesFetcher, fetcher to be wrapped
+        :param cache: ReleasesCache, cache to be used, shared process-wide cache by default
+        :param ttl: int, time to live of cache entries in seconds, defaults to configured
+                    value for the ecosystem backend
+        """
+        super().__init__(fetcher.ecosystem)
+        self.fetcher = fetcher
+        self.thread_safe = fetcher.thread_safe
+        self.cache = cache if cache is not None else releases_cache
+        if ttl is None:
+            ttl = configuration.releases_cache_ttl(fetcher.ecosystem.backend)
+        self.ttl = ttl
+
+    def fetch_releases(self, package):
+        """Fetch package releases versions, use cached values if possible."""
+        key = self.cache.make_key(self.ecosystem, package)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh(self.ttl):
+            self.cache.count('hits')
+            return entry.name, list(entry.releases)
+
+        if entry is not None and entry.validators:
+            result = self.fetcher.fetch_releases_if_modified(package, entry.validators)
+            if result is None:
+                self.cache.count('revalidated')
+                self.cache.put(key, ReleasesCacheEntry(entry.name, entry.releases,
+                                                       entry.validators))
+                return entry.name, list(entry.releases)
+        else:
+            result = self.fetcher.fetch_releases(package)
+
+        self.cache.count('misses')
+        name, releases = result
+        if releases:
+            self.cache.put(key, ReleasesCacheEntry(name, list(releases),
+                                                   self.fetcher.pop_validators(package)))
+        return name, releases
 
 
 class Dependency(object):
@@ -408,6 +694,7 @@ class PypiDependencyParser(DependencyParser):
     """Pypi Dependency parsing."""
 
     @staticmethod
+    @lru_cache(maxsize=65536)
     def _parse_python(spec):
         """Parse PyPI specification of a single dependency.
 
@@ -417,23 +704,18 @@ class PypiDependencyParser(DependencyParser):
         def _extract_op_version(spec):
             # https://www.python.org/dev/peps/pep-0440/#compatible-release
             if spec.operator == '~=':
-                version = _version_split(spec.version)
-                if len(version) > 1:
-                    # ignore pre-release, post-release or developmental release
-                    while not version[-1].isdigit():
-                        del version[-1]
-                    del version[-1]  # will increase the last but one in next line
-                    version[-1] = str(int(version[-1]) + 1)
+                # ignore pre-release, post-release or developmental release
+                release = Pep440Version(spec.version).release
+                if len(release) > 1:
+                    upper = release[:-2] + (release[-2] + 1,)
                 else:
                     raise ValueError('%r must not be used with %r' % (spec.operator, spec.version))
-                return [('>=', spec.version), ('<', '.'.join(version))]
+                return [('>=', spec.version), ('<', '.'.join(str(n) for n in upper))]
             # Trailing .* is permitted per
             # https://www.python.org/dev/peps/pep-0440/#version-matching
             elif spec.operator == '==' and spec.version.endswith('.*'):
                 try:
-                    result = check_output(['/usr/bin/semver-ranger', spec.version],
-                                          universal_newlines=True).strip()
-                    gte, lt = result.split()
+                    gte, lt = (valid_range(spec.version) or '').split()
                     return [('>=', gte.lstrip('>=')), ('<', lt.lstrip('<'))]
                 except ValueError:
                     logger.info("couldn't resolve ==%s", spec.version)
@@ -445,27 +727,16 @@ class PypiDependencyParser(DependencyParser):
             else:
                 return spec.operator, spec.version
 
-        def _get_pip_spec(requirements):
-            """There's no `specs` field In Pip 8+, take info from `specifier` field."""
-            if hasattr(requirements, 'specs'):
-                return requirements.specs
-            elif hasattr(requirements, 'specifier'):
-                specs = [_extract_op_version(spec) for spec in requirements.specifier]
-                if len(specs) == 0:
-                    specs = [('>=', '0.0.0')]
-                elif len(specs) > 1:
-                    specs = [specs]
-                return specs
-
-        # create a temporary file and store the spec there since
-        # `parse_requirements` requires a file
-        with NamedTemporaryFile(mode='w+', suffix='pysolve') as f:
-            f.write(spec)
-            f.flush()
-            parsed = parse_requirements(f.name, session=f.name)
-            dependency = [Dependency(x.name, _get_pip_spec(x.req)) for x in parsed].pop()
-
-        return dependency
+        # same as pip, strip comments but keep URL fragments (foo @ https://...#sha256=...)
+        requirement = Requirement(re.sub(r'(^|\s+)#.*$', '', spec).strip())
+        specs = [_extract_op_version(s) for s in sorted(requirement.specifier, key=str)]
+        if len(specs) == 0:
+            specs = [('>=', '0.0.0')]
+        elif len(specs) > 1:
+            specs = [specs]
+
+        # pip reports names the way pkg_resources.safe_name() does
+        return Dependency(re.sub('[^A-Za-z0-9.]+', '-', requirement.name), specs)
 
     def parse(self, specs):
         """Parse specs."""
@@ -503,19 +774,17 @@ class NpmDependencyParser(DependencyParser):
         if spec == 'latest':
             specs = '*'
         else:
-            specs = check_output(['/usr/bin/semver-ranger', spec], universal_newlines=True).strip()
-            if specs == 'null':
+            specs = valid_range(spec)
+            if specs is None:
                 logger.info("invalid version specification for %s = %s", name, spec)
                 return None
 
         ret = []
         for s in specs.split('||'):
             if ' ' in s:
-                spaced = s.split(' ')
-                assert len(spaced) == 2
-                left, right = spaced
-                ret.append([self._parse_npm_tokens(left), self._parse_npm_tokens(right)])
-            elif s == '*':
+                ret.append([self._parse_npm_tokens(t) for t in s.split()])
+            elif s in ('*', ''):
+                # empty set of comparators, e.g. '1.x || *' -> '>=1.0.0 <2.0.0||'
                 ret.append(('>=', '0.0.0'))
             else:
                 ret.append(self._parse_npm_tokens(s))
@@ -570,9 +839,9 @@ class NpmDependencyParser(DependencyParser):
             specs = []
             for operator, versions in version_spec_dict.items():
                 if operator in ['>', '>=']:  # select highest version
-                    version = sorted(versions, key=cmp_to_key(compare_version))[-1]
+                    version = sort_versions(versions)[-1]
                 elif operator in ['<', '<=']:  # select lowest version
-                    version = sorted(versions, key=cmp_to_key(compare_version))[0]
+                    version = sort_versions(versions)[0]
                 specs.append((operator, version))
             # dict back to list
             result.append(Dependency(name, specs))
@@ -699,12 +968,20 @@ class GolangDependencyParser(DependencyParser):
 class Solver(object):
     """Base class for resolving dependencies."""
 
-    def __init__(self, ecosystem, dep_parser=None, fetcher=None, highest_dependency_version=True):
-        """Initialize instance."""
+    def __init__(self, ecosystem, dep_parser=None, fetcher=None, highest_dependency_version=True,
+                 max_workers=None):
+        """Initialize instance.
+
+        :param max_workers: int, maximum number of releases fetched concurrently,
+                            defaults to configured value for the ecosystem backend
+        """
         self.ecosystem = ecosystem
         self._dependency_parser = dep_parser
         self._release_fetcher = fetcher
         self._highest_dependency_version = highest_dependency_version
+        if max_workers is None:
+            max_workers = configuration.solver_max_workers(ecosystem.backend)
+        self._max_workers = max_workers
 
     @property
     def dependency_parser(self):
@@ -716,47 +993,106 @@ class Solver(object):
         """Return ReleasesFetcher instance used by this solver."""
         return self._release_fetcher
 
+    @property
+    def max_workers(self):
+        """Return maximum number of releases fetched concurrently."""
+        return self._max_workers
+
+    def _use_concurrency(self, count):
+        """Check whether releases for `count` dependencies should be fetched concurrently."""
+        return self._max_workers > 1 and count > 1 and self.release_fetcher.thread_safe
+
     def solve(self, dependencies, graceful=True, all_versions=False):
         """Solve `dependencies` against upstream repository.
 
+        Releases of all distinct dependencies are fetched concurrently (up to `max_workers`
+        at once) if the release fetcher allows it.
+
         :param dependencies: List, List of dependencies in native format
         :param graceful: bool, Print info output to stdout
         :param all_versions: bool, Return all matched versions instead of the latest
         :return: Dict[str, str], Matched versions
         """
         solved = {}
-        for dep in self.dependency_parser.parse(dependencies):
-            logger.debug("Fetching releases for: {}".format(dep))
+        dependencies = self.dependency_parser.parse(dependencies)
+
+        executor = None
+        futures = {}
+        if self._use_concurrency(len(dependencies)):
+            executor = ThreadPoolExecutor(max_workers=min(self._max_workers, len(dependencies)))
+            fetch_releases = propagate(self.release_fetcher.fetch_releases)
+            for dep in dependencies:
+                if dep.name not in futures:
+                    logger.debug("Fetching releases for: {}".format(dep))
+                    futures[dep.name] = executor.submit(fetch_releases, dep.name)
+
+        try:
+            for dep in dependencies:
+                self._solve_dependency(dep, futures.get(dep.name), solved, graceful, all_versions)
+        finally:
+            if executor is not None:
+                for future in futures.values():
+                    future.cancel()
+                executor.shutdown()
+
+        return solved
 
+    def prefetch(self, dependencies):
+        """Fetch releases for all `dependencies` concurrently, so they get cached.
+
+        This is meant for callers that resolve dependencies one by one later on. Failures
+        are ignored here, they are reported when the dependency is actually resolved.
+
+        :param dependencies: List, List of dependencies in native format
+        """
+        if not isinstance(self.release_fetcher, CachedReleasesFetcher) or \
+                not self._use_concurrency(len(dependencies)):
+            return
+
+        def _prefetch(spec):
+            try:
+                for dep in self.dependency_parser.parse([spec]):
+                    self.release_fetcher.fetch_releases(dep.name)
+            except Exception as exc:
+                logger.debug("Unable to prefetch releases for %r: %s", spec, str(exc))
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(dependencies))) as e:
+            list(e.map(propagate(_prefetch), dependencies))
+
+    def _solve_dependency(self, dep, future, solved, graceful, all_versions):
+        """Resolve a single dependency and store its matching version(s) into `solved`.
+
+        :param future: Future, already submitted fetching of releases, None to fetch them here
+        """
+        if future is not None:
+            name, releases = future.result()
+        else:
+            logger.debug("Fetching releases for: {}".format(dep))
             name, releases = self.release_fetcher.fetch_releases(dep.name)
 
-            if name in solved:
-                raise SolverException("Dependency: {} is listed multiple times".format(name))
+        if name in solved:
+            raise SolverException("Dependency: {} is listed multiple times".format(name))
 
-            if not releases:
-                if graceful:
-                    logger.info("No releases found for: %s", dep.name)
-                else:
-                    raise SolverException("No releases found for: {}".format(dep.name))
+        if not releases:
+            if graceful:
+                logger.info("No releases found for: %s", dep.name)
+            else:
+                raise SolverException("No releases found for: {}".format(dep.name))
 
-            matching = sorted([release
-                               for release in releases
-                               if release in dep], key=cmp_to_key(compare_version))
+        matching = ReleasesMatcher(releases).match(dep)
 
-            logger.debug("  matching:\n   {}".format(matching))
+        logger.debug("  matching:\n   {}".format(matching))
 
-            if all_versions:
-                solved[name] = matching
+        if all_versions:
+            solved[name] = matching
+        else:
+            if not matching:
+                solved[name] = None
             else:
-                if not matching:
-                    solved[name] = None
+                if self._highest_dependency_version:
+                    solved[name] = matching[-1]
                 else:
-                    if self._highest_dependency_version:
-                        solved[name] = matching[-1]
-                    else:
-                        solved[name] = matching[0]
-
-        return solved
+                    solved[name] = matching[0]
 
 
 class PypiSolver(Solver):
@@ -816,6 +1152,12 @@ class GolangSolver(Solver):
                                            parser or GolangDependencyParser(),
                                            fetcher or GolangReleasesFetcher(ecosystem))
 
+    def prefetch(self, dependencies):
+        """Prefetch releases of dependencies without version, versions of others are not fetched."""
+        parsed = self.dependency_parser.parse(dependencies)
+        super(GolangSolver, self).prefetch(
+            [spec for spec, dependency in zip(dependencies, parsed) if not dependency.spec])
+
     def solve(self, dependencies):
         """Solve `dependencies` against upstream repository."""
         result = {}
@@ -828,14 +1170,335 @@ class GolangSolver(Solver):
         return result
 
 
+class _MavenItem(object):
+    """Base class for items of a parsed Maven version, see MavenVersion."""
+
+    __slots__ = ()
+
+    def is_null(self):
+        """Check whether the item is equivalent to a missing item."""
+        raise NotImplementedError
+
+    def compare(self, other):
+        """Compare with other item, `other` is None if the item is missing on the other side."""
+        raise NotImplementedError
+
+
+class _MavenIntItem(_MavenItem):
+    """Numeric item of a Maven version."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        """Initialize instance."""
+        self.value = int(value)
+
+    def is_null(self):
+        """Check whether the item is equivalent to a missing item."""
+        return self.value == 0
+
+    def compare(self, other):
+        """Compare with other item."""
+        if other is None:
+            return 0 if self.value == 0 else 1
+        if isinstance(other, _MavenIntItem):
+            return (self.value > other.value) - (self.value < other.value)
+        # 1.1 > 1-sp, 1.1 > 1-1
+        return 1
+
+
+class _MavenStringItem(_MavenItem):
+    """Qualifier item of a Maven version."""
+
+    __slots__ = ('value',)
+
+    QUALIFIERS = ['alpha', 'beta', 'milestone', 'rc', 'snapshot', '', 'sp']
+    ALIASES = {'ga': '', 'final': '', 'release': '', 'cr': 'rc'}
+    RELEASE_VERSION_INDEX = str(QUALIFIERS.index(''))
+
+    def __init__(self, value, followed_by_digit):
+        """Initialize instance."""
+        if followed_by_digit and len(value) == 1:
+            # a1 = alpha-1, b1 = beta-1, m1 = milestone-1
+            value = {'a': 'alpha', 'b': 'beta', 'm': 'milestone'}.get(value, value)
+        self.value = self.ALIASES.get(value, value)
+
+    @classmethod
+    def _comparable_qualifier(cls, qualifier):
+        """Make qualifier comparable as a string, unknown qualifiers sort after known ones."""
+        try:
+            return str(cls.QUALIFIERS.index(qualifier))
+        except ValueError:
+            return '{}-{}'.format(len(cls.QUALIFIERS), qualifier)
+
+    def is_null(self):
+        """Check whether the item is equivalent to a missing item."""
+        return self._comparable_qualifier(self.value) == self.RELEASE_VERSION_INDEX
+
+    def compare(self, other):
+        """Compare with other item."""
+        left = self._comparable_qualifier(self.value)
+        if other is None:
+            right = self.RELEASE_VERSION_INDEX
+        elif isinstance(other, _MavenStringItem):
+            right = self._comparable_qualifier(other.value)
+        else:
+            # 1.any < 1.1 and 1.any < 1-1
+            return -1
+        return (left > right) - (left < right)
+
+
+class _MavenListItem(_MavenItem):
+    """Sub-list of a Maven version, started by '-' or by a digit/letter transition."""
+
+    __slots__ = ('items',)
+
+    def __init__(self):
+        """Initialize instance."""
+        self.items = []
+
+    def is_null(self):
+        """Check whether the item is equivalent to a missing item."""
+        return not self.items
+
+    def normalize(self):
+        """Remove trailing null items (0, '', empty lists)."""
+        for i in range(len(self.items) - 1, -1, -1):
+            item = self.items[i]
+            if item.is_null():
+                del self.items[i]
+            elif not isinstance(item, _MavenListItem):
+                break
+
+    def compare(self, other):
+        """Compare with other item."""
+        if other is None:
+            return self.items[0].compare(None) if self.items else 0
+        if isinstance(other, _MavenIntItem):
+            return -1
+        if isinstance(other, _MavenStringItem):
+            return 1
+
+        for i in range(max(len(self.items), len(other.items))):
+            left = self.items[i] if i < len(self.items) else None
+            right = other.items[i] if i < len(other.items) else None
+            if left is None:
+                result = 0 if right is None else -right.compare(left)
+            else:
+                result = left.compare(right)
+            if result != 0:
+                return result
+        return 0
+
+
+class MavenVersion(object):
+    """Maven version ordered the same way as Maven's ComparableVersion does."""
+
+    __slots__ = ('version', '_items')
+
+    def __init__(self, version):
+        """Initialize instance."""
+        self.version = version
+        self._items = self._parse(version.lower())
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def parse(version):
+        """Get (cached) parsed Maven version for version string."""
+        return MavenVersion(version)
+
+    @staticmethod
+    def _parse(version):
+        """Parse version string into a list of items."""
+        def _parse_item(is_digit, buf):
+            return _MavenIntItem(buf) if is_digit else _MavenStringItem(buf, False)
+
+        items = current = _MavenListItem()
+        stack = [current]
+        is_digit = False
+        start = 0
+        for i, c in enumerate(version):
+            if c == '.':
+                current.items.append(_MavenIntItem(0) if i == start
+                                     else _parse_item(is_digit, version[start:i]))
+                start = i + 1
+            elif c == '-':
+                current.items.append(_MavenIntItem(0) if i == start
+                                     else _parse_item(is_digit, version[start:i]))
+                start = i + 1
+                current.items.append(_MavenListItem())
+                current = current.items[-1]
+                stack.append(current)
+            elif '0' <= c <= '9':
+                if not is_digit and i > start:
+                    current.items.append(_MavenStringItem(version[start:i], True))
+                    start = i
+                    current.items.append(_MavenListItem())
+                    current = current.items[-1]
+                    stack.append(current)
+                is_digit = True
+            else:
+                if is_digit and i > start:
+                    current.items.append(_parse_item(True, version[start:i]))
+                    start = i
+                    current.items.append(_MavenListItem())
+                    current = current.items[-1]
+                    stack.append(current)
+                is_digit = False
+
+        if len(version) > start:
+            current.items.append(_parse_item(is_digit, version[start:]))
+
+        while stack:
+            stack.pop().normalize()
+
+        return items
+
+    def _cmp(self, other):
+        return self._items.compare(other._items)
+
+    def __eq__(self, other):
+        """Implement '==' operator."""
+        return self._cmp(other) == 0
+
+    def __lt__(self, other):
+        """Implement '<' operator."""
+        return self._cmp(other) < 0
+
+    def __le__(self, other):
+        """Implement '<=' operator."""
+        return self._cmp(other) <= 0
+
+    def __gt__(self, other):
+        """Implement '>' operator."""
+        return self._cmp(other) > 0
+
+    def __ge__(self, other):
+        """Implement '>=' operator."""
+        return self._cmp(other) >= 0
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Return string representation of this instance."""
+        return "MavenVersion({!r})".format(self.version)
+
+
+class MavenVersionRange(object):
+    """Maven version range, e.g. '[1.0,2.0)' or '(,1.0],[1.2,)'.
+
+    https://maven.apache.org/pom.html#Dependency_Version_Requirement_Specification
+    """
+
+    def __init__(self, spec):
+        """Parse version range the same way as Maven's VersionRange.createFromVersionSpec().
+
+        :param spec: str, version range
+        :raises ValueError: if the version range is invalid
+        """
+        # list of (lower bound, lower inclusive, upper bound, upper inclusive), None is unbounded
+        self.restrictions = []
+        upper_bound = None
+        process = spec.strip()
+        while process.startswith(('[', '(')):
+            index1, index2 = process.find(')'), process.find(']')
+            index = index2
+            if index2 < 0 or 0 <= index1 < index2:
+                index = index1
+            if index < 0:
+                raise ValueError("Unbounded range: {}".format(spec))
+
+            restriction = self._parse_restriction(process[:index + 1])
+            if upper_bound is not None and (restriction[0] is None or
+                                            restriction[0] < upper_bound):
+                raise ValueError("Ranges overlap: {}".format(spec))
+            self.restrictions.append(restriction)
+            upper_bound = restriction[2]
+
+            process = process[index + 1:].strip()
+            if process.startswith(','):
+                process = process[1:].strip()
+
+        if process or not self.restrictions:
+            # soft requirements and mixed specs are not ranges we can resolve
+            raise ValueError("Not a version range: {}".format(spec))
+
+    @staticmethod
+    def _parse_restriction(spec):
+        lower_inclusive = spec.startswith('[')
+        upper_inclusive = spec.endswith(']')
+        process = spec[1:-1].strip()
+        if ',' not in process:
+            if not lower_inclusive or not upper_inclusive:
+                raise ValueError("Single version must be surrounded by []: {}".format(spec))
+            version = MavenVersion.parse(process)
+            return version, True, version, True
+
+        lower, upper = (b.strip() for b in process.split(',', 1))
+        if lower == upper:
+            raise ValueError("Range cannot have identical boundaries: {}".format(spec))
+        lower = MavenVersion.parse(lower) if lower else None
+        upper = MavenVersion.parse(upper) if upper else None
+        if lower is not None and upper is not None and upper < lower:
+            raise ValueError("Range defies version ordering: {}".format(spec))
+        return lower, lower_inclusive, upper, upper_inclusive
+
+    def contains(self, version):
+        """Check whether MavenVersion `version` is in the range."""
+        for lower, lower_inclusive, upper, upper_inclusive in self.restrictions:
+            if lower is not None and (lower > version or (lower == version and
+                                                          not lower_inclusive)):
+                continue
+            if upper is not None and (upper < version or (upper == version and
+                                                          not upper_inclusive)):
+                continue
+            return True
+        return False
+
+    def newest(self, versions):
+        """Select the newest non-snapshot version from `versions` (strings) in the range.
+
+        :return: str or None
+        """
+        candidates = [MavenVersion.parse(v) for v in versions
+                      if not v.upper().endswith('SNAPSHOT')]
+        matching = [v for v in candidates if self.contains(v)]
+        if not matching:
+            return None
+        return max(matching).version
+
+
 class MavenSolver(object):
     """Doesn't inherit from Solver, because we don't use its solve().
 
-    We also don't need a DependencyParser nor a ReleasesFetcher for Maven.
-    'mvn versions:resolve-ranges' does all the dirty work for us.
+    We also don't need a DependencyParser for Maven. Version ranges are resolved
+    in-process against versions listed in maven-metadata.xml, when an ecosystem is given.
+    'mvn versions:resolve-ranges' is used for whatever can't be resolved that way
+    (or for everything, if there's no ecosystem to fetch metadata from).
     Resolves only to one version, so if you need solve(all_versions=True), use MavenManualSolver
     """
 
+    def __init__(self, ecosystem=None, fetcher=None, max_workers=None):
+        """Initialize instance.
+
+        :param ecosystem: Ecosystem, if None, all version ranges are resolved by Maven
+        :param fetcher: ReleasesFetcher, used to obtain versions from maven-metadata.xml
+        :param max_workers: int, maximum number of releases prefetched concurrently,
+                            defaults to configured value for maven
+        """
+        self.ecosystem = ecosystem
+        self._release_fetcher = fetcher
+        if ecosystem is not None and fetcher is None:
+            self._release_fetcher = MavenReleasesFetcher(ecosystem)
+        if max_workers is None:
+            max_workers = configuration.solver_max_workers(EcosystemBackend.maven)
+        self._max_workers = max_workers
+
+    @property
+    def release_fetcher(self):
+        """Return ReleasesFetcher instance used by this solver."""
+        return self._release_fetcher
+
     @staticmethod
     def _generate_pom_xml(to_solve):
         """Create pom.xml with dependencies from to_solve.
@@ -892,6 +1555,50 @@ class MavenSolver(object):
                 MavenSolver._generate_pom_xml(to_solve)
                 return MavenSolver._dependencies_from_pom_xml()
 
+    def _resolve_in_process(self, name, ver_spec):
+        """Resolve version range against versions from maven-metadata.xml.
+
+        :param name: str, "groupId:artifactId"
+        :param ver_spec: str, version range
+        :return: str, resolved version or None if Maven has to resolve the range
+        """
+        if self._release_fetcher is None or '${' in ver_spec:
+            return None
+        try:
+            version_range = MavenVersionRange(ver_spec)
+            _, releases = self._release_fetcher.fetch_releases(name)
+        except ValueError as exc:
+            logger.debug("Falling back to Maven for %s %s: %s", name, ver_spec, exc)
+            return None
+        return version_range.newest(releases or [])
+
+    def prefetch(self, dependencies):
+        """Fetch release lists of version-ranged dependencies concurrently, so they get cached.
+
+        See Solver.prefetch(), solve() then resolves the ranges from the releases cache.
+
+        :param dependencies: List, dependencies in "groupId:artifactId version" format
+        """
+        if not isinstance(self._release_fetcher, CachedReleasesFetcher):
+            return
+        names = set()
+        for dependency in dependencies:
+            name, _, ver_spec = dependency.partition(' ')
+            if self.is_version_range(ver_spec):
+                names.add(name.rstrip(':'))
+        if self._max_workers <= 1 or len(names) <= 1 or not self._release_fetcher.thread_safe:
+            # solve() would fetch the same releases one by one anyway
+            return
+
+        def _prefetch(name):
+            try:
+                self._release_fetcher.fetch_releases(name)
+            except Exception as exc:
+                logger.debug("Unable to prefetch releases of %s: %s", name, exc)
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(names))) as e:
+            list(e.map(propagate(_prefetch), names))
+
     @staticmethod
     def is_version_range(ver_spec):
         """Check whether ver_spec contains version range."""
@@ -909,6 +1616,12 @@ class MavenSolver(object):
             else:
                 to_solve[name] = ver_spec
         result = already_solved.copy()
+        for name, ver_spec in list(to_solve.items()):
+            version = self._resolve_in_process(name.rstrip(':'), ver_spec)
+            if version is not None:
+                result[name.rstrip(':')] = version
+                del to_solve[name]
+        # whatever is left is resolved by a single Maven run
         result.update(self._resolve_versions(to_solve))
         return result
 
@@ -918,14 +1631,15 @@ def get_ecosystem_solver(ecosystem, with_parser=None, with_fetcher=None):
 
     :param ecosystem: Ecosystem
     :param with_parser: DependencyParser instance
-    :param with_fetcher: ReleasesFetcher instance
+    :param with_fetcher: ReleasesFetcher instance, cached fetcher for the ecosystem if not given
     :return: Solver
     """
+    if ecosystem.is_backed_by(EcosystemBackend.maven) and with_parser is None:
+        return MavenSolver(ecosystem, with_fetcher or get_ecosystem_fetcher(ecosystem))
+
+    with_fetcher = with_fetcher or get_ecosystem_fetcher(ecosystem)
     if ecosystem.is_backed_by(EcosystemBackend.maven):
-        if with_parser is None:
-            return MavenSolver()
-        else:
-            return MavenManualSolver(ecosystem, with_parser, with_fetcher)
+        return MavenManualSolver(ecosystem, with_parser, with_fetcher)
     elif ecosystem.is_backed_by(EcosystemBackend.npm):
         return NpmSolver(ecosystem, with_parser, with_fetcher)
     elif ecosystem.is_backed_by(EcosystemBackend.pypi):
@@ -952,3 +1666,26 @@ def get_ecosystem_parser(ecosystem):
         return GolangDependencyParser()
 
     raise ValueError('Unknown ecosystem: {}'.format(ecosystem.name))
+
+
+def get_ecosystem_fetcher(ecosystem, cached=True):
+    """Get ReleasesFetcher subclass instance for particular ecosystem.
+
+    :param ecosystem: Ecosystem
+    :param cached: bool, wrap the fetcher in CachedReleasesFetcher
+    :return: ReleasesFetcher
+    """
+    if ecosystem.is_backed_by(EcosystemBackend.maven):
+        fetcher = MavenReleasesFetcher(ecosystem)
+    elif ecosystem.is_backed_by(EcosystemBackend.npm):
+        fetcher = NpmReleasesFetcher(ecosystem)
+    elif ecosystem.is_backed_by(EcosystemBackend.pypi):
+        fetcher = PypiReleasesFetcher(ecosystem)
+    elif ecosystem.is_backed_by(EcosystemBackend.nuget):
+        fetcher = NugetReleasesFetcher(ecosystem)
+    elif ecosystem.is_backed_by(EcosystemBackend.go):
+        fetcher = GolangReleasesFetcher(ecosystem)
+    else:
+        raise ValueError('Unknown ecosystem: {}'.format(ecosystem.name))
+
+    return CachedReleasesFetcher(fetcher) if cached else fetcher
@@ -8,6 +8,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 from selinon import StoragePool
 
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.enums import EcosystemBackend
 from f8a_worker.models import PackageAnalysis, Ecosystem, Package, PackageWorkerResult
 from f8a_worker.utils import MavenCoordinates
@@ -73,7 +74,8 @@ class PackagePostgres(PostgresBase):
         :param package: str, Package name
         :return: analysis count
         """
-        if Ecosystem.by_name(PostgresBase.session, ecosystem).is_backed_by(EcosystemBackend.maven):
+        if ecosystem_registry.by_name(PostgresBase.session, ecosystem).is_backed_by(
+                EcosystemBackend.maven):
             package = MavenCoordinates.normalize_str(package)
 
         try:
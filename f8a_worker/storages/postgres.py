@@ -6,11 +6,14 @@ import datetime
 import json
 from itertools import chain
 
+from sqlalchemy import tuple_
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 from selinon import StoragePool
 
+from f8a_worker.defaults import configuration
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.enums import EcosystemBackend
 from f8a_worker.models import Analysis, Ecosystem, Package, Version, WorkerResult, APIRequests
 from f8a_worker.models import ComponentAnalysesRequests
@@ -125,7 +128,8 @@ class BayesianPostgres(PostgresBase):
         :param version: str, Package version
         :return: analysis count
         """
-        if Ecosystem.by_name(PostgresBase.session, ecosystem).is_backed_by(EcosystemBackend.maven):
+        if ecosystem_registry.by_name(PostgresBase.session, ecosystem).is_backed_by(
+                EcosystemBackend.maven):
             package = MavenCoordinates.normalize_str(package)
 
         try:
@@ -141,6 +145,46 @@ class BayesianPostgres(PostgresBase):
 
         return count
 
+    @staticmethod
+    def get_analysed_versions(epvs, chunk_size=None):
+        """Get EPVs that were already scheduled for analysis, using one query per chunk.
+
+        :param epvs: iterable of (ecosystem, package, version) tuples
+        :param chunk_size: int, maximum number of EPVs looked up by a single query
+        :return: set of (ecosystem, package, version) tuples from epvs that have an analysis
+        """
+        chunk_size = chunk_size or configuration.POSTGRES_QUERY_BATCH_SIZE
+
+        # maven package names are stored normalized, remember what the caller asked for
+        requested = {}
+        for ecosystem, package, version in epvs:
+            lookup_package = package
+            if ecosystem_registry.by_name(PostgresBase.session, ecosystem).is_backed_by(
+                    EcosystemBackend.maven):
+                lookup_package = MavenCoordinates.normalize_str(package)
+            requested.setdefault((ecosystem, lookup_package, version), set()).add(
+                (ecosystem, package, version))
+
+        lookups = list(requested.keys())
+        analysed = set()
+        for start in range(0, len(lookups), chunk_size):
+            chunk = lookups[start:start + chunk_size]
+            try:
+                found = PostgresBase.session.query(Ecosystem.name, Package.name,
+                                                   Version.identifier).\
+                    select_from(Analysis).\
+                    join(Version).join(Package).join(Ecosystem).\
+                    filter(tuple_(Ecosystem.name, Package.name, Version.identifier).in_(chunk)).\
+                    distinct().all()
+            except SQLAlchemyError:
+                PostgresBase.session.rollback()
+                raise
+
+            for epv in found:
+                analysed.update(requested.get(tuple(epv), ()))
+
+        return analysed
+
     @staticmethod
     def get_finished_task_names(analysis_id):
         """Get name of tasks that finished in Analysis.
@@ -2,17 +2,25 @@
 
 """Base class for PostgreSQL related adapters."""
 
+import logging
 import os
+from datetime import datetime, timedelta
+from threading import Lock
 
 from selinon import DataStorage
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, String, exists, literal, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
+from f8a_worker.defaults import configuration
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.errors import TaskAlreadyExistsError
-from f8a_worker.models import Ecosystem
+from f8a_worker.models import TaskClaim, create_db_engine
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
@@ -20,8 +28,9 @@ Base = declarative_base()
 class PostgresBase(DataStorage):
     """Base class for PostgreSQL related adapters."""
 
-    # Make these class variables and let derived classes share session so we
-    # have only one postgres connection
+    # Make these class variables and let derived classes share one connection pool;
+    # session is a scoped session - each thread transparently gets its own session
+    engine = None
     session = None
     connection_string = None
     encoding = None
@@ -29,6 +38,8 @@ class PostgresBase(DataStorage):
     # Which table should be used for querying in derived classes
     query_table = None
 
+    _connect_lock = Lock()
+
     _CONF_ERROR_MESSAGE = "PostgreSQL configuration mismatch, cannot use same database adapter " \
                           "base for connecting to different PostgreSQL instances"
 
@@ -62,24 +73,45 @@ class PostgresBase(DataStorage):
 
     def connect(self):
         """Establish connection to the databse."""
-        # Keep one connection alive and keep overflow unlimited so we can add
-        # more connections in our jobs service
-        engine = create_engine(
-            self.connection_string,
-            encoding=self.encoding,
-            echo=self.echo,
-            isolation_level="AUTOCOMMIT",
-            pool_size=1,
-            max_overflow=-1
-        )
-        PostgresBase.session = sessionmaker(bind=engine)()
-        Base.metadata.create_all(engine)
+        with PostgresBase._connect_lock:
+            if PostgresBase.session is not None:
+                return
+
+            engine = create_db_engine(
+                self.connection_string,
+                encoding=self.encoding,
+                echo=self.echo,
+                isolation_level="AUTOCOMMIT"
+            )
+            Base.metadata.create_all(engine)
+            PostgresBase.engine = engine
+            PostgresBase.session = scoped_session(sessionmaker(bind=engine))
 
     def disconnect(self):
         """Close connection to the database."""
-        if self.is_connected():
-            PostgresBase.session.close()
-            PostgresBase.session = None
+        with PostgresBase._connect_lock:
+            if self.is_connected():
+                PostgresBase.session.remove()
+                PostgresBase.session = None
+                PostgresBase.engine.dispose()
+                PostgresBase.engine = None
+
+    @staticmethod
+    def release_session():
+        """Close session of the current thread, returning its connection to the pool.
+
+        Threads other than the main task thread should call this once they are done with
+        the database.
+        """
+        if PostgresBase.session is not None:
+            PostgresBase.session.remove()
+
+    @staticmethod
+    def pool_stats():
+        """Get statistics of the connection pool, see MeteredQueuePool.stats()."""
+        if PostgresBase.engine is None:
+            return {}
+        return PostgresBase.engine.pool.stats()
 
     def retrieve(self, flow_name, task_name, task_id):
         """Retrieve the record identified by task_id from the database."""
@@ -114,24 +146,113 @@ class PostgresBase(DataStorage):
     def _create_result_entry(self, node_args, flow_name, task_name, task_id, result):
         raise NotImplementedError()
 
-    def store(self, node_args, flow_name, task_name, task_id, result):
-        """Store the record identified by task_id into the database."""
-        # Sanity checks
+    def claim_task(self, task_id):
+        """Claim task ID before the task is executed, unless it was already claimed.
+
+        SQS guarantees 'deliver at least once', duplicate deliveries of a task are rejected
+        by a single INSERT ... ON CONFLICT statement, which still costs a round-trip before
+        every task. The task can't be claimed once its result is stored (the claim is
+        removed then, see release_task()). An existing claim is taken over if it is older
+        than TASK_CLAIM_TIMEOUT, i.e. if the task run that claimed it died before storing
+        the result.
+
+        :param task_id: str, ID of the task
+        :return: bool, True if the task ID was claimed, False if the task was already
+                 processed or is being processed
+        """
         if not self.is_connected():
             self.connect()
 
-        res = self._create_result_entry(node_args, flow_name, task_name, task_id, result)
+        now = datetime.utcnow()
+        table = TaskClaim.__table__
+        claim = select([literal(task_id, String), literal(now, DateTime)]).\
+            where(~exists().where(self.query_table.worker_id == task_id))
+        stale = table.c.claimed_at < now - timedelta(seconds=configuration.TASK_CLAIM_TIMEOUT)
+        statement = insert(table).from_select(['worker_id', 'claimed_at'], claim).\
+            on_conflict_do_update(index_elements=[table.c.worker_id],
+                                  set_={'claimed_at': now}, where=stale).\
+            returning(table.c.worker_id)
+        try:
+            claimed = PostgresBase.session.execute(statement).first() is not None
+            PostgresBase.session.commit()
+        except SQLAlchemyError:
+            PostgresBase.session.rollback()
+            raise
+
+        return claimed
+
+    @staticmethod
+    def release_task(task_id):
+        """Remove claim of task ID once its result is stored or so that a retry can run.
+
+        Claims older than TASK_CLAIM_TIMEOUT are removed as well, they could be taken over
+        anyway, so the table holds claims of running tasks only.
+
+        :param task_id: str, ID of the task
+        """
+        table = TaskClaim.__table__
+        stale = table.c.claimed_at < \
+            datetime.utcnow() - timedelta(seconds=configuration.TASK_CLAIM_TIMEOUT)
         try:
-            PostgresBase.session.add(res)
+            PostgresBase.session.execute(table.delete().where((table.c.worker_id == task_id) |
+                                                              stale))
+            PostgresBase.session.commit()
+        except SQLAlchemyError:
+            PostgresBase.session.rollback()
+            # the claim can be taken over once it's older than TASK_CLAIM_TIMEOUT
+            logger.exception("failed to release claim of task '%s'", task_id)
+
+    @staticmethod
+    def _insert_result_entry(entry):
+        """Insert result entry, unless there already is a result with the same worker_id.
+
+        The unique index on worker_id guarantees that a result of a task is stored only
+        once - a duplicate insert is a no-op instead of an error and a rollback.
+
+        :param entry: result entry created by _create_result_entry()
+        :return: bool, True if there is a result entry with the worker_id in the database
+        """
+        table = entry.__table__
+        values = {column.name: getattr(entry, column.key) for column in table.columns
+                  if getattr(entry, column.key) is not None}
+        statement = insert(table).values(**values).\
+            on_conflict_do_nothing(index_elements=[table.c.worker_id]).\
+            returning(table.c.id)
+        try:
+            inserted = PostgresBase.session.execute(statement).first() is not None
             PostgresBase.session.commit()
         except IntegrityError:
-            # the result has been already stored before the error occurred
-            # hence there is no reason to re-raise
+            # e.g. the analysis was not committed due to an error in the init task
             PostgresBase.session.rollback()
+            logger.warning("result of %s with worker_id '%s' violates integrity constraints",
+                           entry.worker, entry.worker_id, exc_info=True)
+            return False
         except SQLAlchemyError:
             PostgresBase.session.rollback()
             raise
 
+        if not inserted:
+            logger.warning("result of %s with worker_id '%s' is already stored, "
+                           "the task was probably delivered more than once",
+                           entry.worker, entry.worker_id)
+        return True
+
+    def store(self, node_args, flow_name, task_name, task_id, result):
+        """Store the record identified by task_id into the database."""
+        # Sanity checks
+        if not self.is_connected():
+            self.connect()
+
+        res = self._create_result_entry(node_args, flow_name, task_name, task_id, result)
+        try:
+            # the result might have been already stored before an error occurred,
+            #  hence there is no reason to raise if it exists
+            self._insert_result_entry(res)
+        finally:
+            # either the stored result rejects duplicates from now on, or nothing was stored
+            #  and a retry of the task should run instead of being rejected as a duplicate
+            self.release_task(task_id)
+
     def store_error(self, node_args, flow_name, task_name, task_id, exc_info, result=None):
         """Store error info to the Postgres database.
 
@@ -143,10 +264,15 @@ class PostgresBase(DataStorage):
         remove weird-looking errors like (un-committed changes due to errors
         in init task):
           DETAIL: Key (package_analysis_id)=(1113452) is not present in table "package_analyses".
+
+        Integrity errors of the entry are logged and not raised, not to mask the error
+        of the task.
+
+        :return: bool, True if there is an error entry for task_id in the database
         """
         if task_name in ('InitPackageFlow', 'InitAnalysisFlow')\
                 or issubclass(exc_info[0], TaskAlreadyExistsError):
-            return
+            return False
 
         # Sanity checks
         if not self.is_connected():
@@ -154,23 +280,18 @@ class PostgresBase(DataStorage):
 
         res = self._create_result_entry(node_args, flow_name, task_name, task_id, result=result,
                                         error=True)
-        try:
-            PostgresBase.session.add(res)
-            PostgresBase.session.commit()
-        except IntegrityError:
-            # the result has been already stored before the error occurred
-            # hence there is no reason to re-raise
-            PostgresBase.session.rollback()
-        except SQLAlchemyError:
-            PostgresBase.session.rollback()
-            raise
+        stored = self._insert_result_entry(res)
+        if stored:
+            # the error entry rejects duplicates, BaseTask releases the claim otherwise
+            self.release_task(task_id)
+        return stored
 
     def get_ecosystem(self, name):
         """Get ecosystem by name."""
         if not self.is_connected():
             self.connect()
 
-        return Ecosystem.by_name(PostgresBase.session, name)
+        return ecosystem_registry.by_name(PostgresBase.session, name)
 
     @staticmethod
     def is_real_task_result(task_result):
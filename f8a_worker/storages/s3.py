@@ -5,11 +5,13 @@
 import os
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 import boto3
 import botocore
 from selinon import DataStorage
 from selinon import StoragePool
 from f8a_worker.defaults import configuration
+from f8a_worker.task_metrics import propagate
 
 
 class AmazonS3(DataStorage):
@@ -184,11 +186,15 @@ class AmazonS3(DataStorage):
         :return: object version or None if versioning is off
         """
         self._create_bucket_if_needed()
-        put_kwargs = {'Body': blob}
+        return self._put_object(blob, object_key)
+
+    def _put_object(self, blob, object_key):
+        """Upload blob using S3 client, which (unlike S3 resource) can be shared by threads."""
+        put_kwargs = {'Bucket': self.bucket_name, 'Key': object_key, 'Body': blob}
         if self.encryption:
             put_kwargs['ServerSideEncryption'] = self.encryption
 
-        response = self._s3.Object(self.bucket_name, object_key).put(**put_kwargs)
+        response = self._s3.meta.client.put_object(**put_kwargs)
 
         if 'VersionId' not in response and configuration.is_local_deployment() and self.versioned:
             # If we run local deployment, our local S3 alternative does not
@@ -207,6 +213,26 @@ class AmazonS3(DataStorage):
         blob = self.dict2blob(dictionary)
         return self.store_blob(blob, object_key)
 
+    def store_dicts(self, dictionaries, max_workers=None):
+        """Store several dictionaries as JSON on S3, serializing and uploading them in parallel.
+
+        :param dictionaries: dict, object key -> dictionary to be stored
+        :param max_workers: int, maximum number of concurrent uploads
+        :return: dict, object key -> object version or None if versioning is off
+        """
+        if not dictionaries:
+            return {}
+
+        self._create_bucket_if_needed()
+        max_workers = min(max_workers or configuration.S3_UPLOAD_MAX_WORKERS, len(dictionaries))
+
+        def _put_dict(item):
+            object_key, dictionary = item
+            return object_key, self._put_object(self.dict2blob(dictionary), object_key)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(executor.map(propagate(_put_dict), dictionaries.items()))
+
     def retrieve_file(self, object_key, file_path):
         """Download an S3 object to a file."""
         self._s3.Object(self.bucket_name, object_key).download_file(file_path)
@@ -235,6 +261,18 @@ class AmazonS3(DataStorage):
 
         return self._s3.Object(self.bucket_name, object_key).version_id
 
+    def retrieve_content_version(self, object_key):
+        """Retrieve identifier of the current content of the given object, does only HEAD request.
+
+        :param object_key: key under which the object is stored
+        :return: version identifier, or ETag if the bucket is not versioned
+        """
+        s3_object = self._s3.Object(self.bucket_name, object_key)
+        s3_object.load()
+        if s3_object.version_id and s3_object.version_id != 'null':
+            return s3_object.version_id
+        return s3_object.e_tag.strip('"')
+
     @staticmethod
     def is_enabled():
         """:return: True if S3 sync is enabled, False otherwise."""
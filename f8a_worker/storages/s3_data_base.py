@@ -93,3 +93,16 @@ class S3DataBase(AmazonS3):
         """
         object_key = self._construct_task_result_object_key(arguments, task_name)
         return self.store_dict(task_result, object_key)
+
+    def store_task_results(self, arguments, task_results):
+        """Store results of several tasks on S3 in parallel.
+
+        :param arguments: flow arguments
+        :param task_results: dict, task name -> task result
+        :return: dict, task name -> object version identifier
+        """
+        object_keys = {task_name: self._construct_task_result_object_key(arguments, task_name)
+                       for task_name in task_results}
+        versions = self.store_dicts({object_keys[task_name]: task_result
+                                     for task_name, task_result in task_results.items()})
+        return {task_name: versions[object_key] for task_name, object_key in object_keys.items()}
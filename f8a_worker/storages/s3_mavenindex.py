@@ -38,7 +38,9 @@ class S3MavenIndex(AmazonS3):
                 archive_path = os.path.join(temp_dir, self._INDEX_ARCHIVE)
                 central_index_dir = os.path.join(target_dir, self._INDEX_DIRNAME)
                 self.retrieve_file(self._INDEX_ARCHIVE, archive_path)
-                Archive.extract_zip(archive_path, central_index_dir, mkdest=True)
+                # the index is our own data and it's larger than limits of artifacts
+                Archive.extract_zip(archive_path, central_index_dir, mkdest=True,
+                                    max_size=0, max_entries=0)
                 return True
 
         return False
@@ -0,0 +1,398 @@
+"""Per-task timing and resource instrumentation.
+
+BaseTask.run() collects metrics for every task it runs: durations of named phases
+(spans), bytes transferred and resource usage of external commands. Code called by a
+task reports into the metrics of the task running in the current thread:
+
+    from f8a_worker.task_metrics import span, timed
+
+    with span('mercator'):
+        ...
+
+    @timed('extract')
+    def extract(...):
+        ...
+
+Functions run in thread pools on behalf of a task are wrapped with propagate().
+
+The summary is attached to the task result under `_audit` and handed to exporters
+(StatsD, Prometheus text endpoint). Metrics are disabled unless TASK_METRICS is set,
+in which case span() returns a shared no-op context manager.
+"""
+
+import logging
+import socket
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os import path as os_path
+from time import monotonic
+
+from f8a_worker.defaults import configuration
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class _NullSpan(object):
+    """Context manager doing nothing, used when metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    """Context manager adding its duration to a phase of task metrics."""
+
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.add_time(self._name, monotonic() - self._start)
+        return False
+
+
+def record_command(commands, command, resources):
+    """Add resources used by an external command to per-tool statistics, not thread safe.
+
+    :param commands: dict, tool -> dict with runs, wall_time, cpu_time and max_rss
+    :param command: list, command arguments, the tool is identified by the first one
+    :param resources: f8a_worker.utils.CommandResources
+    """
+    tool = os_path.basename(command[0]) if command else ''
+    stats = commands.setdefault(tool, {'runs': 0, 'wall_time': 0.0, 'cpu_time': 0.0, 'max_rss': 0})
+    stats['runs'] += 1
+    stats['wall_time'] += resources.wall_time
+    if resources.cpu_time is not None:
+        stats['cpu_time'] += resources.cpu_time
+    if resources.max_rss is not None:
+        stats['max_rss'] = max(stats['max_rss'], resources.max_rss)
+
+
+class TaskMetrics(object):
+    """Metrics collected while a single task is running."""
+
+    enabled = True
+
+    def __init__(self, task_name):
+        """Initialize metrics.
+
+        :param task_name: str, name of the task
+        """
+        self.task_name = task_name
+        self.phases = OrderedDict()
+        self.bytes = {}
+        self.commands = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """Measure duration of the with block as phase `name`."""
+        return _Span(self, name)
+
+    def add_time(self, name, seconds):
+        """Add time spent in phase `name`.
+
+        :param name: str, name of the phase
+        :param seconds: float, duration of the phase
+        """
+        with self._lock:
+            phase = self.phases.setdefault(name, {'count': 0, 'time': 0.0})
+            phase['count'] += 1
+            phase['time'] += seconds
+
+    def add_bytes(self, name, count):
+        """Add number of bytes transferred.
+
+        :param name: str, what was transferred, e.g. 's3_download'
+        :param count: int, number of bytes
+        """
+        with self._lock:
+            self.bytes[name] = self.bytes.get(name, 0) + count
+
+    def add_command(self, command, resources):
+        """Add resources used by an external command.
+
+        :param command: list, command arguments, the tool is identified by the first one
+        :param resources: f8a_worker.utils.CommandResources
+        """
+        with self._lock:
+            record_command(self.commands, command, resources)
+
+    def summary(self):
+        """Get collected metrics as a JSON serializable dict."""
+        with self._lock:
+            return {
+                'phases': {name: {'count': phase['count'], 'time': round(phase['time'], 6)}
+                           for name, phase in self.phases.items()},
+                'bytes': dict(self.bytes),
+                'commands': {tool: dict(stats) for tool, stats in self.commands.items()}
+            }
+
+
+class _DisabledMetrics(object):
+    """Stand-in for TaskMetrics discarding everything."""
+
+    enabled = False
+
+    def span(self, _name):
+        return _NULL_SPAN
+
+    def add_time(self, _name, _seconds):
+        pass
+
+    def add_bytes(self, _name, _count):
+        pass
+
+    def add_command(self, _command, _resources):
+        pass
+
+
+_DISABLED = _DisabledMetrics()
+
+
+def current_metrics():
+    """Get metrics of the task running in this thread, a no-op stand-in if there is none."""
+    return getattr(_local, 'metrics', _DISABLED)
+
+
+def propagate(func):
+    """Bind `func` to metrics of the task running in this thread.
+
+    Metrics are kept per thread, wrap functions handed to thread pools so that what
+    they measure is reported to the task that submitted them:
+
+        executor.map(propagate(fetch), urls)
+
+    :param func: callable to run in another thread
+    :return: callable running `func` with metrics of the current task
+    """
+    metrics = current_metrics()
+    if not metrics.enabled:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_local, 'metrics', _DISABLED)
+        _local.metrics = metrics
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.metrics = previous
+
+    return wrapper
+
+
+def span(name):
+    """Measure duration of the with block as phase `name` of the current task."""
+    return current_metrics().span(name)
+
+
+def timed(name=None):
+    """Decorate function so that its calls are measured as phase `name` of the current task.
+
+    :param name: str, name of the phase, defaults to the function name
+    """
+    def decorator(func):
+        phase = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with current_metrics().span(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+
+def add_bytes(name, count):
+    """Add number of bytes transferred by the current task."""
+    current_metrics().add_bytes(name, count)
+
+
+def add_command(command, resources):
+    """Add resources used by an external command run by the current task."""
+    current_metrics().add_command(command, resources)
+
+
+class StatsdExporter(object):
+    """Send task metrics to StatsD over UDP."""
+
+    def __init__(self, host, port=8125, prefix='f8a_worker'):
+        """Initialize exporter.
+
+        :param host: str, StatsD host
+        :param port: int, StatsD port
+        :param prefix: str, prefix of metric names
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def lines(self, task_name, summary, duration, failed):
+        """Format summary as StatsD lines."""
+        prefix = '{p}.{t}'.format(p=self.prefix, t=task_name)
+        lines = ['{p}.duration:{d:.3f}|ms'.format(p=prefix, d=duration * 1000),
+                 '{p}.{s}:1|c'.format(p=prefix, s='failed' if failed else 'succeeded')]
+        for phase, stats in summary['phases'].items():
+            lines.append('{p}.phase.{n}:{d:.3f}|ms'.format(p=prefix, n=phase,
+                                                           d=stats['time'] * 1000))
+        for name, count in summary['bytes'].items():
+            lines.append('{p}.bytes.{n}:{c}|c'.format(p=prefix, n=name, c=count))
+        for tool, stats in summary['commands'].items():
+            lines.append('{p}.command.{n}.cpu_time:{d:.3f}|ms'.format(
+                p=prefix, n=tool, d=stats['cpu_time'] * 1000))
+            lines.append('{p}.command.{n}.max_rss:{r}|g'.format(p=prefix, n=tool,
+                                                                r=stats['max_rss']))
+        return lines
+
+    def export(self, task_name, summary, duration, failed):
+        """Send metrics of a finished task.
+
+        :param task_name: str, name of the task
+        :param summary: dict, TaskMetrics.summary()
+        :param duration: float, task duration in seconds
+        :param failed: bool, whether the task failed
+        """
+        payload = '\n'.join(self.lines(task_name, summary, duration, failed))
+        try:
+            self._socket.sendto(payload.encode('utf-8'), self.address)
+        except OSError as exc:
+            logger.debug("Failed to send metrics to StatsD: %s", exc)
+
+
+class PrometheusExporter(object):
+    """Aggregate task metrics and serve them in Prometheus text format."""
+
+    def __init__(self, port=None):
+        """Initialize exporter.
+
+        :param port: int, port of the HTTP endpoint, the endpoint is not started if not set
+        """
+        self.port = port
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _add(self, metric, labels, value):
+        key = (metric, tuple(sorted(labels.items())))
+        self._series[key] = self._series.get(key, 0) + value
+
+    def export(self, task_name, summary, duration, failed):
+        """Add metrics of a finished task, arguments are the same as for StatsdExporter."""
+        task = {'task': task_name}
+        with self._lock:
+            self._add('f8a_task_runs_total', dict(task, status='failed' if failed else 'ok'), 1)
+            self._add('f8a_task_duration_seconds_sum', task, duration)
+            for phase, stats in summary['phases'].items():
+                self._add('f8a_task_phase_seconds_sum', dict(task, phase=phase), stats['time'])
+                self._add('f8a_task_phase_seconds_count', dict(task, phase=phase),
+                          stats['count'])
+            for name, count in summary['bytes'].items():
+                self._add('f8a_task_bytes_total', dict(task, transfer=name), count)
+            for tool, stats in summary['commands'].items():
+                self._add('f8a_task_command_cpu_seconds_sum', dict(task, command=tool),
+                          stats['cpu_time'])
+        if self.port and self._server is None:
+            self.start()
+
+    def render(self):
+        """Get aggregated metrics in Prometheus text exposition format."""
+        with self._lock:
+            series = list(self._series.items())
+        lines = []
+        for (metric, labels), value in series:
+            labels = ','.join('{k}="{v}"'.format(k=k, v=v) for k, v in labels)
+            lines.append('{m}{{{l}}} {v}'.format(m=metric, l=labels, v=value))
+        return '\n'.join(lines) + '\n'
+
+    def start(self):
+        """Serve metrics over HTTP from a daemon thread."""
+        exporter = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        try:
+            self._server = HTTPServer(('', self.port), _Handler)
+        except OSError as exc:
+            # with prefork workers only one process in the pod gets the port
+            logger.warning("Cannot serve task metrics on port %d: %s", self.port, exc)
+            self._server = False
+            return
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+
+_exporters = None
+
+
+def get_exporters():
+    """Get exporters configured by TASK_METRICS_* environment variables."""
+    global _exporters
+    if _exporters is None:
+        exporters = []
+        if configuration.TASK_METRICS_STATSD_HOST:
+            exporters.append(StatsdExporter(configuration.TASK_METRICS_STATSD_HOST,
+                                            configuration.TASK_METRICS_STATSD_PORT))
+        if configuration.TASK_METRICS_PROMETHEUS_PORT:
+            exporters.append(PrometheusExporter(configuration.TASK_METRICS_PROMETHEUS_PORT))
+        _exporters = exporters
+    return _exporters
+
+
+@contextmanager
+def collect_task_metrics(task_name, enabled=None):
+    """Collect metrics of task running in the with block in the current thread.
+
+    Yields TaskMetrics, or a no-op stand-in if metrics are disabled. Metrics are
+    exported once the block is left.
+
+    :param task_name: str, name of the task
+    :param enabled: bool, collect metrics, TASK_METRICS configuration is used if None
+    """
+    if not (configuration.TASK_METRICS if enabled is None else enabled):
+        yield _DISABLED
+        return
+
+    metrics = TaskMetrics(task_name)
+    previous = getattr(_local, 'metrics', None)
+    _local.metrics = metrics
+    start = monotonic()
+    failed = True
+    try:
+        yield metrics
+        failed = False
+    finally:
+        _local.metrics = previous if previous is not None else _DISABLED
+        duration = monotonic() - start
+        summary = metrics.summary()
+        for exporter in get_exporters():
+            try:
+                exporter.export(task_name, summary, duration, failed)
+            except Exception:
+                logger.exception("Failed to export metrics of task %s", task_name)
@@ -2,27 +2,34 @@
 
 import datetime
 import getpass
+import hashlib
 import json
 import logging
 import signal
 import re
 from contextlib import contextmanager
-from os import path as os_path, walk, getcwd, chdir, environ as os_environ, killpg, getpgid
+from collections import namedtuple
+from os import path as os_path, walk, getcwd, chdir, environ as os_environ, killpg, wait4
 from queue import Queue, Empty
 from shlex import split
-from subprocess import Popen, PIPE, check_output, CalledProcessError, TimeoutExpired
-from threading import Thread
+from subprocess import Popen, PIPE, CalledProcessError, TimeoutExpired
+from tempfile import TemporaryFile
+from threading import Lock, Thread
+from time import monotonic
 from traceback import format_exc
 from urllib.parse import unquote, urlparse, parse_qs
 import tenacity
 
-import requests
-from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
-from requests.packages.urllib3.util.retry import Retry
 from selinon import StoragePool
+try:
+    import ssdeep
+except ImportError:
+    # python binding of libfuzzy is optional, `ssdeep` command is used if not installed
+    ssdeep = None
 from sqlalchemy.exc import SQLAlchemyError
 
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.enums import EcosystemBackend
 from f8a_worker.errors import (TaskError,
                                NotABugTaskError,
@@ -32,6 +39,8 @@ from f8a_worker.models import (Analysis,
                                Package,
                                Version)
 from f8a_worker.defaults import configuration
+from f8a_worker.http_client import http_client, make_adapter, mount_adapter
+from f8a_worker import task_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +99,233 @@ def assert_not_none(name, value):
         raise ValueError('Parameter %r is None' % name)
 
 
+class _JSONStreamReader(object):
+    """Decoder of JSON values from a text file, keeping only text of the current value in memory."""
+
+    _WHITESPACE = ' \t\n\r'
+    # characters that can continue a number, e.g. '123' followed by '.45' or '1' by 'e5'
+    _NUMBER_TAIL = re.compile(r'[0-9.eE+-]*\Z')
+
+    def __init__(self, fp, chunk_size, max_value_size):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._max_value_size = max_value_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, size):
+        """Append next chunk of input to the not yet decoded text, False at the end of input."""
+        if self._eof:
+            return False
+        chunk = self._fp.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        if self._max_value_size and len(self._buffer) > self._max_value_size:
+            raise ValueError("JSON value larger than {} characters".format(self._max_value_size))
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character, empty string at the end of input."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more(self._chunk_size):
+                return ''
+
+    def expect(self, characters):
+        """Consume the next character, which has to be one of the given characters."""
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError("Expecting one of {!r}, got {!r}".format(characters, character))
+        self._pos += 1
+        return character
+
+    def decode(self):
+        """Decode the next value."""
+        self.peek()
+        read_size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # a number is complete only if it's followed by a character that can't be
+                #  part of it, a number ending at '123.' or '1e' continues in the next chunk
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self._eof or not (number and self._NUMBER_TAIL.match(self._buffer, end)):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # the value is incomplete, read more; grow reads to avoid quadratic re-decoding
+            self._read_more(read_size)
+            read_size *= 2
+
+    def iter_array(self):
+        """Decode items of the next value, which has to be an array, one by one."""
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.expect(',]') == ']':
+                return
+
+
+def load_json_stream(fp, item_handlers=None, chunk_size=65536, max_value_size=None):
+    """Load JSON from text file incrementally.
+
+    Items of top level arrays are decoded one by one, so the raw text held in memory never
+    exceeds the largest single item or other top level value, not the whole document.
+
+    :param fp: text file object
+    :param item_handlers: dict, top level key -> callable called with every item of the array
+                          stored under the key, such arrays are not part of the result
+    :param chunk_size: int, number of characters read at once
+    :param max_value_size: int, maximum size of text of a single value kept in memory,
+                           JSON_STREAM_MAX_VALUE_SIZE by default
+    :return: decoded JSON
+    :raises ValueError: if the input is not valid JSON or a value exceeds max_value_size
+    """
+    item_handlers = item_handlers or {}
+    reader = _JSONStreamReader(fp, chunk_size,
+                               max_value_size or configuration.JSON_STREAM_MAX_VALUE_SIZE)
+    first = reader.peek()
+    if first == '[':
+        result = list(reader.iter_array())
+    elif first != '{':
+        result = reader.decode()
+    else:
+        result = {}
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+        else:
+            while True:
+                key = reader.decode()
+                if not isinstance(key, str):
+                    raise ValueError("Expecting string as object key, got {!r}".format(key))
+                reader.expect(':')
+                if reader.peek() != '[':
+                    result[key] = reader.decode()
+                elif key in item_handlers:
+                    for item in reader.iter_array():
+                        item_handlers[key](item)
+                else:
+                    result[key] = list(reader.iter_array())
+                if reader.expect(',}') == '}':
+                    break
+
+    if reader.peek():
+        raise ValueError("Extra data after JSON document")
+    return result
+
+
+CommandResources = namedtuple('CommandResources', ['wall_time', 'cpu_time', 'max_rss'])
+CommandResources.__doc__ = """Resources used by a command: wall/CPU seconds, max RSS in kB."""
+
+
+class CommandStats(object):
+    """Resource usage of external commands run by this process, aggregated per tool."""
+
+    def __init__(self):
+        """Initialize statistics."""
+        self._stats = {}
+        self._lock = Lock()
+
+    def record(self, command, resources):
+        """Record resources used by a finished command.
+
+        :param command: list, command arguments, the tool is identified by the first one
+        :param resources: CommandResources
+        """
+        with self._lock:
+            task_metrics.record_command(self._stats, command, resources)
+
+    def snapshot(self):
+        """Get copy of statistics, tool -> dict with runs, wall_time, cpu_time and max_rss."""
+        with self._lock:
+            return {tool: dict(stats) for tool, stats in self._stats.items()}
+
+    def reset(self):
+        """Drop all recorded statistics."""
+        with self._lock:
+            self._stats.clear()
+
+
+# Shared by everything in the worker process
+command_stats = CommandStats()
+
+
+class _AccountedPopen(Popen):
+    """Popen collecting resource usage of the child when it's waited for."""
+
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        # same as Popen._try_wait(), but uses wait4() which also reports resource usage
+        #  of the child including its waited-for descendants
+        try:
+            pid, status, rusage = wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = rusage
+        return pid, status
+
+
+def _kill_process_group(process):
+    """Kill process started in a new session together with all its descendants."""
+    try:
+        killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def run_command(command, timeout=None, input=None, **kwargs):
+    """Run command in a new session, killing all its processes if it times out.
+
+    :param command: list, command arguments
+    :param timeout: how long to wait, in seconds, for the command to finish
+    :param input: data sent to stdin of the command
+    :param kwargs: arguments passed to subprocess.Popen
+    :return: tuple (Popen instance, stdout, stderr, bool timed out, CommandResources)
+    """
+    started = monotonic()
+    process = _AccountedPopen(command, start_new_session=True, **kwargs)
+    timed_out = False
+    try:
+        stdout, stderr = process.communicate(input, timeout=timeout)
+    except TimeoutExpired:
+        timed_out = True
+        _kill_process_group(process)
+        stdout, stderr = process.communicate()
+    except BaseException:
+        _kill_process_group(process)
+        process.wait()
+        raise
+
+    rusage = process.rusage
+    resources = CommandResources(
+        wall_time=monotonic() - started,
+        cpu_time=rusage.ru_utime + rusage.ru_stime if rusage else None,
+        max_rss=rusage.ru_maxrss if rusage else None
+    )
+    command_stats.record(command, resources)
+    task_metrics.add_command(command, resources)
+    logger.debug("command %s finished in %.3fs (CPU %ss, max RSS %s kB)", command,
+                 resources.wall_time, resources.cpu_time, resources.max_rss)
+    return process, stdout, stderr, timed_out, resources
+
+
 class TimedCommand(object):
     """Execute arbitrary shell command in a timeout-able manner."""
 
@@ -100,32 +336,33 @@ class TimedCommand(object):
             command = split(command)
 
         self.command = command
+        self.resources = None
 
-    def run(self, timeout=None, is_json=False, **kwargs):
+    def run(self, timeout=None, is_json=False, json_item_handlers=None, **kwargs):
         """Run the self.command and wait up to given time period for results.
 
+        The command is started in a new session, so that it can be killed together with all
+        its subprocesses on timeout. Resources it used are available in self.resources.
+
         :param timeout: how long to wait, in seconds, for the command to finish
         before terminating it
-        :param is_json: hint whether output of the command is a JSON
+        :param is_json: hint whether output of the command is a JSON, the output is then
+        written to a temporary file and parsed incrementally, see load_json_stream()
+        :param json_item_handlers: dict, handlers of items of top level arrays in JSON
+        output, see load_json_stream()
         :return: triplet (return code, stdout, stderr), stdout will be a
         dictionary if `is_json` is True
         """
         logger.debug("running command '%s'; timeout '%s'", self.command, timeout)
 
-        # this gets executed in a separate thread
-        def target(**kwargs):
-            try:
-                self.process = Popen(self.command, universal_newlines=True, **kwargs)
-                self.output, self.error = self.process.communicate()
-                self.status = self.process.returncode
-            except Exception:
-                self.output = {} if is_json else []
-                self.error = format_exc()
-                self.status = -1
-
         # default stdout and stderr
+        json_output = None
         if 'stdout' not in kwargs:
-            kwargs['stdout'] = PIPE
+            if is_json:
+                # don't accumulate possibly huge output in memory, it's parsed from the file
+                json_output = kwargs['stdout'] = TemporaryFile(mode='w+', encoding='utf-8')
+            else:
+                kwargs['stdout'] = PIPE
         if 'stderr' not in kwargs:
             kwargs['stderr'] = PIPE
         if 'update_env' in kwargs:
@@ -133,28 +370,38 @@ class TimedCommand(object):
             kwargs['env'] = dict(os_environ, **kwargs['update_env'])
             kwargs.pop('update_env')
 
-        # thread
-        thread = Thread(target=target, kwargs=kwargs)
-        thread.start()
-        thread.join(timeout)
-
-        # timeout reached, terminate the thread
-        if thread.is_alive():
-            logger.error('Command {cmd} timed out after {t} seconds'.format(cmd=self.command,
-                                                                            t=timeout))
-            # this is tricky - we need to make sure we kill the process with all its subprocesses;
-            #  using just kill might create zombie process waiting for subprocesses to finish
-            #  and leaving us hanging on thread.join()
-            # TODO: we should do the same for get_command_output!
-            killpg(getpgid(self.process.pid), signal.SIGKILL)
-            thread.join()
-            if not self.error:
-                self.error = 'Killed by timeout after {t} seconds'.format(t=timeout)
-        if self.output:
-            if is_json:
-                self.output = json.loads(self.output)
-            else:
-                self.output = [f for f in self.output.split('\n') if f]
+        try:
+            timed_out = False
+            try:
+                self.process, self.output, self.error, timed_out, self.resources = \
+                    run_command(self.command, timeout=timeout, universal_newlines=True, **kwargs)
+                self.status = self.process.returncode
+            except Exception:
+                self.output = {} if is_json else []
+                self.error = format_exc()
+                self.status = -1
+
+            if timed_out:
+                logger.error('Command {cmd} timed out after {t} seconds'.format(cmd=self.command,
+                                                                                t=timeout))
+                if not self.error:
+                    self.error = 'Killed by timeout after {t} seconds'.format(t=timeout)
+
+            if json_output is not None:
+                if self.output is None:
+                    json_output.seek(0)
+                    empty = not json_output.read(1)
+                    json_output.seek(0)
+                    self.output = '' if empty else load_json_stream(json_output,
+                                                                    json_item_handlers)
+            elif self.output:
+                if is_json:
+                    self.output = json.loads(self.output)
+                else:
+                    self.output = [f for f in self.output.split('\n') if f]
+        finally:
+            if json_output is not None:
+                json_output.close()
 
         return self.status, self.output, self.error
 
@@ -165,6 +412,23 @@ class TimedCommand(object):
         return get_command_output(args, graceful, is_json, **kwargs)
 
 
+def _check_output(args, timeout=None, input=None, **kwargs):
+    """Do the same as subprocess.check_output(), but kill all processes of the command on timeout.
+
+    :raises TimeoutExpired: if the command times out
+    :raises CalledProcessError: if the command exits with non-zero status
+    """
+    # Using universal_newlines mostly for the side-effect of decoding
+    # the output as UTF-8 text on Python 3.x
+    process, out, _, timed_out, _ = run_command(args, timeout=timeout, input=input, stdout=PIPE,
+                                                universal_newlines=True, **kwargs)
+    if timed_out:
+        raise TimeoutExpired(args, timeout, output=out)
+    if process.returncode:
+        raise CalledProcessError(process.returncode, args, output=out)
+    return out
+
+
 def get_command_output(args, graceful=True, is_json=False, **kwargs):
     """Improved version of subprocess.check_output.
 
@@ -175,9 +439,7 @@ def get_command_output(args, graceful=True, is_json=False, **kwargs):
     """
     logger.debug("running command %s", args)
     try:
-        # Using universal_newlines mostly for the side-effect of decoding
-        # the output as UTF-8 text on Python 3.x
-        out = check_output(args, universal_newlines=True, **kwargs)
+        out = _check_output(args, **kwargs)
     except (CalledProcessError, TimeoutExpired) as ex:
         # TODO: we may want to use subprocess.Popen to be able to also print stderr here
         #  (while not mixing it with stdout that is returned if the subprocess succeeds)
@@ -300,27 +562,56 @@ class ThreadPool(object):
         self.join()
 
 
+def compute_digests(target, functions=('sha256', 'sha1', 'md5'), fuzzy=False,
+                    chunk_size=1024 * 1024):
+    """Compute several digests of a file while reading it only once.
+
+    The file is read into a single reusable buffer and every chunk is fed to all
+    hash functions; hashlib releases GIL while hashing, so files can be digested
+    in parallel threads.
+
+    :param target: str, file path
+    :param functions: iterable, names of hashlib hash functions
+    :param fuzzy: bool, compute also ssdeep fuzzy hash if the ssdeep library is available
+    :param chunk_size: int, size of the read buffer
+    :return: dict, function name -> hex digest ('ssdeep' -> fuzzy hash)
+    :raises OSError: if the file can't be read
+    """
+    hashes = {function: hashlib.new(function) for function in functions}
+    if fuzzy and ssdeep is not None:
+        hashes['ssdeep'] = ssdeep.Hash()
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(target, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            chunk = view[:size]
+            for function, digest in hashes.items():
+                # the ssdeep binding doesn't accept memoryview
+                digest.update(chunk if function != 'ssdeep' else chunk.tobytes())
+
+    return {function: digest.hexdigest() if function != 'ssdeep' else digest.digest()
+            for function, digest in hashes.items()}
+
+
 def compute_digest(target, function='sha256', raise_on_error=False):
     """Compute digest of a provided file.
 
     :param target: str, file path
-    :param function: str, prefix name of the hashing function
+    :param function: str, name of the hashing function (sha256, sha1, md5 etc.)
     :param raise_on_error: bool, raise an error when computation wasn't successful if set to True
     :returns str or None, computed digest
-
-    `function` requires an executable with matching name on the system (sha256sum, sha1sum etc.)
     """
-    function += 'sum'
-    # returns e.g.:
-    # 65ecde5d025fcf57ceaa32230e2ff884ab204065b86e0e34e609313c7bdc7b47  /etc/passwd
-    data = TimedCommand.get_command_output([function, target], graceful=not raise_on_error)
     try:
-        return data[0].split(' ')[0].strip()
-    except IndexError as exc:
+        return compute_digests(target, functions=(function,))[function]
+    except OSError as exc:
         logger.error("unable to compute digest of %r, likely it doesn't exist or is a directory",
                      target)
         if raise_on_error:
-            raise RuntimeError("can't compute digest of %s" % target) from exc
+            raise TaskError("can't compute digest of %s" % target) from exc
 
 
 class MavenCoordinates(object):
@@ -504,8 +795,8 @@ def case_sensitivity_transform(ecosystem, name):
     :param name: name of ecosystem
     :return: transformed package name base on ecosystem package case sensitivity
     """
-    if Ecosystem.by_name(StoragePool.get_connected_storage('BayesianPostgres').session,
-                         ecosystem).is_backed_by(EcosystemBackend.pypi):
+    if ecosystem_registry.by_name(StoragePool.get_connected_storage('BayesianPostgres').session,
+                                  ecosystem).is_backed_by(EcosystemBackend.pypi):
         return name.lower()
 
     return name
@@ -513,13 +804,14 @@ def case_sensitivity_transform(ecosystem, name):
 
 def get_session_retry(retries=3, backoff_factor=0.2, status_forcelist=(404, 500, 502, 504),
                       session=None):
-    """Set HTTP Adapter with retries to session."""
-    session = session or requests.Session()
-    retry = Retry(total=retries, read=retries, connect=retries,
-                  backoff_factor=backoff_factor, status_forcelist=status_forcelist)
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    return session
+    """Set HTTP Adapter with retries to session.
+
+    If no session is given, the shared pooled session for the retry configuration is returned.
+    """
+    if session is None:
+        return http_client.session(retries=retries, backoff_factor=backoff_factor,
+                                   status_forcelist=status_forcelist, raise_on_status=True)
+    return mount_adapter(session, make_adapter(retries, backoff_factor, status_forcelist))
 
 
 def normalize_package_name(ecosystem_backend, name):
@@ -567,7 +859,7 @@ def get_response(url):
     :return: content of response's json
     """
     try:
-        response = requests.get(url, headers=get_header())
+        response = http_client.get(url, headers=get_header())
         # If status code is 404 or 204 then don't retry
         if response.status_code in [404, 204]:
             return {}
@@ -610,8 +902,8 @@ def get_gh_contributors(url):
     :return:  length of contributor's list
     """
     try:
-        response = requests.get("{}?per_page=1".format(url),
-                                headers=get_header())
+        response = http_client.get("{}?per_page=1".format(url),
+                                   headers=get_header())
         # If status code is 404 or 204 then don't retry
         if response.status_code == 404:
             return -1
@@ -670,7 +962,7 @@ def get_gh_query_response(repo_name, status, type, start_date, end_date, event):
         if status:
             url = '{url}+is:{status}'.format(url=url, status=status)
 
-        response = requests.get(url, headers=get_header())
+        response = http_client.get(url, headers=get_header())
         response.raise_for_status()
         resp = response.json()
         return resp.get('total_count', 0)
@@ -96,6 +96,10 @@ class DependencySnapshotTask(BaseTask):
             self.log.error(str(e))
             raise FatalTaskError from e
 
+        # fetch releases of all dependencies concurrently, so that resolving them one by one
+        #  below is served from the release cache
+        get_ecosystem_solver(ecosystem).prefetch(deps)
+
         resolved_deps = []
         for dep in deps:
             try:
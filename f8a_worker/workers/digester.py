@@ -18,10 +18,13 @@ sample output:
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from f8a_worker.base import BaseTask
+from f8a_worker.defaults import configuration
 from f8a_worker.object_cache import ObjectCache
-from f8a_worker.utils import TimedCommand, compute_digest
+from f8a_worker.utils import TimedCommand, compute_digests, get_all_files_from, skip_git_files
 from f8a_worker.schemas import SchemaRef
+from f8a_worker.task_metrics import propagate
 
 
 class DigesterTask(BaseTask):
@@ -43,12 +46,10 @@ class DigesterTask(BaseTask):
 
     def compute_digests(self, cache_path, f, artifact=False):
         """Compute digests of tarball f."""
-        f_digests = {
-            'sha256': compute_digest(f, 'sha256'),
-            'sha1': compute_digest(f, 'sha1'),
-            'md5': compute_digest(f, 'md5'),
-            'ssdeep': self.compute_ssdeep(f)
-        }
+        f_digests = compute_digests(f, fuzzy=True)
+        if 'ssdeep' not in f_digests:
+            # ssdeep library is not installed
+            f_digests['ssdeep'] = self.compute_ssdeep(f)
 
         if artifact:
             f_digests['artifact'] = True
@@ -58,6 +59,17 @@ class DigesterTask(BaseTask):
 
         return f_digests
 
+    def compute_files_digests(self, cache_path, files):
+        """Compute digests of files found in cache_path in parallel.
+
+        :param cache_path: str, path files are relative to in results
+        :param files: iterable, paths to files
+        :return: list, digests of files, in the same order as files
+        """
+        with ThreadPoolExecutor(max_workers=configuration.DIGESTER_MAX_WORKERS) as executor:
+            compute = propagate(lambda f: self.compute_digests(cache_path, f))
+            return list(executor.map(compute, files))
+
     def execute(self, arguments):
         """Task code.
 
@@ -69,12 +81,13 @@ class DigesterTask(BaseTask):
         self._strict_assert(arguments.get('version'))
 
         epv_cache = ObjectCache.get_from_dict(arguments)
-        # cache_path = epv_cache.get_extracted_source_tarball()
 
         results = []
-        # We don't compute digests of files in extracted tarball, only the tarball itself
-        # for f in get_all_files_from(cache_path, path_filter=skip_git_files):
-        #    results.append(self.compute_digests(cache_path, f))
+        # Digests of files in extracted tarball are computed only if enabled
+        if configuration.DIGESTER_EXTRACTED_FILES:
+            cache_path = epv_cache.get_extracted_source_tarball()
+            files = get_all_files_from(cache_path, path_filter=skip_git_files)
+            results.extend(self.compute_files_digests(cache_path, files))
 
         source_tarball_path = epv_cache.get_source_tarball()
         # Compute digests of tarball and mark it as such
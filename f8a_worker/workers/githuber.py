@@ -2,7 +2,7 @@
 
 from urllib.parse import urljoin
 
-import requests
+from f8a_worker.http_client import http_client
 import datetime
 from collections import OrderedDict
 
@@ -163,7 +163,7 @@ class GitReadmeCollectorTask(BaseTask):
                     extension = '.' + extension
                 url = self._GITHUB_README_PATH.format(project=project, repo=repo,
                                                       extension=extension)
-                response = requests.get(url)
+                response = http_client.get(url)
                 if response.status_code != 200:
                     self.log.debug('No README%s found for type "%s" at "%s"', extension,
                                    readme_type, url)
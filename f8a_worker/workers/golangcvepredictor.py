@@ -8,7 +8,7 @@ sample output:
 from f8a_worker.base import BaseTask
 from f8a_worker.errors import F8AConfigurationException, NotABugTaskError, NotABugFatalTaskError
 from selinon import FatalTaskError
-import requests
+from f8a_worker.http_client import http_client
 from requests import HTTPError
 import urllib
 import time
@@ -33,8 +33,8 @@ class GitIssuesPRsTask(BaseTask):
         """
         try:
             for _ in range(retry_count):
-                response = requests.get(url, headers=headers,
-                                        params={'access_token': self.GITHUB_TOKEN})
+                response = http_client.get(url, headers=headers,
+                                           params={'access_token': self.GITHUB_TOKEN})
                 response.raise_for_status()
                 if response.status_code == 204:
                     # json() below would otherwise fail with JSONDecodeError
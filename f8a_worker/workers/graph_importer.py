@@ -1,10 +1,10 @@
 """Import to graph task."""
 
 from f8a_worker.base import BaseTask
-import requests
+from f8a_worker.http_client import http_client
 from os import environ
 from selinon import StoragePool
-from f8a_worker.models import Ecosystem
+from f8a_worker.ecosystem_registry import ecosystem_registry
 
 
 class GraphImporterTask(BaseTask):
@@ -35,7 +35,8 @@ class GraphImporterTask(BaseTask):
             self._strict_assert(arguments.get('document_id'))
 
         rdb = StoragePool.get_connected_storage('BayesianPostgres')
-        ecosystem_backend = Ecosystem.by_name(rdb.session, arguments.get('ecosystem')).backend.name
+        ecosystem_backend = ecosystem_registry.by_name(rdb.session,
+                                                       arguments.get('ecosystem')).backend.name
         package_list = [
             {
                         'ecosystem': ecosystem_backend,
@@ -62,7 +63,7 @@ class GraphImporterTask(BaseTask):
             endpoint = self._INGEST_API_URL
 
         self.log.info("Invoke graph importer at url: '%s' for %s", endpoint, param)
-        response = requests.post(endpoint, json=param)
+        response = http_client.post(endpoint, json=param)
 
         if response.status_code != 200:
             raise RuntimeError("Failed to invoke graph import at '%s' for %s" % (endpoint, param))
@@ -10,8 +10,9 @@ from tempfile import mkdtemp
 
 from f8a_worker.object_cache import ObjectCache
 from f8a_worker.base import BaseTask
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.process import IndianaJones, MavenCoordinates
-from f8a_worker.models import Analysis, EcosystemBackend, Ecosystem, Version, Package
+from f8a_worker.models import Analysis, EcosystemBackend, Version, Package
 from f8a_worker.utils import normalize_package_name
 from f8a_utils.versions import is_pkg_public
 from f8a_worker.errors import NotABugFatalTaskError
@@ -37,7 +38,8 @@ class InitAnalysisFlow(BaseTask):
 
         db = self.storage.session
         try:
-            ecosystem = Ecosystem.by_name(db, arguments['ecosystem'])
+            # the registry honours REGISTRY_MIRROR_URL in fetch URLs of ecosystems
+            ecosystem = ecosystem_registry.by_name(db, arguments['ecosystem'])
         except NoResultFound:
             raise FatalTaskError('Unknown ecosystem: %r' % arguments['ecosystem'])
 
@@ -70,16 +72,17 @@ class InitAnalysisFlow(BaseTask):
 
         cache_path = mkdtemp(dir=self.configuration.WORKER_DATA_DIR)
         epv_cache = ObjectCache.get_from_dict(arguments)
-        npm_dir = self.configuration.NPM_DATA_DIR
 
         try:
             if not epv_cache.\
                     has_source_tarball():
+                # only the archive is uploaded, the extracted tree is thrown away
                 _, source_tarball_path = IndianaJones.fetch_artifact(
                     ecosystem=ecosystem,
                     artifact=arguments['name'],
                     version=arguments['version'],
-                    target_dir=cache_path
+                    target_dir=cache_path,
+                    manifests_only=True
                 )
                 epv_cache.put_source_tarball(source_tarball_path)
 
@@ -103,8 +106,6 @@ class InitAnalysisFlow(BaseTask):
         finally:
             # always clean up cache
             shutil.rmtree(cache_path)
-            if arguments['ecosystem'] == "npm":
-                shutil.rmtree(npm_dir, True)
 
         a = Analysis(version=v, access_count=1, started_at=datetime.datetime.utcnow())
         db.add(a)
@@ -133,7 +134,8 @@ class InitAnalysisFlow(BaseTask):
                         ecosystem=ecosystem,
                         artifact=artifact_coords.to_str(omit_version=True),
                         version=arguments['version'],
-                        target_dir=target
+                        target_dir=target,
+                        manifests_only=True
                     )
                 except Exception:
                     if sources_classifier == sources_classifiers[-1]:
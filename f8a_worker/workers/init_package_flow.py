@@ -7,7 +7,8 @@ from f8a_utils.versions import is_pkg_public
 from f8a_worker.errors import NotABugFatalTaskError
 
 from f8a_worker.base import BaseTask
-from f8a_worker.models import Ecosystem, Package, Upstream, PackageAnalysis
+from f8a_worker.ecosystem_registry import ecosystem_registry
+from f8a_worker.models import Package, Upstream, PackageAnalysis
 from urllib.parse import urlparse
 import logging
 
@@ -118,7 +119,7 @@ class InitPackageFlow(BaseTask):
 
         db = self.storage.session
         try:
-            ecosystem = Ecosystem.by_name(db, arguments['ecosystem'])
+            ecosystem = ecosystem_registry.by_name(db, arguments['ecosystem'])
         except NoResultFound:
             raise FatalTaskError('Unknown ecosystem: %r' % arguments['ecosystem'])
 
@@ -6,7 +6,7 @@ from urllib.parse import quote
 from selinon import StoragePool
 
 from f8a_worker.base import BaseTask
-from f8a_worker.models import Ecosystem
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.utils import get_response
 from f8a_worker.schemas import SchemaRef
 
@@ -47,7 +47,7 @@ class LibrariesIoTask(BaseTask):
             name = quote(name, safe='')
 
         project_url = self.configuration.libraries_io_project_url(
-            Ecosystem.by_name(rdb_session, ecosystem), name)
+            ecosystem_registry.by_name(rdb_session, ecosystem), name)
         project = get_response(project_url)
         versions = project['versions']
         details = {'dependent_repositories': {'count': project['dependent_repos_count']},
@@ -3,7 +3,7 @@
 from os import path
 
 from f8a_worker.enums import EcosystemBackend
-from f8a_worker.models import Ecosystem
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.utils import TimedCommand, username
 from f8a_worker.base import BaseTask
 from f8a_worker.schemas import SchemaRef
@@ -19,27 +19,42 @@ class LicenseCheckTask(BaseTask):
     schema_ref = SchemaRef(_analysis_name, '3-0-0')
 
     @staticmethod
-    def process_output(data):
-        """Process output from scancode tool."""
+    def add_file_licenses(licenses, file):
+        """Merge licenses detected in a file, an item of 'files' in scancode output.
+
+        :param licenses: dict, license short name -> license info with a set of paths
+        :param file: dict, scancode result for one file
+        """
         # not interested in these
         keys_to_remove = ['start_line', 'end_line', 'matched_rule', 'score', 'key']
+        for _license in file['licenses']:
+            # short_name becomes key
+            short_name = _license.pop('short_name')
+            if short_name not in licenses.keys():
+                for key in keys_to_remove:
+                    del _license[key]
+                _license['paths'] = {file['path']}
+                licenses[short_name] = _license
+            else:
+                licenses[short_name]['paths'].add(file['path'])
+
+    @staticmethod
+    def process_output(data, licenses=None):
+        """Process output from scancode tool.
+
+        :param data: dict, scancode output
+        :param licenses: dict, licenses collected by add_file_licenses() while the 'files'
+                         array was streamed, data['files'] is used if not given
+        """
         # 'files' is a list of file paths along with info about detected licenses.
         # If there's the same license text in most files, then almost the same license info
         # accompanies each file path.
         # Therefore transform it into dict of licenses (keys) along with info about the license plus
         # paths of files where the license has been detected.
-        licenses = {}
-        for file in data.pop('files'):
-            for _license in file['licenses']:
-                # short_name becomes key
-                short_name = _license.pop('short_name')
-                if short_name not in licenses.keys():
-                    for key in keys_to_remove:
-                        del _license[key]
-                    _license['paths'] = {file['path']}
-                    licenses[short_name] = _license
-                else:
-                    licenses[short_name]['paths'].add(file['path'])
+        if licenses is None:
+            licenses = {}
+            for file in data.pop('files'):
+                LicenseCheckTask.add_file_licenses(licenses, file)
         for line in licenses.values():
             line['paths'] = list(line['paths'])  # set -> list
         data['licenses'] = licenses
@@ -73,14 +88,21 @@ class LicenseCheckTask(BaseTask):
                    scan_path]
         for ignore_pattern in configuration.SCANCODE_IGNORE:
             command += ['--ignore', '{}'.format(ignore_pattern)]
+        # results of scanned files are processed one by one as the output is parsed, the output
+        #  for large sources is huge and would be held in memory as a whole otherwise
+        licenses = {}
         with username():
             tc = TimedCommand(command)
-            status, output, error = tc.run(is_json=True, timeout=1200)
+            status, output, error = tc.run(
+                is_json=True, timeout=1200,
+                json_item_handlers={
+                    'files': lambda file: LicenseCheckTask.add_file_licenses(licenses, file)
+                })
             if status != 0:
                 return {"status": status, "output": output,
                         "error": error, "command": command}
 
-        details = LicenseCheckTask.process_output(output)
+        details = LicenseCheckTask.process_output(output, licenses)
         result_data['details'] = details
         result_data['status'] = 'success'
         result_data['summary'] = {'sure_licenses': list(details['licenses'].keys())}
@@ -104,8 +126,9 @@ class LicenseCheckTask(BaseTask):
         try:
             cache_path = ObjectCache.get_from_dict(arguments).get_sources()
         except Exception:
-            if not Ecosystem.by_name(StoragePool.get_connected_storage('BayesianPostgres').session,
-                                     eco).is_backed_by(EcosystemBackend.maven):
+            if not ecosystem_registry.by_name(
+                    StoragePool.get_connected_storage('BayesianPostgres').session,
+                    eco).is_backed_by(EcosystemBackend.maven):
                 self.log.error('Could not get sources for package {e}/{p}/{v}'.
                                format(e=eco, p=pkg, v=ver))
                 raise
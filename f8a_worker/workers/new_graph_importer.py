@@ -1,7 +1,7 @@
 """Ingest to graph task."""
 
 from f8a_worker.base import BaseTask
-import requests
+from f8a_worker.http_client import http_client
 from os import environ
 import logging
 
@@ -43,7 +43,7 @@ class NewPackageGraphImporterTask(BaseTask):
         logger.info("v2_:_Invoke graph importer at url: '%s' for %s",
                     _SELECTIVE_API_URL, param)
         # Calling Data Importer API end point to ingest data into graph db.
-        response = requests.post(_SELECTIVE_API_URL, json=param)
+        response = http_client.post(_SELECTIVE_API_URL, json=param)
 
         if response.status_code != 200:
             raise RuntimeError("v2_:_Failed to invoke graph import at '%s' for %s" %
@@ -81,7 +81,7 @@ class NewPackageAnalysisGraphImporterTask(BaseTask):
         logger.info("v2_:_Invoke graph importer at url: '%s' for %s",
                     _SELECTIVE_API_URL, param)
         # Calling Data Importer API end point to ingest data into graph db.
-        response = requests.post(_SELECTIVE_API_URL, json=param)
+        response = http_client.post(_SELECTIVE_API_URL, json=param)
 
         if response.status_code != 200:
             raise RuntimeError("v2_:_Failed to invoke graph import at '%s' for %s" %
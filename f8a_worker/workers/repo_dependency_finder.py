@@ -1,11 +1,11 @@
 """Output: List of direct and indirect dependencies."""
 
-import requests
 import traceback
 
 from f8a_worker.base import BaseTask
 from f8a_worker.errors import TaskError
 from f8a_worker.graphutils import GREMLIN_SERVER_URL_REST
+from f8a_worker.http_client import http_client
 from f8a_worker.workers.mercator import MercatorTask
 from f8a_worker.workers.dependency_parser import GithubDependencyTreeTask
 
@@ -94,7 +94,7 @@ class RepoDependencyFinderTask(BaseTask):
                         ".as('ed').inV().as('epv').select('rp','ed','epv').by(valueMap(true));")
         payload = {"gremlin": gremlin_str}
         try:
-            rawresp = requests.post(url=GREMLIN_SERVER_URL_REST, json=payload)
+            rawresp = http_client.post(url=GREMLIN_SERVER_URL_REST, json=payload)
             resp = rawresp.json()
             self.log.info('######## Gremlin Response %r' % resp)
             if rawresp.status_code != 200:
@@ -141,7 +141,7 @@ class RepoDependencyFinderTask(BaseTask):
             }
         }
         try:
-            rawresp = requests.post(url=GREMLIN_SERVER_URL_REST, json=payload)
+            rawresp = http_client.post(url=GREMLIN_SERVER_URL_REST, json=payload)
             resp = rawresp.json()
             if rawresp.status_code != 200:
                 raise RuntimeError("Error creating repository node for %r" % resp)
@@ -1,12 +1,10 @@
 """Output: TBD."""
 
-import json
 import operator
 from time import gmtime, strftime
 
 from f8a_worker.base import BaseTask
-from f8a_worker.graphutils import GREMLIN_SERVER_URL_REST
-from f8a_worker.utils import get_session_retry
+from f8a_worker.graphutils import get_epvs_data
 
 
 class ReportGenerationTask(BaseTask):
@@ -56,6 +54,7 @@ class ReportGenerationTask(BaseTask):
     def _get_dependency_data(self, dependencies):
         dependency_data_list = list()
         self.log.debug("Dependencies are: {}".format(dependencies))
+        epvs = list()
         for dependency in dependencies:
             self.log.info("Analyzing dependency: {}".format(dependency))
             n_colons = dependency.count(":")
@@ -70,30 +69,22 @@ class ReportGenerationTask(BaseTask):
                 self.log.error("No valid dependency format found: {}"
                                .format(dependency))
                 name = ""
+            epvs.append((ecosystem, name, version))
 
-            qstring = ("g.V().has('pecosystem','" + ecosystem + "').has('pname','" +
-                       name + "')"".has('version','" + version + "').")
-            qstring += ("as('version').in('has_version').as('package').dedup()." +
-                        "select('version','package').by(valueMap());")
-            payload = {'gremlin': qstring}
+        graph_data = get_epvs_data(epvs)
+        for epv in epvs:
+            data = graph_data.get(epv)
+            if not data:
+                continue
             try:
-                graph_req = get_session_retry().post(GREMLIN_SERVER_URL_REST,
-                                                     data=json.dumps(payload))
-                if graph_req.status_code == 200:
-                    graph_resp = graph_req.json()
-                    data = graph_resp.get('result', {}).get('data')
-                    if data:
-                        version_data = self.parse_version_data(data[0].get('version'))
-                        package_data = self.parse_package_data(data[0].get('package'))
-                        dependency_data = version_data.copy()
-                        dependency_data.update(package_data)
-                        dependency_data_list.append(dependency_data)
-                else:
-                    self.log.error("Failed retrieving dependency data.")
-                    continue
+                version_data = self.parse_version_data(data.get('version'))
+                package_data = self.parse_package_data(data.get('package'))
             except Exception:
                 self.log.exception("Error retrieving dependency data.")
                 continue
+            dependency_data = version_data.copy()
+            dependency_data.update(package_data)
+            dependency_data_list.append(dependency_data)
 
         self.log.debug("Dependency data list is: {}".format(dependency_data_list))
         return dependency_data_list
@@ -1,9 +1,9 @@
 """Class to gather package description available in repository."""
 
-import requests
 from bs4 import BeautifulSoup
 from f8a_worker.base import BaseTask
 from f8a_worker.errors import NotABugFatalTaskError
+from f8a_worker.http_client import http_client
 from selinon import FatalTaskError
 
 
@@ -18,7 +18,7 @@ class RepositoryDescCollectorTask(BaseTask):
     @staticmethod
     def _scrape_page(url):
         """Web scrape URL."""
-        response = requests.get(url)
+        response = http_client.get(url)
         if response.status_code != 200:
             raise NotABugFatalTaskError("Unable to access package web page at '%s'" % url)
         return BeautifulSoup(response.text, 'lxml')
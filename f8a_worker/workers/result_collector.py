@@ -14,6 +14,7 @@ class _ResultCollectorBase(BaseTask):
 
     def do_run(self, arguments, s3, postgres, results):
         """Run task."""
+        to_store = []
         for worker_result in results.raw_analyses:
             # We don't want to store tasks that do book-keeping for Selinon's
             # Dispatcher (starting uppercase)
@@ -25,10 +26,15 @@ class _ResultCollectorBase(BaseTask):
                 # their version - this can occur on selective task runs.
                 continue
 
-            version_id = s3.store_task_result(arguments, worker_result.worker,
-                                              worker_result.task_result)
+            to_store.append(worker_result)
+
+        # Results are serialized and uploaded in parallel
+        version_ids = s3.store_task_results(arguments, {worker_result.worker:
+                                                        worker_result.task_result
+                                                        for worker_result in to_store})
+        for worker_result in to_store:
             # Substitute task's result with version that we got on S3
-            worker_result.task_result = {'version_id': version_id}
+            worker_result.task_result = {'version_id': version_ids[worker_result.worker]}
 
         if hasattr(results, 'version'):  # update only for version Analysis objects
             results.version.synced2graph = False
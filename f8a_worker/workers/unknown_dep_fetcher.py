@@ -1,10 +1,8 @@
 """Task to fetch unknown dependencies."""
 
 from __future__ import division
-import json
-from f8a_worker.graphutils import GREMLIN_SERVER_URL_REST
+from f8a_worker.graphutils import get_epvs_presence
 from f8a_worker.base import BaseTask
-from f8a_worker.utils import get_session_retry
 
 
 class UnknownDependencyFetcherTask(BaseTask):
@@ -14,6 +12,7 @@ class UnknownDependencyFetcherTask(BaseTask):
         """Prepare list of unknown dependencies from given list of dependencies."""
         dep_pkg_list_unknown = list()
         dep_pkg_list_known = list()
+        epvs = list()
         for dependency in dependency_list:
             n_colons = dependency.count(":")
             dependency_list = dependency.split(":")
@@ -28,22 +27,17 @@ class UnknownDependencyFetcherTask(BaseTask):
                 self.log.error("No valid dependency format found: {}"
                                .format(dependency))
                 name = ""
-
-            qstring = ("g.V().has('pecosystem','" + ecosystem + "').has('pname','" +
-                       name + "').has('version','" + version + "').tryNext()")
-            payload = {'gremlin': qstring}
-
-            graph_req = get_session_retry().post(GREMLIN_SERVER_URL_REST, data=json.dumps(payload))
-            if graph_req.status_code == 200:
-                graph_resp_data = graph_req.json().get('result', {}).get('data')
-                if graph_resp_data[0].get('present'):
-                    dep_pkg_list_known.append(ecosystem + ":" + name + ":" + version)
-                else:
-                    dep_pkg_list_unknown.append(ecosystem + ":" + name + ":" + version)
+            epvs.append((ecosystem, name, version))
+
+        presence = get_epvs_presence(epvs)
+        for epv in epvs:
+            if epv not in presence:
+                # graph query failed, error has been already logged
+                continue
+            if presence[epv]:
+                dep_pkg_list_known.append(":".join(epv))
             else:
-                self.log.error("Error response from graph for {dependency} "
-                               "with status code as {status_code}"
-                               .format(dependency=dependency, status_code=graph_req.status_code))
+                dep_pkg_list_unknown.append(":".join(epv))
 
         self.log.info("Known dependencies are: {}".format(dep_pkg_list_known))
         self.log.info("Unknown dependencies are: {}".format(dep_pkg_list_unknown))
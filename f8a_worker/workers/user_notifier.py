@@ -4,7 +4,7 @@ from f8a_worker.base import BaseTask
 from time import strftime, gmtime
 from uuid import uuid4
 import os
-import requests
+from f8a_worker.http_client import http_client
 
 
 class UserNotificationTask(BaseTask):
@@ -16,7 +16,7 @@ class UserNotificationTask(BaseTask):
 
         endpoint = '{url}/api/notify'.format(url=url)
         auth = 'Bearer {token}'.format(token=token)
-        resp = requests.post(endpoint, json=notification, headers={'Authorization': auth})
+        resp = http_client.post(endpoint, json=notification, headers={'Authorization': auth})
         if resp.status_code == 202:
             self.log.info('Notification service called successfully.')
             return {'status': 'success'}
@@ -0,0 +1,34 @@
+#!/usr/bin/bash
+
+# Run benchmarks of hot paths (tests/benchmarks/bench_*.py), requires pytest-benchmark.
+#
+# Results are compared with the baseline in tests/benchmarks/baseline.json. Numbers
+# depend on the machine, so the baseline is not committed; record it on the machine
+# used for comparison first (an existing baseline is replaced):
+#
+#   SAVE_BASELINE=1 hack/run_benchmarks.sh
+#
+# Set BENCHMARK_THRESHOLD (e.g. 25%) to fail the run if the minimum time of any benchmark
+# regresses by more than that, the minimum is the least noisy statistic on shared machines.
+#
+# Benchmarks using Postgres (the `rdb` fixture) need the same database as unit tests.
+
+set -e
+DIR=$(dirname "${BASH_SOURCE[0]}")
+cd "${DIR}/.."
+
+BASELINE=tests/benchmarks/baseline.json
+ARGS=(-p no:cacheprovider -o python_files='bench_*.py' --benchmark-only)
+
+if [ "${SAVE_BASELINE}" == "1" ]; then
+    ARGS+=(--benchmark-json="${BASELINE}")
+elif [ -f "${BASELINE}" ]; then
+    ARGS+=(--benchmark-compare="${BASELINE}")
+    if [ -n "${BENCHMARK_THRESHOLD}" ]; then
+        ARGS+=(--benchmark-compare-fail="min:${BENCHMARK_THRESHOLD}")
+    fi
+else
+    echo "No baseline in ${BASELINE}, results are not compared" >&2
+fi
+
+py.test "${ARGS[@]}" "$@" tests/benchmarks/
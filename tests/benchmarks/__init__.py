@@ -0,0 +1 @@
+"""Benchmarks of hot paths."""
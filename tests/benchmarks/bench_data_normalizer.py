@@ -0,0 +1,35 @@
+"""Benchmarks of normalization of mercator output in data_normalizer."""
+
+import copy
+import os
+
+import pytest
+
+from f8a_worker.data_normalizer import normalize
+
+from .conftest import DATA_DIR, load_json, npm_shrinkwrap, pom
+
+RECORDED = sorted(n for n in os.listdir(os.path.join(DATA_DIR, 'dataNormalizer'))
+                  if n.endswith('-from-mercator'))
+
+
+@pytest.mark.parametrize('name', RECORDED)
+def test_normalize_recorded(benchmark, name):
+    """Normalize recorded mercator outputs."""
+    data = load_json('dataNormalizer', name)
+    item = data['items'][0] if 'items' in data else data
+    benchmark(lambda: normalize(copy.deepcopy(item)))
+
+
+def test_normalize_npm_shrinkwrap(benchmark):
+    """Normalize package.json with a deep npm-shrinkwrap dependency tree."""
+    data = npm_shrinkwrap(depth=4, width=8)
+    result = benchmark(lambda: normalize(copy.deepcopy(data)))
+    assert len(result['_dependency_tree_lock']['dependencies']) == 8
+
+
+def test_normalize_pom(benchmark):
+    """Normalize pom.xml with many dependencies."""
+    data = pom(2000)
+    result = benchmark(lambda: normalize(copy.deepcopy(data)))
+    assert len(result['dependencies']) >= 2000
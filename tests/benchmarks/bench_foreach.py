@@ -0,0 +1,67 @@
+"""Benchmarks of scheduling analyses of dependencies in dispatcher/foreach.py."""
+
+from flexmock import flexmock
+
+from f8a_worker.defaults import configuration
+from f8a_worker.dispatcher import foreach
+from f8a_worker.ecosystem_registry import EcosystemRecord, ecosystem_registry
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.models import Analysis, Package, Version
+from f8a_worker.storages import BayesianPostgres
+
+DEPENDENCY_COUNT = 1000
+
+
+class _StoragePool(object):
+    """Storage pool serving dependency snapshot and Postgres adapter."""
+
+    def __init__(self, dependencies, postgres):
+        self.dependencies = dependencies
+        self.postgres = postgres
+
+    def get(self, name):
+        assert name == 'dependency_snapshot'
+        return {'details': {'runtime': self.dependencies}}
+
+    def get_connected_storage(self, name):
+        assert name == 'BayesianPostgres'
+        return self.postgres
+
+
+def _dependencies():
+    return [{'ecosystem': 'npm', 'name': 'package-{}'.format(i), 'version': '1.0.{}'.format(i)}
+            for i in range(DEPENDENCY_COUNT)]
+
+
+def test_iter_dependencies_analysis(benchmark):
+    """Schedule analyses of dependencies, half of them already analysed."""
+    dependencies = _dependencies()
+    analysed = {(d['ecosystem'], d['name'], d['version']) for d in dependencies[::2]}
+    postgres = flexmock(session=None)
+    postgres.should_receive('get_analysed_versions').replace_with(
+        lambda epvs: {epv for epv in epvs if epv in analysed})
+    flexmock(foreach.StoragePool).should_receive('get_connected_storage').and_return(postgres)
+    flexmock(ecosystem_registry).should_receive('by_name').and_return(
+        EcosystemRecord(1, 'npm', None, None, EcosystemBackend.npm))
+
+    result = benchmark(foreach.iter_dependencies_analysis,
+                       _StoragePool(dependencies, postgres), {'recursive_limit': 2})
+    assert len(result) == DEPENDENCY_COUNT // 2
+
+
+def test_iter_dependencies_analysis_postgres(benchmark, rdb, npm):
+    """Schedule analyses of dependencies, looking up analysed ones in local Postgres."""
+    dependencies = _dependencies()
+    for dependency in dependencies[::2]:
+        package = Package(ecosystem=npm, name=dependency['name'])
+        rdb.add(Analysis(version=Version(package=package, identifier=dependency['version'])))
+    rdb.commit()
+
+    postgres = BayesianPostgres(connection_string=configuration.POSTGRES_CONNECTION)
+    postgres.connect()
+    flexmock(foreach.StoragePool).should_receive('get_connected_storage').and_return(postgres)
+    ecosystem_registry.clear()
+
+    result = benchmark(foreach.iter_dependencies_analysis,
+                       _StoragePool(dependencies, postgres), {})
+    assert len(result) == DEPENDENCY_COUNT // 2
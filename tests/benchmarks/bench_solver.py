@@ -0,0 +1,86 @@
+"""Benchmarks of version comparison and dependency resolution in solver.py."""
+
+from functools import cmp_to_key
+
+import pytest
+
+from f8a_worker.npm_semver import valid_range
+from f8a_worker.solver import (Dependency, NpmDependencyParser, NpmSolver, PypiDependencyParser,
+                               PypiSolver, ReleasesMatcher, compare_version, sort_versions)
+
+from .conftest import RecordedReleasesFetcher, npm_releases, npm_shrinkwrap
+
+NPM_SPECS = ['^1.2.3', '~4.1.0', '>=2.0.0 <3.0.0', '1.x || >=5.2.1', '*', '2.1.7', '<0.5.3',
+             '>1.0.0-beta.1', '3 - 4.5', '^0.3.0']
+
+
+def test_compare_version_sort(benchmark):
+    """Sort a long release list with compare_version()."""
+    releases = npm_releases(1000)
+    assert len(benchmark(sorted, releases, key=cmp_to_key(compare_version))) == 1000
+
+
+def test_sort_versions(benchmark):
+    """Sort a long release list with sort_versions()."""
+    releases = npm_releases(1000)
+    assert len(benchmark(sort_versions, releases)) == 1000
+
+
+def test_releases_matcher(benchmark, pypi_releases):
+    """Match specs against recorded PyPI release lists."""
+    dependencies = [Dependency('botocore', [[('>=', '1.12.0'), ('<', '1.13.0')], ('>', '1.30.0')]),
+                    Dependency('django', [[('>=', '1.11'), ('<', '2.0')]]),
+                    Dependency('setuptools', [[('>=', '40.0.0'), ('!=', '41.0.0')]])]
+
+    def _match():
+        return [ReleasesMatcher(pypi_releases[d.name]).match(d) for d in dependencies]
+
+    assert all(benchmark(_match))
+
+
+@pytest.mark.parametrize('spec', NPM_SPECS)
+def test_npm_valid_range(benchmark, spec):
+    """Desugar a single npm version range, without the parse cache."""
+    assert benchmark(valid_range.__wrapped__, spec)
+
+
+def test_npm_dependency_parser(benchmark):
+    """Parse npm version ranges, mostly served from the parse cache."""
+    specs = ['package-{} {}'.format(i, spec) for i, spec in enumerate(NPM_SPECS * 10)]
+    assert len(benchmark(NpmDependencyParser().parse, specs)) == len(specs)
+
+
+def test_npm_solver(benchmark, npm_ecosystem):
+    """Resolve all dependencies of a deep npm-shrinkwrap tree."""
+    tree = npm_shrinkwrap(depth=3, width=6)['result']['_dependency_tree_lock_file']
+    names = set()
+
+    def _collect(level):
+        for name, entry in level.items():
+            names.add(name)
+            _collect(entry.get('dependencies', {}))
+
+    _collect(tree['dependencies'])
+    specs = ['{} {}'.format(name, NPM_SPECS[i % len(NPM_SPECS)])
+             for i, name in enumerate(sorted(names))]
+    fetcher = RecordedReleasesFetcher(npm_ecosystem, {n: npm_releases(300) for n in names})
+    solver = NpmSolver(npm_ecosystem, fetcher=fetcher)
+
+    assert len(benchmark(solver.solve, specs)) == len(specs)
+
+
+def test_pypi_dependency_parser(benchmark):
+    """Parse a long requirements list, without the parse cache."""
+    specs = ['package-{}>={}.{},<{}; python_version>="3"'.format(i, i % 5, i % 13, i % 5 + 1)
+             for i in range(200)]
+    result = benchmark.pedantic(PypiDependencyParser().parse, args=(specs,), rounds=20,
+                                setup=PypiDependencyParser._parse_python.cache_clear)
+    assert len(result) == len(specs)
+
+
+def test_pypi_solver(benchmark, pypi_ecosystem, pypi_releases):
+    """Resolve requirements against recorded PyPI release lists."""
+    specs = ['botocore>=1.12,<1.13', 'django~=1.11.0', 'setuptools>=40,!=41.0.0']
+    fetcher = RecordedReleasesFetcher(pypi_ecosystem, pypi_releases)
+    solver = PypiSolver(pypi_ecosystem, fetcher=fetcher)
+    assert all(benchmark(solver.solve, specs).values())
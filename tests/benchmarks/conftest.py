@@ -0,0 +1,113 @@
+"""Fixtures for benchmarks of hot paths.
+
+Benchmarks need pytest-benchmark and are not collected with unit tests, run them with
+hack/run_benchmarks.sh. Inputs are built from data recorded in tests/data, scaled up
+deterministically to sizes seen in production (long release lists, deep shrinkwrap
+trees, big pom.xml files). Registries are never contacted, release lists are served
+by RecordedReleasesFetcher.
+"""
+
+import copy
+import json
+import os
+
+import pytest
+
+from f8a_worker.ecosystem_registry import EcosystemRecord
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.solver import ReleasesFetcher
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def load_json(*path):
+    """Load JSON file from tests/data."""
+    with open(os.path.join(DATA_DIR, *path), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def npm_releases(count):
+    """Generate release list of an npm package with `count` releases.
+
+    Mimics a long living package: majors with many minors and patches, prereleases
+    of every major, in the (unsorted) order the registry returns them.
+    """
+    releases = []
+    major = 0
+    while len(releases) < count:
+        releases.extend('{}.0.0-{}.{}'.format(major + 1, tag, i)
+                        for tag in ('alpha', 'beta', 'rc') for i in range(2))
+        releases.extend('{}.{}.{}'.format(major, minor, patch)
+                        for minor in range(12) for patch in range(8))
+        major += 1
+    return releases[:count]
+
+
+def npm_shrinkwrap(depth, width):
+    """Generate mercator output of package.json with npm-shrinkwrap dependency tree.
+
+    :param depth: int, depth of the dependency tree
+    :param width: int, number of dependencies on every level
+    """
+    data = load_json('dataNormalizer', 'npm-with-shrinkwrap-json-from-mercator')
+    leaves = data['result']['_dependency_tree_lock_file']['dependencies']
+
+    def _level(level, prefix):
+        dependencies = {}
+        for i, (name, leaf) in enumerate(sorted(leaves.items()) * (width // len(leaves) + 1)):
+            if i == width:
+                break
+            entry = dict(leaf)
+            if level < depth:
+                entry['dependencies'] = _level(level + 1, '{}{}-'.format(prefix, i))
+            dependencies['{}{}-{}'.format(prefix, i, name)] = entry
+        return dependencies
+
+    data['result']['_dependency_tree_lock_file']['dependencies'] = _level(1, '')
+    return data
+
+
+def pom(count):
+    """Generate mercator output of pom.xml with `count` compile dependencies."""
+    data = load_json('dataNormalizer', 'pom-xml-from-mercator')['items'][0]
+    data = copy.deepcopy(data)
+    data['result']['pom.xml']['dependencies']['compile'] = {
+        'org.example.group{}:artifact-{}::'.format(i % 50, i): '{}.{}.{}'.format(i % 7, i % 11, i)
+        for i in range(count)
+    }
+    return data
+
+
+class RecordedReleasesFetcher(ReleasesFetcher):
+    """Fetcher serving recorded release lists instead of querying the registry."""
+
+    def __init__(self, ecosystem, releases):
+        """Initialize instance.
+
+        :param releases: dict, package name -> list of releases
+        """
+        super().__init__(ecosystem)
+        self.releases = releases
+
+    def fetch_releases(self, package):
+        """Get recorded releases of `package`."""
+        return package, self.releases.get(package, [])
+
+
+@pytest.fixture
+def npm_ecosystem():
+    """Provide npm ecosystem without database."""
+    return EcosystemRecord(1, 'npm', None, 'https://registry.npmjs.org/', EcosystemBackend.npm)
+
+
+@pytest.fixture
+def pypi_ecosystem():
+    """Provide PyPI ecosystem without database."""
+    return EcosystemRecord(2, 'pypi', None, 'https://pypi.org/pypi/', EcosystemBackend.pypi)
+
+
+@pytest.fixture(scope='session')
+def pypi_releases():
+    """Provide release lists recorded from PyPI."""
+    return {name: load_json('releases', name + '.json')
+            for name in ('botocore', 'django', 'setuptools')}
@@ -1,14 +1,24 @@
 """Configuration for unit tests."""
 
+import os
+import sys
+
 import pytest
 from flexmock import flexmock
 
+from f8a_worker.defaults import F8AConfiguration
+from f8a_worker.ecosystem_registry import ecosystem_registry
 from f8a_worker.enums import EcosystemBackend
 from f8a_worker.models import Base, Ecosystem, create_db_scoped_session
+from f8a_worker.pypi_metadata import pypi_metadata
 from f8a_worker.setup_celery import get_dispatcher_config_files
 from f8a_worker.storages import AmazonS3
 from selinon import Config
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from registry_stub import RegistryStub  # noqa: E402
+
 # To use fixtures from this file, either name them as an input argument or use 'usefixtures' marker
 # https://docs.pytest.org/en/latest/fixture.html#using-fixtures-from-classes-modules-or-projects
 
@@ -93,3 +103,16 @@ def dispatcher_setup():
 def no_s3_connection():
     """Mock the connection to S3."""
     flexmock(AmazonS3).should_receive('is_connected').and_return(True)
+
+
+@pytest.fixture
+def registry_stub(monkeypatch):
+    """Serve bundled registry data (tests/data/registry) and point ecosystems at it."""
+    with RegistryStub(os.path.join(os.path.dirname(__file__), 'data', 'registry')) as stub:
+        monkeypatch.setattr(F8AConfiguration, 'REGISTRY_MIRROR_URL', stub.url)
+        # fetch URLs of loaded ecosystems are not mirrored
+        ecosystem_registry.clear()
+        yield stub
+    # ports of stubs are reused, do not serve documents of one stub run in another
+    pypi_metadata.clear()
+    ecosystem_registry.clear()
@@ -7,7 +7,7 @@ import selinon
 
 from f8a_worker.defaults import configuration
 from f8a_worker.enums import EcosystemBackend
-from f8a_worker.models import (Ecosystem, Package, Version, Analysis, WorkerResult,
+from f8a_worker.models import (Ecosystem, Package, Version, Analysis, TaskClaim, WorkerResult,
                                create_db_scoped_session)
 from f8a_worker.storages.postgres import BayesianPostgres
 
@@ -95,6 +95,48 @@ class TestBayesianPostgres:
         result = self.bp.retrieve(flow_name='blah', task_name=tn, task_id=tid)
         assert result.get('some') == 'thing'
 
+    def test_store_integrity_error(self):
+        """Test that results violating integrity constraints are not stored, but not raised."""
+        exc_info = (ValueError, ValueError('task failed'), None)
+        assert self.bp.claim_task('sdf')
+        assert not self.bp.store_error(node_args={'document_id': 123456}, flow_name='blah',
+                                       task_name='asd', task_id='sdf', exc_info=exc_info)
+        self.bp.store(node_args={'document_id': 123456}, flow_name='blah', task_name='asd',
+                      task_id='sdf', result={'some': 'thing'})
+        assert self.bp.get_worker_id_count('sdf') == 0
+        # the claim was released, so that a retry can run
+        assert self.bp.claim_task('sdf')
+
+    def test_claim_task(self):
+        """Test that a task can be claimed once, unless the claim is stale."""
+        assert self.bp.claim_task('sdf')
+        assert not self.bp.claim_task('sdf')
+
+        flexmock.flexmock(configuration, TASK_CLAIM_TIMEOUT=-1)
+        # the task run which claimed the task died without storing the result
+        assert self.bp.claim_task('sdf')
+        self.bp.store(node_args={}, flow_name='blah', task_name='asd', task_id='sdf',
+                      result={'some': 'thing'})
+        assert not self.bp.claim_task('sdf')
+
+    def test_claims_removed(self):
+        """Test that claims are removed once results are stored, stale claims are pruned."""
+        exc_info = (ValueError, ValueError('task failed'), None)
+        for task_id in ('stored', 'failed', 'stale', 'running'):
+            assert self.bp.claim_task(task_id)
+        self.s.query(TaskClaim).filter(TaskClaim.worker_id == 'stale').\
+            update({'claimed_at': datetime.datetime(2000, 1, 1)}, synchronize_session=False)
+        self.s.commit()
+
+        self.bp.store(node_args={}, flow_name='blah', task_name='asd', task_id='stored',
+                      result={'some': 'thing'})
+        assert self.bp.store_error(node_args={}, flow_name='blah', task_name='asd',
+                                   task_id='failed', exc_info=exc_info)
+        assert [claim.worker_id for claim in self.s.query(TaskClaim)] == ['running']
+        # stored results reject duplicates now
+        assert not self.bp.claim_task('stored')
+        assert not self.bp.claim_task('failed')
+
     def test_get_latest_task_result(self):
         """Test the function to get the latest task result from database."""
         tn = 'asd'
@@ -110,3 +152,18 @@ class TestBayesianPostgres:
     def test_get_latest_task_result_no_results(self):
         """Test the function to get the latest task result from empty database."""
         assert self.bp.get_latest_task_result(self.en, self.pn, self.vi, 'asd') is None
+
+    def test_get_analysed_versions(self):
+        """Test the bulk lookup of already analysed EPVs."""
+        e = Ecosystem(name='npm', backend=EcosystemBackend.npm)
+        p = Package(ecosystem=e, name='serve-static')
+        self.s.add(Analysis(version=Version(package=p, identifier='1.7.1')))
+        self.s.add(Version(package=p, identifier='1.7.2'))
+        self.s.commit()
+
+        epvs = [('npm', 'serve-static', '1.7.1'), ('npm', 'serve-static', '1.7.2'),
+                ('npm', 'serve-static', '1.7.3'), ('npm', 'express', '1.7.1')]
+        assert self.bp.get_analysed_versions(epvs, chunk_size=2) == {
+            ('npm', 'serve-static', '1.7.1')
+        }
+        assert self.bp.get_analysed_versions([]) == set()
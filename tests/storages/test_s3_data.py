@@ -0,0 +1,57 @@
+"""Test f8a_worker.storages.s3_data.py."""
+
+import json
+from threading import Lock
+
+from flexmock import flexmock
+
+from f8a_worker.storages.s3_data import S3Data
+
+ARGUMENTS = {'ecosystem': 'npm', 'name': 'serve-static', 'version': '1.7.1'}
+
+
+class _FakeClient(object):
+    """Fake S3 client recording uploaded objects."""
+
+    def __init__(self):
+        self.objects = {}
+        self._lock = Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self._lock:
+            self.objects[Key] = json.loads(Body.decode())
+        return {'VersionId': 'version-of-' + Key}
+
+
+def _storage():
+    storage = S3Data(aws_access_key_id='x', aws_secret_access_key='y', bucket_name='data',
+                     encryption=False)
+    client = _FakeClient()
+    storage._s3 = flexmock(meta=flexmock(client=client))
+    flexmock(storage).should_receive('_create_bucket_if_needed')
+    return storage, client
+
+
+def test_store_task_results():
+    """Test that task results are uploaded and their versions returned."""
+    storage, client = _storage()
+    task_results = {'task{}'.format(i): {'result': i} for i in range(20)}
+
+    versions = storage.store_task_results(ARGUMENTS, task_results)
+    assert versions == {'task{}'.format(i): 'version-of-npm/serve-static/1.7.1/task{}.json'
+                        .format(i) for i in range(20)}
+    assert client.objects['npm/serve-static/1.7.1/task7.json'] == {'result': 7}
+    assert storage.store_task_results(ARGUMENTS, {}) == {}
+
+
+def test_store_base_file_record():
+    """Test that analyses listed in the stored base file record are kept."""
+    storage, client = _storage()
+    flexmock(storage).should_receive('retrieve_blob').with_args('npm/serve-static/1.7.1.json')\
+        .and_return(json.dumps({'analyses': ['security_issues']}).encode()).once()
+
+    result = {'analyses': {'digests': {}, 'metadata': {}, 'FooTask': {}}, 'access_count': 1}
+    storage.store_base_file_record(ARGUMENTS, result)
+    record = client.objects['npm/serve-static/1.7.1.json']
+    assert sorted(record['analyses']) == ['digests', 'metadata', 'security_issues']
+    assert 'access_count' not in record
@@ -0,0 +1,113 @@
+"""Tests covering code in artifact_cache.py."""
+
+import os
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from f8a_worker.artifact_cache import ArtifactCache
+
+
+def _populate_with(content):
+    calls = []
+
+    def _populate(path):
+        calls.append(path)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    return _populate, calls
+
+
+class TestArtifactCache(object):
+    """Tests for ArtifactCache."""
+
+    def test_retrieve(self, tmpdir):
+        """Test that objects are retrieved only once."""
+        cache = ArtifactCache(cache_dir=str(tmpdir.join('cache')), max_size=1024)
+        populate, calls = _populate_with(b'tarball')
+        key = cache.make_key('bucket', 'npm/serve-static/1.7.1/package.tgz', 'v1')
+
+        for i in range(3):
+            destination = str(tmpdir.join('dst{}'.format(i)))
+            cache.retrieve(key, destination, populate)
+            with open(destination, 'rb') as f:
+                assert f.read() == b'tarball'
+
+        assert len(calls) == 1
+        assert cache.stats == {'hits': 2, 'misses': 1, 'bytes_saved': 14, 'evictions': 0}
+        assert cache.hit_ratio() == pytest.approx(2 / 3)
+
+        # new version of the object is not served from cache
+        populate, calls = _populate_with(b'new tarball')
+        key = cache.make_key('bucket', 'npm/serve-static/1.7.1/package.tgz', 'v2')
+        cache.retrieve(key, str(tmpdir.join('dst0')), populate)
+        assert len(calls) == 1
+        with open(str(tmpdir.join('dst0')), 'rb') as f:
+            assert f.read() == b'new tarball'
+
+    def test_failed_population(self, tmpdir):
+        """Test that nothing is cached if retrieval fails."""
+        cache = ArtifactCache(cache_dir=str(tmpdir.join('cache')), max_size=1024)
+
+        def _populate(path):
+            raise IOError("S3 is down")
+
+        with pytest.raises(IOError):
+            cache.retrieve('key', str(tmpdir.join('dst')), _populate)
+        assert os.listdir(str(tmpdir.join('cache', 'objects'))) == []
+        assert not tmpdir.join('dst').exists()
+
+    def test_eviction(self, tmpdir):
+        """Test that least recently used objects are evicted."""
+        cache = ArtifactCache(cache_dir=str(tmpdir.join('cache')), max_size=25)
+        for i, key in enumerate(['a', 'b', 'c']):
+            populate, _ = _populate_with(b'0' * 10)
+            cache.retrieve(key, str(tmpdir.join(key)), populate)
+            # make sure access times differ
+            os.utime(cache._path(key), (i, i))
+            if key == 'b':
+                # 'a' is used again, it's the most recently used now
+                cache.retrieve('a', str(tmpdir.join('a')), None)
+                os.utime(cache._path('a'), (i + 0.5, i + 0.5))
+
+        assert cache.stats['evictions'] == 1
+        assert os.path.exists(cache._path('a'))
+        assert not os.path.exists(cache._path('b'))
+        assert os.path.exists(cache._path('c'))
+
+    def test_cleanup(self, tmpdir):
+        """Test that lock files are bounded and abandoned temporary files are removed."""
+        cache = ArtifactCache(cache_dir=str(tmpdir.join('cache')), max_size=1024)
+        for i in range(1000):
+            populate, _ = _populate_with(b'0')
+            cache.retrieve(str(i), str(tmpdir.join('dst')), populate)
+        assert len(os.listdir(str(tmpdir.join('cache', 'locks')))) <= 256
+
+        abandoned = tmpdir.join('cache', 'objects', 'abandoned.tmp')
+        abandoned.write('partial')
+        os.utime(str(abandoned), (0, 0))
+        in_progress = tmpdir.join('cache', 'objects', 'in-progress.tmp')
+        in_progress.write('partial')
+        cache.evict()
+        assert not abandoned.exists()
+        assert in_progress.exists()
+
+    def test_eviction_waits_for_lock(self, tmpdir):
+        """Test that objects are not evicted while their key is locked by retrieve()."""
+        cache = ArtifactCache(cache_dir=str(tmpdir.join('cache')), max_size=1024)
+        populate, _ = _populate_with(b'tarball')
+        cache.retrieve('a', str(tmpdir.join('a')), populate)
+        cache.max_size = 0
+
+        with cache._locked('a'):
+            evicting = Thread(target=cache.evict)
+            evicting.start()
+            sleep(0.2)
+            assert evicting.is_alive()
+            assert os.path.exists(cache._path('a'))
+        evicting.join(5)
+        assert not evicting.is_alive()
+        assert not os.path.exists(cache._path('a'))
+        assert cache.stats['evictions'] == 1
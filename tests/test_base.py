@@ -0,0 +1,86 @@
+"""Tests covering code in base.py."""
+
+import pytest
+from flexmock import flexmock
+from selinon import StoragePool
+
+from f8a_worker import base
+from f8a_worker.base import BaseTask
+from f8a_worker.errors import TaskAlreadyExistsError
+from f8a_worker.storages import BayesianPostgres
+
+
+class _Task(BaseTask):
+    """Task returning its arguments."""
+
+    add_audit_info = False
+
+    def execute(self, arguments):
+        return arguments
+
+
+def _storage():
+    storage = BayesianPostgres.__new__(BayesianPostgres)
+    flexmock(storage).should_receive('claim_task').and_return(True)
+    flexmock(StoragePool).should_receive('get_storage_by_task_name').and_return(storage)
+    return storage
+
+
+class TestTaskIdempotency(object):
+    """Tests for rejecting tasks delivered more than once."""
+
+    def test_duplicate_rejected(self):
+        """Test that a task is not executed if its ID can't be claimed."""
+        storage = _storage()
+        flexmock(storage).should_receive('claim_task').with_args('task-1').\
+            and_return(True).and_return(False).twice()
+        flexmock(storage).should_receive('release_task').never()
+
+        task = _Task.create_test_instance(task_id='task-1')
+        assert task.run({'name': 'serve-static'}) == {'name': 'serve-static'}
+        flexmock(task).should_receive('execute').never()
+        with pytest.raises(TaskAlreadyExistsError):
+            task.run({'name': 'serve-static'})
+
+    @pytest.mark.parametrize('add_audit_info,error_stored', [
+        (False, None),
+        (True, False),
+        (True, True),
+    ])
+    def test_failed_task(self, add_audit_info, error_stored):
+        """Test that claim of a failed task is released unless its error was stored."""
+        storage = _storage()
+        flexmock(storage).should_receive('claim_task').and_return(True)
+        flexmock(storage).should_receive('store_error').and_return(error_stored)
+        flexmock(storage).should_receive('release_task').with_args('task-1').\
+            times(0 if error_stored else 1)
+
+        class _FailingTask(_Task):
+            def execute(self, arguments):
+                raise ValueError(arguments)
+
+        _FailingTask.add_audit_info = add_audit_info
+        with pytest.raises(ValueError):
+            _FailingTask.create_test_instance(task_id='task-1').run({})
+
+
+def test_audit_metrics(monkeypatch):
+    """Test that metrics summary is added to the audit info if enabled."""
+    _storage()
+
+    class _AuditedTask(_Task):
+        add_audit_info = True
+
+    monkeypatch.setattr(base.configuration, 'TASK_METRICS', True)
+    result = _AuditedTask.create_test_instance(task_id='task-metrics').run({'ecosystem': 'npm'})
+    assert set(result['_audit']['metrics']['phases']) == {'execute', 'validate'}
+    assert 'postgres_pool' not in result['_audit']['metrics']
+
+    pool_stats = {'size': 5, 'checked_out': 1, 'waits': 3, 'wait_time': 0.5}
+    flexmock(BayesianPostgres).should_receive('pool_stats').and_return(pool_stats)
+    result = _AuditedTask.create_test_instance(task_id='task-pool').run({})
+    assert result['_audit']['metrics']['postgres_pool'] == pool_stats
+
+    monkeypatch.setattr(base.configuration, 'TASK_METRICS', False)
+    result = _AuditedTask.create_test_instance(task_id='task-no-metrics').run({})
+    assert 'metrics' not in result['_audit']
@@ -0,0 +1,99 @@
+"""Tests covering code in ecosystem_registry.py."""
+
+import pytest
+from sqlalchemy.orm.exc import NoResultFound
+
+from f8a_worker.ecosystem_registry import EcosystemRegistry
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.models import Ecosystem
+
+
+class _Session(object):
+    """Fake database session counting queries."""
+
+    def __init__(self, *ecosystems):
+        self.ecosystems = list(ecosystems)
+        self.queries = 0
+
+    def query(self, model):
+        assert model is Ecosystem
+        self.queries += 1
+        return self.ecosystems
+
+
+NPM = Ecosystem(id=1, name='npm', backend=EcosystemBackend.npm,
+                fetch_url='https://registry.npmjs.org/')
+PYPI = Ecosystem(id=2, name='pypi', backend=EcosystemBackend.pypi,
+                 fetch_url='https://pypi.org/pypi')
+
+
+class TestEcosystemRegistry(object):
+    """Tests for EcosystemRegistry."""
+
+    def test_by_name(self):
+        """Test that ecosystems are loaded from database only once."""
+        registry = EcosystemRegistry(refresh_interval=0)
+        session = _Session(NPM, PYPI)
+        for _ in range(3):
+            npm = registry.by_name(session, 'npm')
+            assert npm.id == 1
+            assert npm.fetch_url == 'https://registry.npmjs.org/'
+            assert npm.is_backed_by(EcosystemBackend.npm)
+            assert npm.backend.name == 'npm'
+        assert registry.by_name(session, 'pypi').is_backed_by(EcosystemBackend.pypi)
+        assert session.queries == 1
+
+        with pytest.raises(AttributeError):
+            npm.name = 'pypi'
+
+    def test_unknown_ecosystem(self):
+        """Test that registry is reloaded before giving up on unknown ecosystem."""
+        registry = EcosystemRegistry(refresh_interval=0, miss_refresh_interval=5)
+        registry.by_name(_Session(NPM), 'npm')
+
+        registry._loaded_at -= 6
+        assert registry.by_name(_Session(NPM, PYPI), 'pypi').id == 2
+
+        registry._loaded_at -= 6
+        session = _Session(NPM, PYPI)
+        with pytest.raises(NoResultFound):
+            registry.by_name(session, 'maven')
+        assert session.queries == 1
+
+    def test_unknown_ecosystem_rate_limited(self):
+        """Test that lookups of unknown ecosystems reload registry at most once per interval."""
+        registry = EcosystemRegistry(refresh_interval=0, miss_refresh_interval=5)
+        registry.by_name(_Session(NPM), 'npm')
+
+        session = _Session(NPM, PYPI)
+        for _ in range(3):
+            with pytest.raises(NoResultFound):
+                registry.by_name(session, 'maven')
+        assert session.queries == 0
+        with pytest.raises(NoResultFound):
+            registry.by_name(session, 'pypi')
+
+        registry._loaded_at -= 6
+        assert registry.by_name(session, 'pypi').id == 2
+        with pytest.raises(NoResultFound):
+            registry.by_name(session, 'maven')
+        assert session.queries == 1
+
+    def test_refresh_interval(self):
+        """Test that registry is reloaded once the refresh interval passes."""
+        registry = EcosystemRegistry(refresh_interval=60)
+        registry.by_name(_Session(NPM), 'npm')
+
+        session = _Session(NPM)
+        registry.by_name(session, 'npm')
+        assert session.queries == 0
+
+        registry._loaded_at -= 61
+        session = _Session(NPM)
+        registry.by_name(session, 'npm')
+        assert session.queries == 1
+
+        registry.clear()
+        session = _Session(NPM)
+        registry.by_name(session, 'npm')
+        assert session.queries == 1
@@ -0,0 +1,84 @@
+"""Tests covering code in graphutils.py."""
+
+import json
+
+import flexmock
+import requests
+
+from f8a_worker import graphutils
+from f8a_worker.graphutils import get_epvs_presence, get_epvs_data
+
+
+class _GraphSession(object):
+    """Fake session answering Gremlin requests from a list of version and package vertices."""
+
+    def __init__(self, vertices, status_code=200):
+        self.vertices = vertices
+        self.status_code = status_code
+        self.payloads = []
+
+    def post(self, url, data):
+        payload = json.loads(data)
+        self.payloads.append(payload)
+        bindings = payload['bindings']
+        matching = [v for v in self.vertices
+                    if v['version']['pecosystem'][0] in bindings['ecosystems'] and
+                    v['version']['pname'][0] in bindings['names'] and
+                    v['version']['version'][0] in bindings['versions']]
+        if 'select' in payload['gremlin']:
+            data = matching
+        else:
+            data = [v['version'] for v in matching]
+
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = json.dumps({'result': {'data': data}}).encode()
+        return response
+
+
+def _vertex(ecosystem, name, version, **properties):
+    return {
+        'version': dict({'pecosystem': [ecosystem], 'pname': [name], 'version': [version]},
+                        **properties),
+        'package': {'ecosystem': [ecosystem], 'name': [name]}
+    }
+
+
+class TestBatchedGraphQueries(object):
+    """Tests for batched EPV lookups."""
+
+    VERTICES = [
+        _vertex('npm', 'serve-static', '1.7.1', licenses=['MIT']),
+        _vertex('npm', 'serve-static', '1.7.2'),
+        _vertex('pypi', 'requests', '2.16.2'),
+    ]
+
+    def test_presence(self):
+        """Test that presence of EPVs is checked by chunked requests."""
+        session = _GraphSession(self.VERTICES)
+        flexmock(graphutils, get_session_retry=lambda: session)
+
+        epvs = [('npm', 'serve-static', '1.7.1'), ('npm', 'serve-static', '1.7.3'),
+                ('pypi', 'requests', '2.16.2'), ('pypi', 'serve-static', '1.7.2')]
+        assert get_epvs_presence(epvs, chunk_size=3) == {
+            ('npm', 'serve-static', '1.7.1'): True,
+            ('npm', 'serve-static', '1.7.3'): False,
+            ('pypi', 'requests', '2.16.2'): True,
+            # matched by within(), but not requested
+            ('pypi', 'serve-static', '1.7.2'): False
+        }
+        assert len(session.payloads) == 2
+
+    def test_presence_failed_query(self):
+        """Test that EPVs are left out if the graph query fails."""
+        flexmock(graphutils, get_session_retry=lambda: _GraphSession(self.VERTICES, 500))
+        assert get_epvs_presence([('npm', 'serve-static', '1.7.1')]) == {}
+
+    def test_data(self):
+        """Test that version and package data are returned for requested EPVs only."""
+        flexmock(graphutils, get_session_retry=lambda: _GraphSession(self.VERTICES))
+
+        data = get_epvs_data([('npm', 'serve-static', '1.7.1'), ('npm', 'express', '1.7.2')])
+        assert list(data.keys()) == [('npm', 'serve-static', '1.7.1')]
+        assert data[('npm', 'serve-static', '1.7.1')]['version']['licenses'] == ['MIT']
+        assert data[('npm', 'serve-static', '1.7.1')]['package']['name'] == ['serve-static']
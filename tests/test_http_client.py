@@ -0,0 +1,68 @@
+"""Tests covering code in http_client.py."""
+
+import flexmock
+import pytest
+import requests
+from requests.exceptions import ConnectionError
+
+from f8a_worker.http_client import HTTPClient, PooledSession
+from f8a_worker.utils import get_session_retry
+
+
+class TestHTTPClient(object):
+    """Tests for HTTPClient."""
+
+    def test_sessions_are_shared(self):
+        """Test that sessions are reused for the same retry configuration."""
+        client = HTTPClient()
+        session = client.session()
+        assert isinstance(session, PooledSession)
+        assert client.session() is session
+        assert client.session(retries=5) is not session
+        assert client.session(retries=5) is client.session(retries=5)
+
+    def test_sessions_are_not_inherited_by_forked_processes(self):
+        """Test that a new session is created when running in a different process."""
+        client = HTTPClient()
+        session = client.session()
+        flexmock(client, _pid=-1)
+        assert client.session() is not session
+
+    @pytest.mark.parametrize('prefix', ['http://', 'https://'])
+    def test_retries_are_mounted(self, prefix):
+        """Test that retries are used for both http:// and https:// URLs."""
+        session = HTTPClient().session(retries=7)
+        assert session.get_adapter(prefix + 'example.com').max_retries.total == 7
+
+        session = get_session_retry(retries=4)
+        assert session.get_adapter(prefix + 'example.com').max_retries.total == 4
+        assert get_session_retry(retries=4) is session
+
+        session = get_session_retry(retries=2, session=requests.Session())
+        assert session.get_adapter(prefix + 'example.com').max_retries.total == 2
+
+    def test_metrics(self):
+        """Test that per-host metrics are recorded and default timeout is applied."""
+        client = HTTPClient(timeout=5)
+        response = requests.Response()
+        response.status_code = 200
+        flexmock(requests.Session).should_receive('request')\
+            .with_args('GET', 'https://registry.npmjs.org/serve-static', timeout=5)\
+            .and_return(response).twice()
+        flexmock(requests.Session).should_receive('request')\
+            .with_args('GET', 'https://pypi.org/pypi/requests/json', timeout=1)\
+            .and_raise(ConnectionError).once()
+
+        client.get('https://registry.npmjs.org/serve-static')
+        client.get('https://registry.npmjs.org/serve-static')
+        with pytest.raises(ConnectionError):
+            client.get('https://pypi.org/pypi/requests/json', timeout=1)
+
+        stats = client.stats()
+        assert stats['registry.npmjs.org']['requests'] == 2
+        assert stats['registry.npmjs.org']['failed'] == 0
+        assert stats['pypi.org']['requests'] == 1
+        assert stats['pypi.org']['failed'] == 1
+
+        client.reset_stats()
+        assert client.stats() == {}
@@ -0,0 +1,71 @@
+"""Tests covering code in models.py."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flexmock import flexmock
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from f8a_worker import task_metrics
+from f8a_worker.models import MeteredQueuePool, create_db_engine
+from f8a_worker.task_metrics import collect_task_metrics
+
+
+class TestConnectionPool(object):
+    """Tests for pooled database engine."""
+
+    def test_pool_stats(self, tmpdir):
+        """Test that pool usage is tracked."""
+        engine = create_db_engine('sqlite:///' + str(tmpdir.join('db.sqlite')), pool_size=2,
+                                  max_overflow=1, pool_pre_ping=False)
+        assert isinstance(engine.pool, MeteredQueuePool)
+
+        connections = [engine.connect() for _ in range(3)]
+        stats = engine.pool.stats()
+        assert stats['size'] == 2
+        assert stats['checked_out'] == 3
+        assert stats['overflow'] == 1
+        assert stats['waits'] == 3
+        assert stats['max_wait_time'] <= stats['wait_time']
+
+        for connection in connections:
+            connection.close()
+        stats = engine.pool.stats()
+        assert stats['checked_out'] == 0
+        assert stats['checked_in'] == 2
+
+    def test_per_thread_sessions(self, tmpdir):
+        """Test that threads get their own sessions sharing one pool."""
+        engine = create_db_engine('sqlite:///' + str(tmpdir.join('db.sqlite')), pool_size=4,
+                                  connect_args={'check_same_thread': False})
+        session = scoped_session(sessionmaker(bind=engine))
+
+        def _query(_):
+            assert session.execute('SELECT 1').scalar() == 1
+            thread_session = session()
+            session.remove()
+            return thread_session
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            sessions = list(executor.map(_query, range(16)))
+        assert len(set(sessions)) == 16
+        assert engine.pool.stats()['checked_out'] == 0
+        assert engine.pool.stats()['checked_in'] <= 4
+
+    def test_statement_metrics(self, tmpdir):
+        """Test that statements are measured as postgres phase of the running task."""
+        flexmock(task_metrics, _exporters=[])
+        engine = create_db_engine('sqlite:///' + str(tmpdir.join('db.sqlite')))
+        session = scoped_session(sessionmaker(bind=engine))
+        session.execute('SELECT 1')
+
+        with collect_task_metrics('metadata', enabled=True) as metrics:
+            assert session.execute('SELECT 1').scalar() == 1
+            with pytest.raises(OperationalError):
+                session.execute('SELECT * FROM no_such_table')
+        session.execute('SELECT 1')
+
+        phase = metrics.summary()['phases']['postgres']
+        assert phase['count'] == 2
+        assert phase['time'] > 0
@@ -0,0 +1,49 @@
+"""Tests covering code in npm_semver.py."""
+
+import json
+import os
+import subprocess
+
+import pytest
+
+from f8a_worker.npm_semver import valid_range
+
+SEMVER_RANGER = '/usr/bin/semver-ranger'
+
+# version ranges -> output of semver.validRange() of node-semver 5.7.1
+with open(os.path.join(os.path.dirname(__file__), 'data', 'npm_semver', 'ranges.json')) as f:
+    RANGES = json.load(f)
+
+
+@pytest.mark.parametrize('spec, expected', sorted(RANGES.items()))
+def test_valid_range_corpus(spec, expected):
+    """Test valid_range() gives the same result as node-semver."""
+    assert valid_range(spec) == expected
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('^1.2.3', '>=1.2.3 <2.0.0'),
+    ('^0.2.3', '>=0.2.3 <0.3.0'),
+    ('^0.0.3', '>=0.0.3 <0.0.4'),
+    ('~1.2', '>=1.2.0 <1.3.0'),
+    ('~1.2.3-beta.2', '>=1.2.3-beta.2 <1.3.0'),
+    ('>1.2', '>=1.3.0'),
+    ('<=0.7.x', '<0.8.0'),
+    ('1.2 - 2', '>=1.2.0 <3.0.0'),
+    ('1.x || >=2.5.0', '>=1.0.0 <2.0.0||>=2.5.0'),
+    ('> 1.2.3 <  v2.0.0+build', '>1.2.3 <2.0.0'),
+    ('', '*'),
+    ('foo', None),
+    ('01.2.3', None),
+])
+def test_valid_range(spec, expected):
+    """Test valid_range()."""
+    assert valid_range(spec) == expected
+
+
+@pytest.mark.skipif(not os.path.exists(SEMVER_RANGER), reason='semver-ranger is not installed')
+def test_valid_range_semver_ranger():
+    """Test valid_range() gives the same result as semver-ranger."""
+    for spec in RANGES:
+        output = subprocess.check_output([SEMVER_RANGER, spec], universal_newlines=True).strip()
+        assert valid_range(spec) == (None if output == 'null' else output), spec
@@ -2,16 +2,20 @@
 
 from pathlib import Path
 
+import io
+import json
 import pytest
 import subprocess
 import requests
+import tarfile
 import tempfile
 import shutil
 import stat
+import zipfile
 
 from f8a_worker.process import Archive
-from f8a_worker.errors import TaskError, NotABugTaskError
-from f8a_worker.process import Git, IndianaJones
+from f8a_worker.errors import TaskError, NotABugTaskError, ArchiveLimitError
+from f8a_worker.process import Git, IndianaJones, _npm_checksum
 
 
 class TestGit(object):
@@ -50,32 +54,20 @@ class TestIndianaJones(object):
     """Test IndianaJones class."""
 
     @pytest.mark.parametrize("name, version, expected_digest", [
-        # Prior to npm-2.x.x (Fedora 24)
-        # npm client was repackaging modules on download. It modified file permissions inside
-        # package.tgz so they matched UID/GID of a user running npm command. Therefore
-        # this hash was valid only for user 1000:1000.
-        # If the test that checks this fails, it means that the feature is back in npm and we can't
-        # rely on the digest of the npm downloaded tarball matching the upstream one.
-        # In that case we should probably consider downloading tarballs directly from
-        # registry.npmjs.org, because for example AnityaTask relies on this.
+        # digest of the tarball as published in the registry
         ("abbrev", "1.0.7", "30f6880e415743312a0021a458dd6d26a7211f803a42f1e4a30ebff44d26b7de"),
         ("abbrev", "1.0.4", "8dc0f480571a4a19e74f1abd4f31f6a70f94953d1ccafa16ed1a544a19a6f3a8")
     ])
     def test_fetch_npm_specific(self, tmpdir, npm, name, version, expected_digest):
         """Test fetching of npm artifact."""
-        cache_path = Path(subprocess.check_output(["npm", "config", "get", "cache"],
-                                                  universal_newlines=True).strip())
-        assert cache_path.name == ".npm"
         package_digest, path = IndianaJones.fetch_artifact(npm,
                                                            artifact=name,
                                                            version=version,
                                                            target_dir=str(tmpdir))
-        assert len(list((cache_path / name).glob('*'))) == 1, \
-            "there should be just one version of the artifact in the NPM cache"
         assert package_digest == expected_digest
         assert Path(path).exists()
-        assert (cache_path / name / version).exists()
         assert Path(str(tmpdir / "package.tgz")).exists()
+        assert json.loads((Path(str(tmpdir)) / "package.json").read_text())["version"] == version
 
     @pytest.mark.parametrize("name, version, expected_digest", [
         ("abbrev", ">1.0.7", "30f6880e415743312a0021a458dd6d26a7211f803a42f1e4a30ebff44d26b7de"),
@@ -84,9 +76,6 @@ class TestIndianaJones(object):
     def test_fetch_version_range_npm_specific(self, tmpdir, npm, name, version, expected_digest):
         """Test fetching of npm artifact with version range."""
         with pytest.raises(NotABugTaskError):
-            cache_path = Path(subprocess.check_output(["npm", "config", "get", "cache"],
-                                                      universal_newlines=True).strip())
-            assert cache_path
             package_digest, path = IndianaJones.fetch_artifact(npm,
                                                                artifact=name,
                                                                version=version,
@@ -165,6 +154,21 @@ class TestIndianaJones(object):
         assert path.name == '{}.tar.gz'.format(version)
         assert path.exists()
 
+    @pytest.mark.parametrize('dist, algorithm, expected', [
+        ({'shasum': 'AC14261EFA7BB9F590BDBA8F9778AB47F25EEA64'},
+         'sha1', 'ac14261efa7bb9f590bdba8f9778ab47f25eea64'),
+        ({'integrity': 'sha1-rBQmHvp7ufWQvbqPl3irR/Je6mQ= sha512-3q2+7w==',
+          'shasum': 'ac14261efa7bb9f590bdba8f9778ab47f25eea64'},
+         'sha512', 'deadbeef'),
+        ({'integrity': 'sha256-*invalid* sha1-rBQmHvp7ufWQvbqPl3irR/Je6mQ=?foo'},
+         'sha1', 'ac14261efa7bb9f590bdba8f9778ab47f25eea64'),
+        ({'integrity': 'md5-3q2+7w=='}, None, None),
+        ({}, None, None),
+    ])
+    def test_npm_checksum(self, dist, algorithm, expected):
+        """Test selection of the checksum of npm tarball."""
+        assert _npm_checksum(dist) == (algorithm, expected)
+
 
 class TestArchive(object):
     """Test Archive class."""
@@ -217,3 +221,103 @@ class TestArchive(object):
             assert file_path.stat().st_mode & stat.S_IRUSR
             shutil.rmtree(str(dest_dir), ignore_errors=True)
             assert not dest_dir.exists()
+
+    @staticmethod
+    def _create_tarball(path, files, symlinks=None):
+        with tarfile.open(str(path), 'w:gz') as tar:
+            for name, target in (symlinks or {}).items():
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.SYMTYPE
+                info.linkname = target
+                tar.addfile(info)
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mode = 0o755 if name.endswith('.sh') else 0o400
+                tar.addfile(info, io.BytesIO(content))
+
+    FILES = {
+        'package/package.json': b'{}',
+        'package/index.js': b'module.exports = 1;',
+        'package/bin/run.sh': b'#!/bin/sh',
+        'package/lib/big.bin': b'0' * 1000,
+    }
+
+    @pytest.mark.parametrize('suffix', ['.tgz', '.zip'])
+    def test_extract(self, tmpdir, suffix):
+        """Test in-process extraction of tarballs and zip files."""
+        archive_path = tmpdir.join('archive' + suffix)
+        if suffix == '.zip':
+            with zipfile.ZipFile(str(archive_path), 'w') as archive:
+                for name, content in self.FILES.items():
+                    archive.writestr(name, content)
+        else:
+            self._create_tarball(archive_path, self.FILES)
+
+        dest_dir = Path(str(tmpdir)) / 'dest_dir'
+        stats = Archive.extract(str(archive_path), str(dest_dir))
+        assert stats == {'entries': 4, 'bytes': 1030, 'skipped': 0}
+        for name, content in self.FILES.items():
+            path = dest_dir / name
+            assert path.read_bytes() == content
+            assert path.stat().st_mode & (stat.S_IRUSR | stat.S_IWUSR | stat.S_IWGRP)
+        if suffix == '.tgz':
+            assert (dest_dir / 'package/bin/run.sh').stat().st_mode & stat.S_IXGRP
+            assert not (dest_dir / 'package/index.js').stat().st_mode & stat.S_IXUSR
+
+    def test_extract_manifests_only(self, tmpdir):
+        """Test extracting only manifest files."""
+        archive_path = tmpdir.join('archive.tgz')
+        self._create_tarball(archive_path, self.FILES)
+
+        dest_dir = Path(str(tmpdir)) / 'dest_dir'
+        stats = Archive.extract(str(archive_path), str(dest_dir), manifests_only=True)
+        assert stats == {'entries': 1, 'bytes': 2, 'skipped': 3}
+        assert [str(p.relative_to(dest_dir)) for p in dest_dir.glob('**/*') if p.is_file()] == \
+            ['package/package.json']
+
+    @pytest.mark.parametrize('limits', [
+        {'max_size': 1000},
+        {'max_entries': 3},
+    ])
+    def test_extract_limits(self, tmpdir, limits):
+        """Test that extraction is stopped if archive is too large."""
+        archive_path = tmpdir.join('archive.tgz')
+        self._create_tarball(archive_path, self.FILES)
+        with pytest.raises(ArchiveLimitError):
+            Archive.extract(str(archive_path), str(tmpdir.join('dest_dir')), **limits)
+
+    def test_extract_without_limits(self, tmpdir):
+        """Test that limits set to 0 are not enforced."""
+        archive_path = tmpdir.join('archive.tgz')
+        self._create_tarball(archive_path, self.FILES)
+        stats = Archive.extract(str(archive_path), str(tmpdir.join('dest_dir')),
+                                max_size=0, max_entries=0)
+        assert stats == {'entries': 4, 'bytes': 1030, 'skipped': 0}
+
+    def test_extract_colliding_members(self, tmpdir):
+        """Test that a member colliding with a directory is skipped, the rest is extracted."""
+        archive_path = tmpdir.join('archive.tgz')
+        self._create_tarball(archive_path, {'..foo': b'1', 'dir/file': b'2', 'dir': b'3',
+                                            'last': b'4'})
+
+        dest_dir = Path(str(tmpdir)) / 'dest_dir'
+        stats = Archive.extract(str(archive_path), str(dest_dir))
+        assert stats == {'entries': 3, 'bytes': 3, 'skipped': 1}
+        assert (dest_dir / '..foo').read_bytes() == b'1'
+        assert (dest_dir / 'dir' / 'file').read_bytes() == b'2'
+        assert (dest_dir / 'last').read_bytes() == b'4'
+
+    def test_extract_outside_of_destination(self, tmpdir):
+        """Test that archive members can't be written outside of the destination directory."""
+        archive_path = tmpdir.join('archive.tgz')
+        self._create_tarball(archive_path, {'../evil': b'', 'link/evil': b'', 'ok': b''},
+                             symlinks={'link': '..', 'abs_link': '/etc/passwd'})
+
+        dest_dir = Path(str(tmpdir)) / 'dest_dir'
+        stats = Archive.extract(str(archive_path), str(dest_dir))
+        # symbolic links are skipped, so link/evil ends up in a regular directory
+        assert stats == {'entries': 2, 'bytes': 0, 'skipped': 3}
+        assert sorted(p.name for p in dest_dir.iterdir()) == ['link', 'ok']
+        assert not (dest_dir / 'link').is_symlink()
+        assert not Path(str(tmpdir.join('evil'))).exists()
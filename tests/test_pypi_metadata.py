@@ -0,0 +1,92 @@
+"""Tests covering code in pypi_metadata.py."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from f8a_worker.defaults import F8AConfiguration
+from f8a_worker.ecosystem_registry import EcosystemRecord
+from f8a_worker.errors import TaskError
+from f8a_worker.models import Ecosystem
+from f8a_worker.process import IndianaJones
+from f8a_worker.pypi_metadata import PypiMetadataClient, pypi_metadata
+from f8a_worker.solver import PypiReleasesFetcher
+
+from registry_stub import RegistryStub  # tools/ is added to sys.path by conftest
+
+
+@pytest.fixture
+def pypi():
+    """Provide PyPI ecosystem without database, pointed to the registry stub."""
+    return EcosystemRecord.from_model(Ecosystem(id=1, name='pypi', _backend='pypi',
+                                                fetch_url='https://pypi.org/pypi/'))
+
+
+class TestPypiMetadataClient(object):
+    """Tests of PypiMetadataClient."""
+
+    def test_document_is_shared(self, registry_stub, pypi, tmpdir):
+        """Test that solver and artifact fetching share a single fetch of the document."""
+        assert set(PypiReleasesFetcher(pypi).fetch_releases('Six')[1]) == {'1.15.0', '1.16.0'}
+        digest, path = IndianaJones.fetch_artifact(pypi, 'six', '1.16.0', str(tmpdir))
+
+        assert digest == 'c46a5abf2b9641d08e197a324d25fa6908fde82c836c5fa77e3149fc7358f9e2'
+        assert os.path.basename(path) == 'six-1.16.0.tar.gz'
+        # one request for the document, one for the release file
+        assert registry_stub.requests == 2
+        assert pypi_metadata.stats == {'hits': 1, 'misses': 1, 'revalidated': 0}
+
+    def test_expired_document_is_revalidated(self, registry_stub, pypi):
+        """Test that expired documents are revalidated using a conditional request."""
+        client = PypiMetadataClient(ttl=0)
+        project = client.get(pypi.fetch_url, 'six')
+        assert project.validators['etag']
+        assert client.get(pypi.fetch_url, 'six').document is project.document
+        assert client.stats == {'hits': 0, 'misses': 1, 'revalidated': 1}
+
+    def test_releases_if_modified(self, registry_stub, pypi):
+        """Test that PypiReleasesFetcher reports unmodified releases."""
+        fetcher = PypiReleasesFetcher(pypi)
+        fetcher.fetch_releases('six')
+        validators = fetcher.pop_validators('six')
+        assert fetcher.fetch_releases_if_modified('six', validators) is None
+        assert fetcher.fetch_releases_if_modified('six', {'etag': '"other"'})[0] == 'six'
+
+    def test_unknown_project(self, registry_stub, pypi):
+        """Test that unknown projects are not cached."""
+        client = PypiMetadataClient()
+        assert client.get(pypi.fetch_url, 'not-in-pypi') is None
+        assert client.get(pypi.fetch_url, 'not-in-pypi') is None
+        assert registry_stub.requests == 2
+
+    def test_lru(self, registry_stub, pypi):
+        """Test that only max_size documents are kept."""
+        client = PypiMetadataClient(max_size=1, ttl=60)
+        client.get(pypi.fetch_url, 'six')
+        # the same stub under a different name, documents are cached per fetch URL
+        client.get(pypi.fetch_url.replace('127.0.0.1', 'localhost'), 'six')
+        client.get(pypi.fetch_url, 'six')
+        assert client.stats['misses'] == 3
+
+    def test_digest_mismatch(self, registry_stub, tmpdir, monkeypatch):
+        """Test that release files not matching the published digest are rejected."""
+        data_dir = os.path.join(str(tmpdir), 'registry')
+        shutil.copytree(os.path.join(os.path.dirname(__file__), 'data', 'registry'), data_dir)
+        document_path = os.path.join(data_dir, 'pypi', 'six', 'json', 'index.json')
+        with open(document_path) as f:
+            document = json.load(f)
+        document['releases']['1.16.0'][0]['digests']['sha256'] = '0' * 64
+        with open(document_path, 'w') as f:
+            json.dump(document, f)
+
+        target_dir = os.path.join(str(tmpdir), 'target')
+        os.mkdir(target_dir)
+        with RegistryStub(data_dir) as stub:
+            monkeypatch.setattr(F8AConfiguration, 'REGISTRY_MIRROR_URL', stub.url)
+            ecosystem = EcosystemRecord.from_model(Ecosystem(id=1, name='pypi', _backend='pypi',
+                                                             fetch_url='https://pypi.org/pypi/'))
+            with pytest.raises(TaskError):
+                IndianaJones.fetch_artifact(ecosystem, 'six', '1.16.0', target_dir)
+            assert not os.path.exists(os.path.join(target_dir, 'six-1.16.0.tar.gz'))
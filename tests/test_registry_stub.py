@@ -0,0 +1,90 @@
+"""Tests of fetching releases and artifacts from the registry stub (tools/registry_stub.py)."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from f8a_worker.defaults import F8AConfiguration
+from f8a_worker.ecosystem_registry import EcosystemRecord
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.errors import NotABugTaskError, TaskError
+from f8a_worker.models import Ecosystem
+from f8a_worker.process import IndianaJones
+from f8a_worker.solver import get_ecosystem_fetcher
+from f8a_worker.utils import compute_digest
+
+from registry_stub import RegistryStub  # tools/ is added to sys.path by conftest
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data', 'registry')
+
+
+def _ecosystem(backend):
+    return EcosystemRecord.from_model(Ecosystem(id=1, name=backend.name, _backend=backend.name,
+                                                fetch_url='https://example.com/'))
+
+
+class TestRegistryStub(object):
+    """Tests of running offline against the registry stub."""
+
+    def test_fetch_url(self, registry_stub):
+        """Test that fetch URLs of mirrored ecosystems point to the stub."""
+        assert _ecosystem(EcosystemBackend.npm).fetch_url == registry_stub.url + '/npm/'
+        assert _ecosystem(EcosystemBackend.go).fetch_url == 'https://example.com/'
+
+    @pytest.mark.parametrize('backend, package, releases', [
+        (EcosystemBackend.npm, 'left-pad', {'1.2.0', '1.3.0'}),
+        (EcosystemBackend.pypi, 'six', {'1.15.0', '1.16.0'}),
+        (EcosystemBackend.maven, 'junit:junit', {'4.11', '4.12'}),
+        (EcosystemBackend.nuget, 'Newtonsoft.Json', {'12.0.2', '12.0.3'}),
+    ])
+    def test_fetch_releases(self, registry_stub, backend, package, releases):
+        """Test that releases are fetched from the stub."""
+        fetcher = get_ecosystem_fetcher(_ecosystem(backend), cached=False)
+        assert set(fetcher.fetch_releases(package)[1]) == releases
+        assert registry_stub.requests > 0
+
+    @pytest.mark.parametrize('backend, package, version, artifact', [
+        (EcosystemBackend.npm, 'left-pad', '1.3.0', 'package.tgz'),
+        (EcosystemBackend.pypi, 'six', '1.16.0', 'six-1.16.0.tar.gz'),
+        (EcosystemBackend.maven, 'junit:junit', '4.12', 'junit-4.12.jar'),
+        (EcosystemBackend.nuget, 'Newtonsoft.Json', '12.0.3', 'newtonsoft.json.12.0.3.nupkg'),
+    ])
+    def test_fetch_artifact(self, registry_stub, tmpdir, backend, package, version, artifact):
+        """Test that artifacts are downloaded from the stub."""
+        digest, artifact_path = IndianaJones.fetch_artifact(_ecosystem(backend), package,
+                                                            version, str(tmpdir))
+        assert os.path.basename(artifact_path) == artifact
+        assert digest == compute_digest(artifact_path)
+        assert registry_stub.requests > 0
+        assert not os.path.exists(os.path.join(str(tmpdir), '.git'))
+
+    def test_fetch_npm_artifact_checksum(self, registry_stub, tmpdir, monkeypatch):
+        """Test that npm tarballs not matching the package document are rejected."""
+        data_dir = os.path.join(str(tmpdir), 'registry')
+        shutil.copytree(DATA_DIR, data_dir)
+        document_path = os.path.join(data_dir, 'npm', 'left-pad', 'index.json')
+        with open(document_path) as f:
+            document = json.load(f)
+        document['versions']['1.3.0']['dist']['shasum'] = '0' * 40
+        with open(document_path, 'w') as f:
+            json.dump(document, f)
+
+        target_dir = os.path.join(str(tmpdir), 'target')
+        os.mkdir(target_dir)
+        with RegistryStub(data_dir) as stub:
+            monkeypatch.setattr(F8AConfiguration, 'REGISTRY_MIRROR_URL', stub.url)
+            ecosystem = _ecosystem(EcosystemBackend.npm)
+            with pytest.raises(TaskError):
+                IndianaJones.fetch_artifact(ecosystem, 'left-pad', '1.3.0', target_dir)
+            assert not os.path.exists(os.path.join(target_dir, 'package.tgz'))
+            # tarball of 1.2.0 is not recorded
+            with pytest.raises(NotABugTaskError):
+                IndianaJones.fetch_artifact(ecosystem, 'left-pad', '1.2.0', target_dir)
+
+    def test_not_found(self, registry_stub):
+        """Test that unknown packages and paths outside data are not served."""
+        fetcher = get_ecosystem_fetcher(_ecosystem(EcosystemBackend.npm), cached=False)
+        assert fetcher.fetch_releases('express') == ('express', [])
+        assert fetcher.fetch_releases('../../test_base.py') == ('../../test_base.py', [])
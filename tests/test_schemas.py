@@ -5,9 +5,13 @@
 import json
 import os
 
+import jsonschema
 import pytest
+from flexmock import flexmock
 
+from f8a_worker import schemas
 from f8a_worker.schemas import (SchemaRef, SchemaLibrary,
+                                CompiledSchemas,
                                 BundledSchemaLibrary,
                                 BundledDynamicSchemaLibrary,
                                 SchemaLookupError,
@@ -142,3 +146,61 @@ class TestSchemaSequence:
         """Test the function assert_no_two_consecutive_schemas_are_same for all worker schemas."""
         assert_no_two_consecutive_schemas_are_same(load_all_worker_schemas)
     # TODO: test for wrong input, test for empty list of schemas etc.
+
+
+@pytest.mark.offline
+class TestCompiledSchemas(object):
+    """Tests for the CompiledSchemas class."""
+
+    data_path = os.path.join(os.path.dirname(__file__), 'data')
+    results = {
+        SchemaRef('metadata', '4-0-0'): 'metadata.json',
+        SchemaRef('source_licenses', '3-0-0'): 'source_licenses.json',
+        SchemaRef('digests', '1-0-0'): 'digests.json',
+    }
+
+    def _load_result(self, schema_ref):
+        with open(os.path.join(self.data_path, 'results', self.results[schema_ref])) as f:
+            return json.load(f)
+
+    @pytest.mark.parametrize('backend', ['jsonschema', 'fastjsonschema'])
+    def test_validate(self, backend):
+        """Test that valid results pass and invalid are reported like by jsonschema."""
+        if backend == 'fastjsonschema' and schemas.fastjsonschema is None:
+            pytest.skip('fastjsonschema is not installed')
+
+        library = SchemaLibrary(os.path.join(self.data_path, 'schemas'))
+        validators = CompiledSchemas(library, backend=backend)
+        for schema_ref in self.results:
+            result = self._load_result(schema_ref)
+            validators.validate(result, schema_ref)
+            assert result == self._load_result(schema_ref)
+
+            result['status'] = 'unknown'
+            with pytest.raises(jsonschema.exceptions.ValidationError):
+                validators.validate(result, schema_ref)
+
+    def test_validators_are_reused(self):
+        """Test that schemas are loaded and checked only once."""
+        library = SchemaLibrary(os.path.join(self.data_path, 'schemas'))
+        schema_ref = SchemaRef('digests', '1-0-0')
+        flexmock(library).should_call('load_schema').with_args(schema_ref).once()
+
+        validators = CompiledSchemas(library)
+        validators.precompile([schema_ref])
+        result = self._load_result(schema_ref)
+        for _ in range(3):
+            validators.validate(result, schema_ref)
+
+        del result['summary']
+        schema = SchemaLibrary(os.path.join(self.data_path, 'schemas')).load_schema(schema_ref)
+        with pytest.raises(jsonschema.exceptions.ValidationError) as excinfo:
+            validators.validate(result, schema_ref)
+        with pytest.raises(jsonschema.exceptions.ValidationError) as expected:
+            jsonschema.validate(result, schema)
+        assert str(excinfo.value) == str(expected.value)
+
+    def test_unknown_backend(self):
+        """Test that unknown validator backend is rejected."""
+        with pytest.raises(ValueError):
+            CompiledSchemas(SchemaLibrary(self.data_path), backend='unknown')
@@ -4,12 +4,20 @@ import pytest
 
 import datetime
 import flexmock
-from f8a_worker.models import Analysis, Package, Version
+import json
+import os
+import threading
+from functools import cmp_to_key
+from f8a_worker.enums import EcosystemBackend
+from f8a_worker.models import Analysis, Ecosystem, Package, Version
+from f8a_worker.releases_cache import ReleasesCache
 from f8a_worker.solver import\
-    (get_ecosystem_solver, Dependency,
+    (get_ecosystem_solver, get_ecosystem_fetcher, Dependency,
      PypiDependencyParser, NpmDependencyParser, OSSIndexDependencyParser, NugetDependencyParser,
      GolangDependencyParser, MavenReleasesFetcher, NpmReleasesFetcher, NugetReleasesFetcher,
-     F8aReleasesFetcher, GolangReleasesFetcher, PypiReleasesFetcher)
+     F8aReleasesFetcher, GolangReleasesFetcher, PypiReleasesFetcher, CachedReleasesFetcher,
+     NugetSolver, GolangSolver, SolverException, ParsedVersion, ReleasesMatcher, compare_version,
+     sort_versions, MavenSolver, MavenVersion, MavenVersionRange)
 
 
 class TestDependencyParser(object):
@@ -64,6 +72,12 @@ class TestDependencyParser(object):
          [Dependency("name", [('>=', '0.7.0')]), Dependency("node", [('<', '1.0.0')])]),
         (["name latest"],
          [Dependency("name", [('>=', '0.0.0')])]),
+        (["name >=1.0.0 <2.0.0 >1.5.0"],
+         [Dependency("name", [[('>=', '1.0.0'), ('<', '2.0.0'), ('>', '1.5.0')]])]),
+        (["name 1.x || *"],
+         [Dependency("name", [[('>=', '1.0.0'), ('<', '2.0.0')], ('>=', '0.0.0')])]),
+        (["name git+https://github.com/foo/bar.git", "node ~1.2"],
+         [Dependency("node", [[('>=', '1.2.0'), ('<', '1.3.0')]])]),
     ])
     def test_npm_dependency_parser_parse(self, args, expected):
         """Test NpmDependencyParser.parse()."""
@@ -117,6 +131,16 @@ class TestDependencyParser(object):
          [Dependency("name", [('==', '1.0')])]),
         (["name >= 1.0, <2.0"],
          [Dependency("name", [[('>=', '1.0'), ('<', '2.0')]])]),
+        (["name~=1.4.5rc1"],
+         [Dependency("name", [[('>=', '1.4.5rc1'), ('<', '1.5')]])]),
+        (["name==1.2.*"],
+         [Dependency("name", [[('>=', '1.2.0'), ('<', '1.3.0')]])]),
+        (["name===1.0"],
+         [Dependency("name", [('==', '1.0')])]),
+        (["name[extra]>=1.0; python_version>'3' # comment"],
+         [Dependency("name", [('>=', '1.0')])]),
+        (["Name_With.dots"],
+         [Dependency("Name-With.dots", [('>=', '0.0.0')])]),
     ])
     def test_pypi_dependency_parser_parse(self, args, expected):
         """Test PypiDependencyParser.parse()."""
@@ -221,6 +245,53 @@ class TestSolver(object):
                        'NUnit': '3.2.1',
                        'NETStandard.Library': '1.6.0'}
 
+    @pytest.mark.parametrize('max_workers', [1, 4])
+    def test_concurrent_solve(self, max_workers):
+        """Test that concurrent and sequential solving give the same results."""
+        nuget = Ecosystem(name='nuget', backend=EcosystemBackend.nuget, fetch_url='')
+        fetcher = NugetReleasesFetcher(nuget)
+        releases = {'jQuery': ['1.4.3', '1.4.4', '1.6.0'],
+                    'NUnit': ['3.2.0', '3.2.1'],
+                    'Empty': []}
+        fetched = []
+
+        def _fetch_releases(package):
+            fetched.append(package)
+            return package, releases[package]
+
+        flexmock(fetcher).should_receive('fetch_releases').replace_with(_fetch_releases)
+        solver = NugetSolver(nuget, fetcher=fetcher)
+        solver._max_workers = max_workers
+
+        out = solver.solve(['jQuery [1.4.4, 1.6)', 'NUnit 3.2.1', 'Empty 1.0'])
+        assert out == {'jQuery': '1.4.4', 'NUnit': '3.2.1', 'Empty': None}
+        assert sorted(fetched) == ['Empty', 'NUnit', 'jQuery']
+
+        with pytest.raises(SolverException):
+            solver.solve(['NUnit 3.2.1', 'NUnit 3.2.0'])
+
+        with pytest.raises(SolverException):
+            solver.solve(['jQuery 1.4.4', 'Empty 1.0'], graceful=False)
+
+    def test_golang_prefetch(self):
+        """Test that only releases of Go dependencies without version are prefetched."""
+        go = Ecosystem(name='go', backend=EcosystemBackend.go, fetch_url='')
+        inner = GolangReleasesFetcher(go)
+        fetched = []
+
+        def _fetch_releases(package):
+            fetched.append(package)
+            return package, ['abc123']
+
+        flexmock(inner).should_receive('fetch_releases').replace_with(_fetch_releases)
+        solver = GolangSolver(go, fetcher=CachedReleasesFetcher(
+            inner, cache=ReleasesCache(cache_dir=''), ttl=60))
+        solver._max_workers = 4
+
+        solver.prefetch(['github.com/msrb/mux', 'github.com/gorilla/context 1a2b3c4',
+                         'github.com/pkg/errors'])
+        assert sorted(fetched) == ['github.com/msrb/mux', 'github.com/pkg/errors']
+
     @pytest.mark.parametrize('dependencies, expected', [
         ([], {}),
         (['github.com/msrb/mux'],
@@ -342,3 +413,209 @@ class TestFetcher(object):
         # check that with `all_versions` we return all the relevant ones
         assert set(s.solve(['f8a >=0.6.0'], all_versions=True)['f8a']) == \
             (versions - {'0.5.0', '0.5.1'})
+
+
+class TestCachedReleasesFetcher(object):
+    """Tests for CachedReleasesFetcher."""
+
+    NPM = Ecosystem(name='npm', backend=EcosystemBackend.npm,
+                    fetch_url='https://registry.npmjs.org/')
+
+    def test_default_fetcher_is_cached(self):
+        """Test that get_ecosystem_fetcher() wraps fetchers by default."""
+        fetcher = get_ecosystem_fetcher(self.NPM)
+        assert isinstance(fetcher, CachedReleasesFetcher)
+        assert isinstance(fetcher.fetcher, NpmReleasesFetcher)
+        assert isinstance(get_ecosystem_fetcher(self.NPM, cached=False), NpmReleasesFetcher)
+
+    def test_fresh_entry_is_served_from_cache(self):
+        """Test that releases are fetched only once while the cache entry is fresh."""
+        inner = NpmReleasesFetcher(self.NPM)
+        flexmock(inner).should_receive('fetch_releases').with_args('serve-static').\
+            and_return(('serve-static', ['1.0.0', '1.0.1'])).once()
+        fetcher = CachedReleasesFetcher(inner, cache=ReleasesCache(cache_dir=''), ttl=60)
+
+        assert fetcher.fetch_releases('serve-static') == ('serve-static', ['1.0.0', '1.0.1'])
+        assert fetcher.fetch_releases('serve-static') == ('serve-static', ['1.0.0', '1.0.1'])
+        assert fetcher.cache.stats['misses'] == 1
+        assert fetcher.cache.stats['hits'] == 1
+
+    def test_expired_entry_is_revalidated(self):
+        """Test that expired entries are revalidated using stored validators."""
+        inner = NpmReleasesFetcher(self.NPM)
+        flexmock(inner).should_receive('fetch_releases').\
+            and_return(('serve-static', ['1.0.0'])).once()
+        flexmock(inner).should_receive('pop_validators').and_return({'etag': 'W/"abc"'})
+        flexmock(inner).should_receive('fetch_releases_if_modified').\
+            with_args('serve-static', {'etag': 'W/"abc"'}).and_return(None).once()
+        fetcher = CachedReleasesFetcher(inner, cache=ReleasesCache(cache_dir=''), ttl=0)
+
+        assert fetcher.fetch_releases('serve-static') == ('serve-static', ['1.0.0'])
+        assert fetcher.fetch_releases('serve-static') == ('serve-static', ['1.0.0'])
+        assert fetcher.cache.stats['revalidated'] == 1
+
+    def test_empty_releases_are_not_cached(self):
+        """Test that empty release lists are not cached."""
+        inner = NpmReleasesFetcher(self.NPM)
+        flexmock(inner).should_receive('fetch_releases').and_return(('nonexistent', [])).twice()
+        fetcher = CachedReleasesFetcher(inner, cache=ReleasesCache(cache_dir=''), ttl=60)
+
+        assert fetcher.fetch_releases('nonexistent') == ('nonexistent', [])
+        assert fetcher.fetch_releases('nonexistent') == ('nonexistent', [])
+
+    def test_disk_tier_is_shared(self, tmpdir):
+        """Test that entries stored on disk are visible to other cache instances."""
+        inner = NpmReleasesFetcher(self.NPM)
+        flexmock(inner).should_receive('fetch_releases').\
+            and_return(('serve-static', ['1.0.0'])).once()
+        CachedReleasesFetcher(inner, cache=ReleasesCache(cache_dir=str(tmpdir)), ttl=60).\
+            fetch_releases('serve-static')
+
+        other_cache = ReleasesCache(cache_dir=str(tmpdir))
+        fetcher = CachedReleasesFetcher(inner, cache=other_cache, ttl=60)
+        assert fetcher.fetch_releases('serve-static') == ('serve-static', ['1.0.0'])
+        assert other_cache.stats['disk_hits'] == 1
+
+
+class TestVersionMatching(object):
+    """Tests for ParsedVersion, sort_versions() and ReleasesMatcher."""
+
+    RELEASES_DIR = os.path.join(os.path.dirname(__file__), 'data', 'releases')
+
+    @pytest.mark.parametrize('a, b', [
+        ('1.0', '1.0.0'),
+        ('1.0-rc1', '1.0'),
+        ('1.0.0.-1', '1.0'),
+        ('1.10', '1.9.9'),
+        ('2', '10'),
+    ])
+    def test_parsed_version_ordering(self, a, b):
+        """Test that ParsedVersion orders versions the same way as compare_version()."""
+        left, right = ParsedVersion.parse(a), ParsedVersion.parse(b)
+        expected = compare_version(a, b)
+        assert (left < right) == (expected < 0)
+        assert (left == right) == (expected == 0)
+        assert (left > right) == (expected > 0)
+        if left == right:
+            assert hash(left) == hash(right)
+
+    @pytest.mark.parametrize('spec', [
+        [('>=', '1.12.0')],
+        [[('>=', '1.12.0'), ('<', '1.13.0')], ('>', '1.30.0')],
+        [[('>', '1.0.0'), ('!=', '1.5.0'), ('<=', '1.6.0.0.0.1')]],
+        [('1.20.0',), ('==', '1.20.0.0'), ('=', '1.21')],
+        [('<', '0'), [('>=', '2'), ('<=', '1')]],
+    ])
+    def test_releases_matcher(self, spec):
+        """Test that ReleasesMatcher gives the same result as checking releases one by one."""
+        with open(os.path.join(self.RELEASES_DIR, 'botocore.json')) as f:
+            releases = json.load(f)
+        dependency = Dependency('botocore', spec)
+
+        expected = sorted([r for r in releases if r in dependency], key=cmp_to_key(compare_version))
+        assert ReleasesMatcher(releases).match(dependency) == expected
+        assert sort_versions(releases) == sorted(releases, key=cmp_to_key(compare_version))
+
+    def test_releases_matcher_no_releases(self):
+        """Test that ReleasesMatcher handles empty release list."""
+        assert ReleasesMatcher([]).match(Dependency('name', [('>=', '1.0')])) == []
+
+
+class TestMavenVersions(object):
+    """Tests for MavenVersion, MavenVersionRange and in-process MavenSolver resolution."""
+
+    MAVEN = Ecosystem(name='maven', backend=EcosystemBackend.maven,
+                      fetch_url='https://repo.maven.apache.org/maven2/')
+    JQUERY_RELEASES = ['1.11.1', '2.1.4', '2.2.0', '2.2.4', '3.0.0-alpha1', '3.0.0-rc1',
+                       '3.0.0', '3.1.0', '3.1.1-SNAPSHOT']
+
+    @pytest.mark.parametrize('versions', [
+        ['1-alpha', '1-beta', '1-milestone', '1-rc', '1-SNAPSHOT', '1', '1-sp'],
+        ['1-a1', '1-alpha-2', '1-b1', '1-m1', '1-cr1'],
+        ['1.0.0', '1.0.1', '1.1', '1.1-sp', '1.1.1', '1.2', '1.10'],
+        ['1-1', '1.1'],
+        ['1', '1.foo', '1-foo', '1.1'],
+    ])
+    def test_maven_version_ordering(self, versions):
+        """Test that MavenVersion orders versions the same way as Maven does."""
+        parsed = [MavenVersion.parse(v) for v in versions]
+        assert [v.version for v in sorted(reversed(parsed))] == versions
+        for left, right in zip(parsed, parsed[1:]):
+            assert left < right
+
+    @pytest.mark.parametrize('a, b', [
+        ('1', '1.0'),
+        ('1', '1.0.0'),
+        ('1.0-ga', '1'),
+        ('1-final', '1.0.0'),
+        ('1-RC1', '1-cr1'),
+    ])
+    def test_maven_version_equality(self, a, b):
+        """Test equivalent Maven versions."""
+        assert MavenVersion.parse(a) == MavenVersion.parse(b)
+
+    @pytest.mark.parametrize('spec, expected', [
+        ('[2.2.0,3.1)', '3.0.0'),
+        ('[2.2.0,3.1]', '3.1.0'),
+        ('(,2.2.0)', '2.1.4'),
+        ('[3.0.0]', '3.0.0'),
+        ('(,1.0],[2.0,2.2)', '2.1.4'),
+        ('[1.0,)', '3.1.0'),
+        ('[4.0,5.0)', None),
+    ])
+    def test_maven_version_range_newest(self, spec, expected):
+        """Test selecting the newest version in range."""
+        assert MavenVersionRange(spec).newest(self.JQUERY_RELEASES) == expected
+
+    @pytest.mark.parametrize('spec', [
+        '1.0', '[1.0', '[1.0,2.0)abc', '(1.0)', '[2.0,1.0]', '[1.0,1.0)', '[1.0,2.0],[1.5,3.0]',
+    ])
+    def test_maven_version_range_invalid(self, spec):
+        """Test that invalid ranges and soft requirements are rejected."""
+        with pytest.raises(ValueError):
+            MavenVersionRange(spec)
+
+    def test_maven_solver_in_process(self):
+        """Test that MavenSolver resolves ranges without running Maven."""
+        fetcher = MavenReleasesFetcher(self.MAVEN)
+        flexmock(fetcher).should_receive('fetch_releases').with_args('org.webjars.npm:jquery')\
+            .and_return(('org.webjars.npm:jquery', self.JQUERY_RELEASES)).once()
+        flexmock(MavenSolver).should_receive('_resolve_versions').with_args({}).and_return({})
+
+        solver = MavenSolver(self.MAVEN, fetcher)
+        result = solver.solve(['foo:bar 6.6.6', 'org.webjars.npm:jquery:: [2.2.0,3.1)'])
+        assert result == {'foo:bar': '6.6.6', 'org.webjars.npm:jquery': '3.0.0'}
+
+    @pytest.mark.parametrize('max_workers, expected', [
+        (1, []),
+        (4, ['g:a', 'g:b']),
+    ])
+    def test_maven_prefetch(self, max_workers, expected):
+        """Test that releases of ranged dependencies are prefetched concurrently, if enabled."""
+        inner = MavenReleasesFetcher(self.MAVEN)
+        fetched = []
+        threads = set()
+
+        def _fetch_releases(package):
+            fetched.append(package)
+            threads.add(threading.get_ident())
+            return package, ['1.0']
+
+        flexmock(inner).should_receive('fetch_releases').replace_with(_fetch_releases)
+        solver = MavenSolver(self.MAVEN, CachedReleasesFetcher(
+            inner, cache=ReleasesCache(cache_dir=''), ttl=60), max_workers=max_workers)
+
+        solver.prefetch(['g:a [1.0,2.0)', 'g:b:: (,1.0]', 'g:c 1.0'])
+        assert sorted(fetched) == expected
+        assert threading.get_ident() not in threads
+
+    def test_maven_solver_fallback(self):
+        """Test that ranges which can't be resolved in-process are resolved by Maven."""
+        fetcher = MavenReleasesFetcher(self.MAVEN)
+        flexmock(fetcher).should_receive('fetch_releases').and_return(('g:a', []))
+        flexmock(MavenSolver).should_receive('_resolve_versions')\
+            .with_args({'g:a': '[1.0,2.0)', 'g:b': '[${version},)'})\
+            .and_return({'g:a': '1.5', 'g:b': '3.0'}).once()
+
+        solver = MavenSolver(self.MAVEN, fetcher)
+        assert solver.solve(['g:a [1.0,2.0)', 'g:b [${version},)']) == {'g:a': '1.5', 'g:b': '3.0'}
@@ -0,0 +1,115 @@
+"""Tests covering code in task_metrics.py."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flexmock import flexmock
+
+from f8a_worker import task_metrics
+from f8a_worker.task_metrics import (PrometheusExporter, StatsdExporter, collect_task_metrics,
+                                     current_metrics, propagate, span, timed)
+from f8a_worker.utils import CommandResources
+
+
+@timed('parse')
+def _parse(value):
+    return int(value)
+
+
+class TestTaskMetrics(object):
+    """Tests for collecting metrics of a task."""
+
+    def setup_method(self, method):
+        """Do not export metrics anywhere."""
+        flexmock(task_metrics, _exporters=[])
+        assert method
+
+    def test_disabled(self):
+        """Test that nothing is collected if metrics are disabled."""
+        with collect_task_metrics('metadata', enabled=False) as metrics:
+            assert not metrics.enabled
+            with span('download') as first, span('extract') as second:
+                assert first is second
+            assert _parse('1') == 1
+            task_metrics.add_bytes('s3_download', 10)
+        assert current_metrics() is metrics
+
+    def test_summary(self):
+        """Test that spans, bytes and commands are collected for the running task."""
+        with collect_task_metrics('metadata', enabled=True) as metrics:
+            assert current_metrics() is metrics
+            for _ in range(2):
+                with span('download'):
+                    task_metrics.add_bytes('s3_download', 512)
+            assert _parse('2') == 2
+            task_metrics.add_command(['/usr/bin/mercator', '-config'],
+                                     CommandResources(1.5, 1.0, 2048))
+            task_metrics.add_command(['mercator'], CommandResources(0.5, None, None))
+
+        assert not current_metrics().enabled
+        summary = metrics.summary()
+        assert list(summary['phases']) == ['download', 'parse']
+        assert summary['phases']['download']['count'] == 2
+        assert summary['phases']['download']['time'] >= 0
+        assert summary['bytes'] == {'s3_download': 1024}
+        assert summary['commands'] == {'mercator': {'runs': 2, 'wall_time': 2.0,
+                                                    'cpu_time': 1.0, 'max_rss': 2048}}
+
+    def test_propagate(self):
+        """Test that metrics recorded in thread pools are reported to the submitting task."""
+        def _download(size):
+            with span('download'):
+                task_metrics.add_bytes('s3_download', size)
+            return current_metrics()
+
+        with collect_task_metrics('digests', enabled=True) as metrics:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                used = list(executor.map(propagate(_download), [256, 512, 1024]))
+                assert executor.submit(current_metrics).result() is not metrics
+
+        assert used == [metrics] * 3
+        summary = metrics.summary()
+        assert summary['phases']['download']['count'] == 3
+        assert summary['bytes'] == {'s3_download': 1792}
+
+        with collect_task_metrics('digests', enabled=False):
+            assert propagate(_download) is _download
+
+    def test_export(self):
+        """Test that metrics are exported also if the task fails."""
+        exporter = flexmock()
+        exporter.should_receive('export').with_args('digests', dict, float, True).once()
+        flexmock(task_metrics, _exporters=[exporter])
+
+        with pytest.raises(ValueError):
+            with collect_task_metrics('digests', enabled=True):
+                raise ValueError()
+
+
+def test_statsd_lines():
+    """Test formatting of StatsD lines."""
+    summary = {'phases': {'extract': {'count': 1, 'time': 0.25}},
+               'bytes': {'s3_download': 100},
+               'commands': {'scancode': {'runs': 1, 'wall_time': 2.0, 'cpu_time': 1.5,
+                                         'max_rss': 300}}}
+    lines = StatsdExporter('localhost').lines('source_licenses', summary, 3.0, False)
+    assert lines == ['f8a_worker.source_licenses.duration:3000.000|ms',
+                     'f8a_worker.source_licenses.succeeded:1|c',
+                     'f8a_worker.source_licenses.phase.extract:250.000|ms',
+                     'f8a_worker.source_licenses.bytes.s3_download:100|c',
+                     'f8a_worker.source_licenses.command.scancode.cpu_time:1500.000|ms',
+                     'f8a_worker.source_licenses.command.scancode.max_rss:300|g']
+
+
+def test_prometheus_render():
+    """Test that metrics of task runs are aggregated."""
+    summary = {'phases': {'execute': {'count': 1, 'time': 0.5}}, 'bytes': {}, 'commands': {}}
+    exporter = PrometheusExporter()
+    exporter.export('metadata', summary, 1.0, False)
+    exporter.export('metadata', summary, 2.0, False)
+
+    lines = exporter.render().splitlines()
+    assert 'f8a_task_runs_total{status="ok",task="metadata"} 2' in lines
+    assert 'f8a_task_duration_seconds_sum{task="metadata"} 3.0' in lines
+    assert 'f8a_task_phase_seconds_sum{phase="execute",task="metadata"} 1.0' in lines
+    assert 'f8a_task_phase_seconds_count{phase="execute",task="metadata"} 2' in lines
@@ -1,7 +1,13 @@
 """Tests covering code in utils.py."""
 
 import errno
+import hashlib
+import io
 import itertools
+import json
+import os
+import random
+import sys
 from pathlib import Path
 import pytest
 from sqlalchemy.ext.declarative import declarative_base
@@ -14,9 +20,14 @@ from f8a_worker.utils import (
     ThreadPool,
     MavenCoordinates,
     compute_digest,
+    compute_digests,
     parse_gh_repo,
     url2git_repo,
-    normalize_package_name
+    normalize_package_name,
+    load_json_stream,
+    TimedCommand,
+    command_stats,
+    get_command_output
 )
 
 Base = declarative_base()
@@ -87,6 +98,154 @@ class TestUtilFunctions(object):
         SHA256_FOR_EMPTY_INPUT = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
         assert compute_digest("/dev/null") == SHA256_FOR_EMPTY_INPUT
 
+    @pytest.mark.parametrize('size', [0, 10, 1024 * 1024 + 1])
+    def test_compute_digests(self, tmpdir, size):
+        """Test that compute_digests() computes all digests in one pass."""
+        content = os.urandom(size)
+        target = tmpdir.join('file')
+        target.write_binary(content)
+
+        digests = compute_digests(str(target), chunk_size=4096)
+        assert digests == {
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'sha1': hashlib.sha1(content).hexdigest(),
+            'md5': hashlib.md5(content).hexdigest()
+        }
+        assert compute_digest(str(target), 'md5') == digests['md5']
+        with pytest.raises(OSError):
+            compute_digests(str(tmpdir))
+
+
+class TestJSONStream(object):
+    """Test incremental JSON parsing."""
+
+    DOCUMENTS = [
+        {'files': [{'path': 'a', 'licenses': []}, {'path': 'b\u00e9', 'licenses': [1, 2.5e3]}],
+         'files_count': 123456, 'scancode_options': {'--quiet': True, 'x': None},
+         'empty': [], 'nested': [[1, [2]], {'k': [3]}], 'text': ' ,]}[{"\\'},
+        {},
+        [1, {'a': [2]}, 'three'],
+        12345678,
+        'text'
+    ]
+
+    @pytest.mark.parametrize('document', DOCUMENTS)
+    @pytest.mark.parametrize('chunk_size', [1, 3, 65536])
+    def test_load(self, document, chunk_size):
+        """Test that result is the same as for json.loads() regardless of chunk size."""
+        text = json.dumps(document, indent=1)
+        assert load_json_stream(io.StringIO(text), chunk_size=chunk_size) == document
+
+    def test_load_numbers_split_across_reads(self):
+        """Test that numbers split at '.', 'e' or a digit between two reads are decoded whole."""
+        text = json.dumps({'notice': 'x' * 65530, 'elapsed': 123.45})
+        assert load_json_stream(io.StringIO(text)) == json.loads(text)
+
+        rnd = random.Random(0)
+
+        def _value(depth):
+            kind = rnd.choice(['number', 'number', 'literal', 'text', 'array', 'object'])
+            if kind == 'number':
+                return rnd.choice([0, 0.0, -1, 1e-7, 2.5e30, rnd.randint(-10 ** 6, 10 ** 6),
+                                   rnd.uniform(-1000, 1000)])
+            if kind == 'literal':
+                return rnd.choice([True, False, None])
+            if kind == 'text' or depth > 3:
+                return ''.join(rnd.choice('ab1.e- ,]}"\\') for _ in range(rnd.randint(0, 5)))
+            if kind == 'array':
+                return [_value(depth + 1) for _ in range(rnd.randint(0, 4))]
+            return {str(i): _value(depth + 1) for i in range(rnd.randint(0, 4))}
+
+        for _ in range(300):
+            text = json.dumps(_value(0), indent=rnd.choice([None, 1]))
+            for chunk_size in (1, 2, 3, 5, 7):
+                assert load_json_stream(io.StringIO(text), chunk_size=chunk_size) == \
+                    json.loads(text), text
+
+    def test_item_handlers(self):
+        """Test that handled arrays are streamed to handlers and left out from result."""
+        files = []
+        document = dict(self.DOCUMENTS[0])
+        result = load_json_stream(io.StringIO(json.dumps(document)), chunk_size=5,
+                                  item_handlers={'files': files.append})
+        assert files == document.pop('files')
+        assert result == document
+
+    @pytest.mark.parametrize('text', ['{"a": 1', '{"a": 1}}', '{"a" 1}', '{1: 2}', '[1, 2',
+                                      '{"a": [1 2]}', ''])
+    def test_invalid(self, text):
+        """Test that invalid JSON is rejected."""
+        with pytest.raises(ValueError):
+            load_json_stream(io.StringIO(text), chunk_size=2)
+
+    def test_max_value_size(self):
+        """Test that values larger than the limit are rejected, but arrays are not."""
+        items = ['x' * 50] * 100
+        assert load_json_stream(io.StringIO(json.dumps({'items': items})), chunk_size=10,
+                                max_value_size=100) == {'items': items}
+        with pytest.raises(ValueError):
+            load_json_stream(io.StringIO(json.dumps({'text': 'x' * 200})), chunk_size=10,
+                             max_value_size=100)
+
+    def test_timed_command(self):
+        """Test that JSON output of a command is parsed incrementally."""
+        document = {'files': [{'path': str(i)} for i in range(1000)], 'files_count': 1000}
+        script = 'import json; print(json.dumps({!r}))'.format(document)
+        files = []
+        status, output, error = TimedCommand([sys.executable, '-c', script]).run(
+            is_json=True, timeout=60, json_item_handlers={'files': files.append})
+        assert status == 0
+        assert output == {'files_count': 1000}
+        assert files == document['files']
+
+        status, output, error = TimedCommand([sys.executable, '-c', '']).run(is_json=True)
+        assert (status, output) == (0, '')
+
+
+class TestTimedCommand(object):
+    """Test running external commands."""
+
+    def test_resources(self):
+        """Test that resources used by the command are recorded."""
+        command_stats.reset()
+        script = 'x = bytearray(64 * 1024 * 1024); print(sum(range(10 ** 6)))'
+        command = TimedCommand([sys.executable, '-c', script])
+        assert command.run(timeout=60) == (0, [str(sum(range(10 ** 6)))], '')
+
+        assert command.resources.wall_time > 0
+        assert 0 < command.resources.cpu_time <= command.resources.wall_time + 1
+        assert command.resources.max_rss >= 64 * 1024
+        stats = command_stats.snapshot()[os.path.basename(sys.executable)]
+        assert stats['runs'] == 1
+        assert stats['max_rss'] == command.resources.max_rss
+
+    def test_timeout_kills_process_tree(self, tmpdir):
+        """Test that subprocesses of a command are killed on timeout too."""
+        pid_file = str(tmpdir.join('pid'))
+        # the grandchild would write to the file only if it survived
+        script = ('import subprocess, sys; '
+                  'p = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3); '
+                  'open({f!r}, \'w\').write(\'alive\')"]); '
+                  'p.wait()').format(f=pid_file)
+        status, _, error = TimedCommand([sys.executable, '-c', script]).run(timeout=0.5)
+        assert status == -9
+        assert error == 'Killed by timeout after 0.5 seconds'
+        with pytest.raises(TaskError):
+            get_command_output([sys.executable, '-c', script], graceful=False, timeout=0.5)
+
+        import time
+        time.sleep(3.5)
+        assert not os.path.exists(pid_file)
+
+    def test_get_command_output(self):
+        """Test that output is returned and failures handled."""
+        assert get_command_output([sys.executable, '-c', 'print("a\\nb")']) == ['a', 'b']
+        assert get_command_output([sys.executable, '-c', 'print(\'{"a": 1}\')'],
+                                  is_json=True) == {'a': 1}
+        assert get_command_output([sys.executable, '-c', 'exit(1)']) == []
+        with pytest.raises(TaskError):
+            get_command_output([sys.executable, '-c', 'exit(1)'], graceful=False)
+
 
 class TestThreadPool(object):
     """Test ThreadPool class."""
@@ -45,3 +45,17 @@ class TestDigester(object):
         # the artifact digest which Indy returns is the same as the one from DigesterTask
         assert artifact_digest == artifact_details['sha256'] == compute_digest(artifact_path)
         assert artifact_details['path'] == 'six-1.0.0.tar.gz'
+
+    def test_compute_files_digests(self, tmpdir):
+        """Check that digests of extracted files are computed in parallel, keeping order."""
+        files = []
+        for i in range(10):
+            f = tmpdir.join('file{}'.format(i))
+            f.write(str(i))
+            files.append(str(f))
+
+        task = DigesterTask.create_test_instance(task_name='digests')
+        results = task.compute_files_digests(str(tmpdir), files)
+        assert [r['path'] for r in results] == ['file{}'.format(i) for i in range(10)]
+        assert [r['sha256'] for r in results] == [compute_digest(f) for f in files]
+        assert all(r['ssdeep'] for r in results)
@@ -1,9 +1,15 @@
 """Tests for the InitAnalysisFlow task."""
 
+import os
+
 import pytest
-from selinon import FatalTaskError
+from flexmock import flexmock
+from selinon import FatalTaskError, StoragePool
 
+from f8a_worker.defaults import configuration
+from f8a_worker.object_cache import ObjectCache
 from f8a_worker.workers import InitAnalysisFlow
+from f8a_worker.workers import init_analysis_flow
 
 
 @pytest.mark.usefixtures("dispatcher_setup")
@@ -22,3 +28,29 @@ class TestInitAnalysisFlow(object):
 
         with pytest.raises(FatalTaskError):
             task.execute(arguments=args)
+
+    def test_fetch_from_registry_mirror(self, rdb, npm, registry_stub, tmpdir, monkeypatch):
+        """Check that the artifact is downloaded from REGISTRY_MIRROR_URL if it's set."""
+        monkeypatch.setattr(configuration, 'WORKER_DATA_DIR', str(tmpdir))
+        flexmock(init_analysis_flow).should_receive('is_pkg_public').and_return(True)
+        flexmock(StoragePool).should_receive('get_storage_by_task_name').\
+            and_return(flexmock(session=rdb))
+        uploaded = []
+        extracted = []
+
+        def _put_source_tarball(path):
+            uploaded.append(os.path.basename(path))
+            extracted.extend(os.listdir(os.path.join(os.path.dirname(path), 'package')))
+
+        flexmock(ObjectCache).should_receive('get_from_dict').and_return(flexmock(
+            has_source_tarball=lambda: False, put_source_tarball=_put_source_tarball))
+
+        task = InitAnalysisFlow.create_test_instance(task_name='InitAnalysisFlow')
+        result = task.execute({'ecosystem': 'npm', 'name': 'left-pad', 'version': '1.3.0'})
+
+        assert uploaded == ['package.tgz']
+        # only manifests are extracted, the tree is removed anyway
+        assert extracted == ['package.json']
+        assert registry_stub.requests > 0
+        assert result['document_id']
+        assert result['ecosystem_backend'] == 'npm'
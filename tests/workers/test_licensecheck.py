@@ -2,6 +2,8 @@
 
 """Tests for the LicenseCheckTask worker task."""
 
+import copy
+
 import jsonschema
 from flexmock import flexmock
 from pathlib import Path
@@ -27,6 +29,29 @@ class TestLicenseCheck(object):
         res = task.execute(arguments=args)
         assert res is None
 
+    def test_process_streamed_output(self):
+        """Test that licenses of streamed files are merged the same way as of files in output."""
+        def _license(short_name):
+            return {'short_name': short_name, 'key': short_name.lower(), 'score': 100.0,
+                    'start_line': 1, 'end_line': 20, 'matched_rule': {}, 'category': 'Permissive'}
+
+        files = [{'path': 'LICENSE', 'licenses': [_license('MIT License')]},
+                 {'path': 'src/a.c', 'licenses': [_license('MIT License'), _license('BSD')]}]
+        output = {'files_count': 2, 'scancode_version': '2.2.1', 'scancode_options': {}}
+
+        expected = LicenseCheckTask.process_output(dict(output, files=copy.deepcopy(files)))
+        licenses = {}
+        for file in copy.deepcopy(files):
+            LicenseCheckTask.add_file_licenses(licenses, file)
+        streamed = LicenseCheckTask.process_output(dict(output), licenses)
+
+        for result in (expected, streamed):
+            for info in result['licenses'].values():
+                info['paths'].sort()
+        assert streamed == expected
+        assert streamed['licenses']['MIT License']['paths'] == ['LICENSE', 'src/a.c']
+        assert 'scancode_options' not in streamed
+
     @pytest.mark.skipif(not Path('/opt/scancode-toolkit/scancode').is_file(),
                         reason="requires scancode")
     @pytest.mark.usefixtures("no_s3_connection")
@@ -33,12 +33,13 @@ class TestNewPackageAnalysisGraphImporterTask(TestCase):
         if not assert_cond:
             False
 
-    @mock.patch('f8a_worker.workers.new_graph_importer.requests.post', return_value=ErrorResponse())
+    @mock.patch('f8a_worker.workers.new_graph_importer.http_client.post',
+                return_value=ErrorResponse())
     def test_execute(self, _mock1):
         """Tests for 'execute'."""
         self.assertRaises(RuntimeError, NewPackageAnalysisGraphImporterTask.execute, self, data)
 
-    @mock.patch('f8a_worker.workers.new_graph_importer.requests.post', return_value=Response())
+    @mock.patch('f8a_worker.workers.new_graph_importer.http_client.post', return_value=Response())
     def test_execute1(self, _mock1):
         """Tests for 'execute'."""
         NewPackageAnalysisGraphImporterTask.execute(self, data)
@@ -51,12 +52,13 @@ class TestNewPackageGraphImporterTask(TestCase):
         if not assert_cond:
             False
 
-    @mock.patch('f8a_worker.workers.new_graph_importer.requests.post', return_value=ErrorResponse())
+    @mock.patch('f8a_worker.workers.new_graph_importer.http_client.post',
+                return_value=ErrorResponse())
     def test_execute(self, _mock1):
         """Tests for 'execute'."""
         self.assertRaises(RuntimeError, NewPackageGraphImporterTask.execute, self, data)
 
-    @mock.patch('f8a_worker.workers.new_graph_importer.requests.post', return_value=Response())
+    @mock.patch('f8a_worker.workers.new_graph_importer.http_client.post', return_value=Response())
     def test_execute1(self, _mock1):
         """Tests for 'execute'."""
         NewPackageGraphImporterTask.execute(self, data)
@@ -1,6 +1,11 @@
-"""Tests for the function f8a_worker.dispatcher.foreach._is_url_dependency."""
+"""Tests for functions in f8a_worker.dispatcher.foreach."""
 
+from flexmock import flexmock
+
+from f8a_worker.dispatcher import foreach
 from f8a_worker.dispatcher.foreach import _is_url_dependency
+from f8a_worker.ecosystem_registry import EcosystemRecord
+from f8a_worker.enums import EcosystemBackend
 
 
 def test__is_url_dependency():
@@ -15,3 +20,60 @@ def test__is_url_dependency():
     for d, is_url_dep in data:
         assert _is_url_dependency(d) == is_url_dep
     # TODO: check how improper input is handled
+
+
+class _StoragePool(object):
+    """Fake storage pool serving task results and Postgres adapter."""
+
+    def __init__(self, results, postgres):
+        self.results = results
+        self.postgres = postgres
+
+    def get(self, name):
+        return self.results[name]
+
+    def get_connected_storage(self, name):
+        assert name == 'BayesianPostgres'
+        return self.postgres
+
+
+def _postgres(analysed):
+    postgres = flexmock()
+    postgres.should_receive('get_analysed_versions').replace_with(
+        lambda epvs: {epv for epv in epvs if epv in analysed}).once()
+    return postgres
+
+
+def _mock_registry():
+    record = EcosystemRecord(1, 'npm', None, None, EcosystemBackend.npm)
+    flexmock(foreach.ecosystem_registry).should_receive('by_name').and_return(record)
+    flexmock(foreach.StoragePool).should_receive('get_connected_storage').and_return(flexmock(
+        session=None))
+
+
+def test_iter_dependencies_analysis():
+    """Test that already analysed and URL dependencies are not scheduled."""
+    _mock_registry()
+    deps = [{'ecosystem': 'npm', 'name': 'serve-static', 'version': '1.7.1'},
+            {'ecosystem': 'npm', 'name': 'express', 'version': '4.0.0'},
+            {'ecosystem': 'npm', 'name': 'test', 'version': 'http://some.tar/ball.tgz'}]
+    pool = _StoragePool({'dependency_snapshot': {'details': {'runtime': deps}}},
+                        _postgres({('npm', 'serve-static', '1.7.1')}))
+
+    assert foreach.iter_dependencies_analysis(pool, {'recursive_limit': 2}) == [
+        {'ecosystem': 'npm', 'name': 'express', 'version': '4.0.0', 'recursive_limit': 1}
+    ]
+
+
+def test_iter_dependencies_stack():
+    """Test that already analysed dependencies of a stack are not scheduled."""
+    _mock_registry()
+    resolved = [{'package': 'serve-static', 'version': '1.7.1'},
+                {'package': 'express', 'version': '4.0.0'}]
+    aggregated = {'result': [{'details': [{'ecosystem': 'npm', '_resolved': resolved}]}]}
+    pool = _StoragePool({'AggregatingMercatorTask': aggregated},
+                        _postgres({('npm', 'express', '4.0.0')}))
+
+    assert foreach.iter_dependencies_stack(pool, {}) == [
+        {'ecosystem': 'npm', 'name': 'serve-static', 'version': '1.7.1'}
+    ]
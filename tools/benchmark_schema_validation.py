@@ -0,0 +1,60 @@
+"""Micro-benchmark of validating task results against their schemas.
+
+Compares jsonschema.validate(), which BaseTask.validate_result() called for every task
+(creating a validator and checking the schema itself on each call), with validators
+cached by CompiledSchemas, using the jsonschema backend and, if installed, fastjsonschema.
+
+Schemas are the generated copies in tests/data/schemas/, results are representative
+outputs of the metadata, source_licenses and digests tasks from tests/data/results/.
+
+Usage:
+python3 tools/benchmark_schema_validation.py [number_of_repetitions]
+"""
+
+import json
+import os
+import sys
+from timeit import timeit
+
+import jsonschema
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from f8a_worker.schemas import (CompiledSchemas, SchemaLibrary, SchemaRef,  # noqa: E402
+                                fastjsonschema)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data')
+
+RESULTS = {
+    SchemaRef('metadata', '4-0-0'): 'metadata.json',
+    SchemaRef('source_licenses', '3-0-0'): 'source_licenses.json',
+    SchemaRef('digests', '1-0-0'): 'digests.json',
+}
+
+
+def main():
+    """Run the benchmark."""
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    library = SchemaLibrary(os.path.join(DATA_DIR, 'schemas'))
+    backends = ['jsonschema'] + (['fastjsonschema'] if fastjsonschema is not None else [])
+
+    print('{:<16} {:>22} {:>14}'.format('schema', 'backend', 'us/validation'))
+    for schema_ref, file_name in RESULTS.items():
+        with open(os.path.join(DATA_DIR, 'results', file_name)) as f:
+            result = json.load(f)
+        schema = library.load_schema(schema_ref)
+
+        seconds = timeit(lambda: jsonschema.validate(result, schema), number=number)
+        print('{:<16} {:>22} {:>14.1f}'.format(schema_ref.name, 'jsonschema.validate()',
+                                               seconds / number * 1e6))
+
+        for backend in backends:
+            validators = CompiledSchemas(library, backend=backend)
+            validators.precompile([schema_ref])
+            seconds = timeit(lambda: validators.validate(result, schema_ref), number=number)
+            print('{:<16} {:>22} {:>14.1f}'.format(schema_ref.name, 'compiled ' + backend,
+                                                   seconds / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
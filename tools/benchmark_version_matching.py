@@ -0,0 +1,102 @@
+"""Micro-benchmark of matching version specs against release lists.
+
+Compares the original per-release path (Dependency.check() for every release followed
+by sorting with cmp_to_key(compare_version), both re-parsing version strings on every
+comparison) with ReleasesMatcher, which parses and sorts releases once and bisects.
+
+Release lists recorded from PyPI are stored in tests/data/releases/.
+
+Usage:
+python3 tools/benchmark_version_matching.py [number_of_repetitions]
+"""
+
+import json
+import os
+import sys
+from functools import cmp_to_key
+from timeit import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from f8a_worker.solver import Dependency, ReleasesMatcher, Tokens  # noqa: E402
+
+RELEASES_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data', 'releases')
+
+SPECS = {
+    'botocore': [[('>=', '1.12.0'), ('<', '1.13.0')], ('>', '1.30.0')],
+    'setuptools': [[('>=', '40.0.0'), ('!=', '41.0.0'), ('<', '60')]],
+    'django': [[('>=', '1.11'), ('<', '2.0')], [('>=', '3.2'), ('<', '3.3')]],
+}
+
+
+def legacy_compare_version(a, b):
+    """Compare two version strings, the way compare_version() did before parsing was cached."""
+    def _range(q):
+        r = []
+        for n in q.replace('-', '.').split('.'):
+            try:
+                r.append(int(n))
+            except ValueError:
+                r.append(-1)
+        return r
+
+    left, right = _range(a), _range(b)
+    length = max(len(left), len(right))
+    left = left + [0] * (length - len(left))
+    right = right + [0] * (length - len(right))
+    return (left > right) - (left < right)
+
+
+def legacy_check(dependency, version):
+    """Check version against dependency spec, the way Dependency.check() did."""
+    def _compare_spec(spec):
+        if len(spec) == 1:
+            spec = ('=', spec[0])
+
+        token = Tokens.operators.index(spec[0])
+        comparison = legacy_compare_version(version, spec[1])
+        if token in [Tokens.EQ1, Tokens.EQ2]:
+            return comparison == 0
+        elif token == Tokens.GT:
+            return comparison == 1
+        elif token == Tokens.LT:
+            return comparison == -1
+        elif token == Tokens.GTE:
+            return comparison >= 0
+        elif token == Tokens.LTE:
+            return comparison <= 0
+        return comparison != 0
+
+    def _all(spec_):
+        return all(_all(s) if isinstance(s, list) else _compare_spec(s) for s in spec_)
+
+    return any(_all(s) if isinstance(s, list) else _compare_spec(s) for s in dependency.spec)
+
+
+def legacy_match(releases, dependency):
+    """Match releases the way Solver.solve() did before ReleasesMatcher was introduced."""
+    return sorted([r for r in releases if legacy_check(dependency, r)],
+                  key=cmp_to_key(legacy_compare_version))
+
+
+def main():
+    """Run the benchmark and print results."""
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    header = ('package', 'releases', 'legacy [ms]', 'matcher [ms]', 'speedup')
+    print("{:<12} {:>9} {:>12} {:>12} {:>9}".format(*header))
+    for name, spec in sorted(SPECS.items()):
+        with open(os.path.join(RELEASES_DIR, name + '.json')) as f:
+            releases = json.load(f)
+        dependency = Dependency(name, spec)
+
+        assert legacy_match(releases, dependency) == ReleasesMatcher(releases).match(dependency)
+
+        legacy = timeit(lambda: legacy_match(releases, dependency), number=number) / number
+        matcher = timeit(lambda: ReleasesMatcher(releases).match(dependency),
+                         number=number) / number
+        print("{:<12} {:>9} {:>12.3f} {:>12.3f} {:>8.1f}x".format(
+            name, len(releases), legacy * 1000, matcher * 1000, legacy / matcher))
+
+
+if __name__ == '__main__':
+    main()
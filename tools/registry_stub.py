@@ -0,0 +1,294 @@
+"""Local stand-in of npm, PyPI, Maven and NuGet registries serving recorded data.
+
+Release fetchers and IndianaJones talk to public registries. To run ingestion offline
+(e.g. throughput tests of the analysis flows on a single machine), serve recorded
+metadata and artifacts with this stub and point the worker at it:
+
+    python3 tools/registry_stub.py serve --port 8400 tests/data/registry
+    export REGISTRY_MIRROR_URL=http://localhost:8400
+
+With REGISTRY_MIRROR_URL set, fetch URLs of ecosystems become <url>/<backend>/, the
+stub maps request paths to files under the data directory:
+
+    npm/<name>/index.json                      package document ("packument")
+    npm/<name>/-/<name>-<version>.tgz          tarballs
+    pypi/<name>/json/index.json                JSON API document
+    pypi/packages/<file>                       release files
+    maven/<group/path>/<artifact>/...          maven-metadata.xml, <version>/*.jar, ...
+    nuget/packages/<name>/index.html           package page with version history
+    nuget/<name>.<version>.nupkg               packages
+
+A directory is served as its index.json or index.html. `{mirror}` in JSON, HTML and
+XML files is replaced with the base URL of the stub, so that documents can refer to
+artifacts served by the stub. More packages can be recorded from the live registries:
+
+    python3 tools/registry_stub.py record tests/data/registry npm express 4.17.1
+
+Go packages are fetched with `go get` and cannot be served by the stub.
+"""
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import quote, unquote, urlparse
+
+import requests
+
+PLACEHOLDER = '{mirror}'
+TEMPLATE_EXTENSIONS = ('.json', '.html', '.xml')
+INDEX_FILES = ('index.json', 'index.html')
+
+UPSTREAM = {
+    'npm': 'https://registry.npmjs.org/',
+    'pypi': 'https://pypi.org/pypi/',
+    'maven': 'https://repo1.maven.org/maven2/',
+    'nuget': 'https://www.nuget.org/',
+}
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class RegistryStubHandler(BaseHTTPRequestHandler):
+    """Serve files from the data directory of the stub."""
+
+    def _resolve(self):
+        """Get path of the file to serve, None if there is no such file."""
+        data_dir = self.server.data_dir
+        path = os.path.normpath(os.path.join(data_dir, unquote(urlparse(self.path).path)
+                                             .lstrip('/')))
+        if os.path.commonpath([data_dir, path]) != data_dir:
+            return None
+        if os.path.isdir(path):
+            for index in INDEX_FILES:
+                if os.path.isfile(os.path.join(path, index)):
+                    return os.path.join(path, index)
+            return None
+        return path if os.path.isfile(path) else None
+
+    def _send(self, head_only):
+        self.server.count_request()
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        if path.endswith(TEMPLATE_EXTENSIONS):
+            base_url = 'http://{h}'.format(h=self.headers.get('Host') or
+                                           '{}:{}'.format(*self.server.server_address))
+            body = body.replace(PLACEHOLDER.encode(), base_url.encode())
+
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type',
+                         mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        """Serve GET request."""
+        self._send(head_only=False)
+
+    def do_HEAD(self):  # noqa: N802
+        """Serve HEAD request."""
+        self._send(head_only=True)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Log requests only if the stub is verbose."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class RegistryStub(object):
+    """HTTP server serving recorded registry data."""
+
+    def __init__(self, data_dir, host='127.0.0.1', port=0, verbose=False):
+        """Initialize stub.
+
+        :param data_dir: str, directory with recorded data
+        :param host: str, address to listen on
+        :param port: int, port to listen on, 0 picks a free one
+        :param verbose: bool, log served requests
+        """
+        self.server = _ThreadingHTTPServer((host, port), RegistryStubHandler)
+        self.server.data_dir = os.path.abspath(data_dir)
+        self.server.verbose = verbose
+        self.server.requests = 0
+        lock = threading.Lock()
+
+        def _count_request():
+            with lock:
+                self.server.requests += 1
+
+        self.server.count_request = _count_request
+        self._thread = None
+
+    @property
+    def url(self):
+        """Get base URL of the stub, usable as REGISTRY_MIRROR_URL."""
+        return 'http://{}:{}'.format(*self.server.server_address)
+
+    @property
+    def requests(self):
+        """Get number of requests served so far."""
+        return self.server.requests
+
+    def start(self):
+        """Serve requests from a daemon thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving requests."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        """Start the stub."""
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        """Stop the stub."""
+        self.stop()
+
+
+def _download(url, path):
+    """Download `url` to `path`."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+    with open(path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=65536):
+            f.write(chunk)
+
+
+def _write_json(document, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def record_npm(data_dir, name, versions):
+    """Record npm package document and tarballs of `versions`."""
+    response = requests.get(UPSTREAM['npm'] + quote(name, safe='@'))
+    response.raise_for_status()
+    document = response.json()
+    package_dir = os.path.join(data_dir, 'npm', name)
+    for version, metadata in document.get('versions', {}).items():
+        tarball = metadata.get('dist', {}).get('tarball')
+        if not tarball:
+            continue
+        file_name = tarball.rsplit('/', 1)[-1]
+        metadata['dist']['tarball'] = '{m}/npm/{n}/-/{f}'.format(
+            m=PLACEHOLDER, n=name, f=file_name)
+        if version in versions:
+            _download(tarball, os.path.join(package_dir, '-', file_name))
+    _write_json(document, os.path.join(package_dir, 'index.json'))
+
+
+def record_pypi(data_dir, name, versions):
+    """Record PyPI JSON document and release files of `versions`."""
+    response = requests.get(UPSTREAM['pypi'] + name + '/json')
+    response.raise_for_status()
+    document = response.json()
+    for version, files in document.get('releases', {}).items():
+        for release_file in files:
+            url = release_file['url']
+            release_file['url'] = '{m}/pypi/packages/{f}'.format(m=PLACEHOLDER,
+                                                                 f=release_file['filename'])
+            if version in versions:
+                _download(url, os.path.join(data_dir, 'pypi', 'packages',
+                                            release_file['filename']))
+    for release_file in document.get('urls', []):
+        release_file['url'] = '{m}/pypi/packages/{f}'.format(m=PLACEHOLDER,
+                                                             f=release_file['filename'])
+    _write_json(document, os.path.join(data_dir, 'pypi', name.lower(), 'json', 'index.json'))
+
+
+def record_maven(data_dir, name, versions):
+    """Record maven-metadata.xml, jars and poms of `versions` of groupId:artifactId."""
+    group_id, artifact_id = name.split(':')
+    artifact_path = '{g}/{a}'.format(g=group_id.replace('.', '/'), a=artifact_id)
+    _download('{u}{p}/maven-metadata.xml'.format(u=UPSTREAM['maven'], p=artifact_path),
+              os.path.join(data_dir, 'maven', artifact_path, 'maven-metadata.xml'))
+    for version in versions:
+        for extension in ('jar', 'pom'):
+            file_path = '{p}/{v}/{a}-{v}.{e}'.format(
+                p=artifact_path, v=version, a=artifact_id, e=extension)
+            _download(UPSTREAM['maven'] + file_path,
+                      os.path.join(data_dir, 'maven', file_path))
+
+
+def record_nuget(data_dir, name, versions):
+    """Record NuGet package page and packages of `versions`."""
+    _download('{u}packages/{n}'.format(u=UPSTREAM['nuget'], n=name),
+              os.path.join(data_dir, 'nuget', 'packages', name, 'index.html'))
+    for version in versions:
+        file_name = '{n}.{v}.nupkg'.format(n=name.lower(), v=version.lower())
+        _download('{u}api/v2/package/{n}/{v}'.format(u=UPSTREAM['nuget'], n=name, v=version),
+                  os.path.join(data_dir, 'nuget', file_name))
+
+
+RECORDERS = {
+    'npm': record_npm,
+    'pypi': record_pypi,
+    'maven': record_maven,
+    'nuget': record_nuget,
+}
+
+
+def main(argv=None):
+    """Serve recorded data or record a package."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    serve = subparsers.add_parser('serve', help='serve recorded data')
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=8400)
+    serve.add_argument('--verbose', action='store_true')
+    serve.add_argument('data_dir')
+
+    record = subparsers.add_parser('record', help='record package from upstream registry')
+    record.add_argument('data_dir')
+    record.add_argument('ecosystem', choices=sorted(RECORDERS))
+    record.add_argument('name')
+    record.add_argument('versions', nargs='+')
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        RECORDERS[args.ecosystem](args.data_dir, args.name, set(args.versions))
+        return
+
+    stub = RegistryStub(args.data_dir, host=args.host, port=args.port, verbose=args.verbose)
+    print('Serving {d} at {u}'.format(d=args.data_dir, u=stub.url), file=sys.stderr)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()